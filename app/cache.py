@@ -0,0 +1,182 @@
+import abc
+import threading
+import time
+from collections import OrderedDict
+
+from . import metrics
+from .config import settings
+
+SYMPTOM_CACHE_BACKEND = settings.symptom_cache_backend
+SYMPTOM_CACHE_TTL = settings.symptom_cache_ttl
+SYMPTOM_CACHE_SIZE = settings.symptom_cache_size
+
+# Upper bound (exclusive) of each age band used in cache keys
+AGE_BANDS = [(2, "0-1"), (13, "2-12"), (18, "13-17"), (40, "18-39"), (65, "40-64")]
+
+
+class TTLCache:
+    """Thread-safe LRU mapping whose entries also expire after `ttl` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def discard_if(self, predicate):
+        """Remove every entry whose key satisfies `predicate`."""
+        with self._lock:
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class CacheBackend(abc.ABC):
+    """
+    Interface for symptom-check caches. Methods are async so a shared store
+    (Redis, memcached...) can be dropped in without touching the callers.
+    Values must be JSON-serialisable.
+    """
+
+    @abc.abstractmethod
+    async def get(self, key):
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key, value, ttl=None):
+        ...
+
+    @abc.abstractmethod
+    def clear(self):
+        ...
+
+    @abc.abstractmethod
+    def stats(self):
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    """In-process cache; each worker keeps its own copy."""
+
+    def __init__(self, maxsize=SYMPTOM_CACHE_SIZE, ttl=SYMPTOM_CACHE_TTL):
+        self._cache = TTLCache(maxsize, ttl)
+
+    async def get(self, key):
+        return self._cache.get(key)
+
+    async def set(self, key, value, ttl=None):
+        self._cache.set(key, value, ttl)
+
+    def clear(self):
+        self._cache.clear()
+
+    def stats(self):
+        return self._cache.stats()
+
+
+class NullBackend(CacheBackend):
+    """Caching disabled: every lookup is a miss."""
+
+    def __init__(self):
+        self.misses = 0
+
+    async def get(self, key):
+        self.misses += 1
+        return None
+
+    async def set(self, key, value, ttl=None):
+        pass
+
+    def clear(self):
+        pass
+
+    def stats(self):
+        return {"size": 0, "maxsize": 0, "hits": 0, "misses": self.misses, "evictions": 0}
+
+
+BACKENDS = {
+    "memory": MemoryBackend,
+    "none": NullBackend,
+}
+
+
+def make_backend(name):
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown cache backend: {name}")
+
+
+def age_band(age: int) -> str:
+    for upper, label in AGE_BANDS:
+        if age < upper:
+            return label
+    return f"{AGE_BANDS[-1][0]}+"
+
+
+def symptom_cache_key(symptoms, age, gender) -> str:
+    """
+    Cache key for a symptom check: sorted, case-folded symptoms plus the
+    age band and gender, so "Fever, cough" at 31 and "cough, fever" at 35
+    share an entry.
+    """
+    normalized = sorted({s.strip().casefold() for s in symptoms if s.strip()})
+    return f"{','.join(normalized)}|{age_band(age)}|{gender.strip().casefold()}"
+
+
+symptom_cache = make_backend(SYMPTOM_CACHE_BACKEND)
+
+metrics.Counter("merocare_symptom_cache_hits", "Symptom checks answered from the cache",
+                function=lambda: symptom_cache.stats()["hits"])
+metrics.Counter("merocare_symptom_cache_misses", "Symptom checks not found in the cache",
+                function=lambda: symptom_cache.stats()["misses"])
+metrics.Counter("merocare_symptom_cache_evictions", "Symptom cache entries evicted to stay under SYMPTOM_CACHE_SIZE",
+                function=lambda: symptom_cache.stats()["evictions"])
+metrics.Gauge("merocare_symptom_cache_size", "Entries in the symptom cache",
+              function=lambda: symptom_cache.stats()["size"])
@@ -0,0 +1,153 @@
+"""
+Application settings, read once from the environment (and a .env file, if
+present) the first time this module is imported. Modules copy what they need
+into their own constants, so every setting is parsed in exactly one place.
+"""
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from dotenv import load_dotenv
+
+
+def _env_bool(name, default):
+    return os.getenv(name, "true" if default else "false").lower() == "true"
+
+
+@dataclass(frozen=True)
+class Settings:
+    # Database
+    database_url: Optional[str]
+    async_database_url: Optional[str]
+    db_async: bool
+    db_pool_size: int
+    db_max_overflow: int
+    db_pool_timeout: float
+    db_pool_recycle: int
+    db_pool_pre_ping: bool
+
+    # Auth
+    secret_key: Optional[str]
+    refresh_token_expire_days: int
+    auth_cache_ttl: float
+    auth_cache_size: int
+    auth_trust_claims: bool
+    revocation_refresh_seconds: float
+    revocation_bloom_bits: int
+    bcrypt_rounds: int
+    bcrypt_min_rounds: int
+    bcrypt_max_rounds: int
+    hash_pool_size: int
+    hash_max_pending: int
+
+    # Groq
+    groq_api_key: Optional[str]
+    groq_base_url: Optional[str]
+    groq_model: str
+    groq_timeout: float
+    groq_max_connections: int
+    groq_max_concurrency: int
+    groq_max_retries: int
+    groq_rpm: int
+    groq_tpm: int
+    groq_retry_base: float
+    groq_retry_max: float
+    groq_queue_size: int
+    groq_breaker_failures: int
+    groq_breaker_reset: float
+
+    # Symptom checks and caches
+    symptom_cache_backend: str
+    symptom_cache_ttl: float
+    symptom_cache_size: int
+    semantic_cache_enabled: bool
+    semantic_cache_size: int
+    semantic_cache_dim: int
+    semantic_cache_threshold: float
+    semantic_cache_ttl: float
+    singleflight_max_waiters: int
+    idempotency_ttl: float
+    idempotency_cache_size: int
+    batch_max_items: int
+    batch_concurrency: int
+    kinship_cache_ttl: float
+    kinship_max_hops: int
+    triage_engine: str
+    triage_ai_budget: float
+    triage_emergency_precheck: bool
+
+    # Logging
+    log_level: str
+    log_sample_rate: float
+    log_slow_request_seconds: float
+
+    @classmethod
+    def from_env(cls):
+        bcrypt_rounds = int(os.getenv("BCRYPT_ROUNDS", "12"))
+        symptom_cache_ttl = float(os.getenv("SYMPTOM_CACHE_TTL", "3600"))
+        return cls(
+            database_url=os.getenv("SQLALCHEMY_DATABASE_URL"),
+            async_database_url=os.getenv("SQLALCHEMY_ASYNC_DATABASE_URL"),
+            db_async=_env_bool("DB_ASYNC", False),
+            db_pool_size=int(os.getenv("DB_POOL_SIZE", "5")),
+            db_max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "10")),
+            db_pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "30")),
+            db_pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            db_pool_pre_ping=_env_bool("DB_POOL_PRE_PING", True),
+
+            secret_key=os.getenv("SECRET_KEY"),
+            refresh_token_expire_days=int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30")),
+            auth_cache_ttl=float(os.getenv("AUTH_CACHE_TTL", "60")),
+            auth_cache_size=int(os.getenv("AUTH_CACHE_SIZE", "10000")),
+            auth_trust_claims=_env_bool("AUTH_TRUST_CLAIMS", False),
+            revocation_refresh_seconds=float(os.getenv("REVOCATION_REFRESH_SECONDS", "30")),
+            revocation_bloom_bits=int(os.getenv("REVOCATION_BLOOM_BITS", str(1 << 16))),
+            bcrypt_rounds=bcrypt_rounds,
+            bcrypt_min_rounds=int(os.getenv("BCRYPT_MIN_ROUNDS", str(bcrypt_rounds))),
+            bcrypt_max_rounds=int(os.getenv("BCRYPT_MAX_ROUNDS", str(bcrypt_rounds))),
+            hash_pool_size=int(os.getenv("HASH_POOL_SIZE", str(os.cpu_count() or 2))),
+            hash_max_pending=int(os.getenv("HASH_MAX_PENDING", "64")),
+
+            groq_api_key=os.getenv("GROQ_API_KEY"),
+            groq_base_url=os.getenv("GROQ_BASE_URL") or None,
+            groq_model=os.getenv("GROQ_MODEL", "llama-3.1-8b-instant"),
+            groq_timeout=float(os.getenv("GROQ_TIMEOUT", "30")),
+            groq_max_connections=int(os.getenv("GROQ_MAX_CONNECTIONS", "100")),
+            groq_max_concurrency=int(os.getenv("GROQ_MAX_CONCURRENCY", "32")),
+            groq_max_retries=int(os.getenv("GROQ_MAX_RETRIES", "2")),
+            # Quota of the API key, per worker process; 0 means no limit
+            groq_rpm=int(os.getenv("GROQ_RPM", "0")),
+            groq_tpm=int(os.getenv("GROQ_TPM", "0")),
+            groq_retry_base=float(os.getenv("GROQ_RETRY_BASE", "0.5")),
+            groq_retry_max=float(os.getenv("GROQ_RETRY_MAX", "8")),
+            groq_queue_size=int(os.getenv("GROQ_QUEUE_SIZE", "256")),
+            groq_breaker_failures=int(os.getenv("GROQ_BREAKER_FAILURES", "5")),
+            groq_breaker_reset=float(os.getenv("GROQ_BREAKER_RESET", "30")),
+
+            symptom_cache_backend=os.getenv("SYMPTOM_CACHE_BACKEND", "memory"),
+            symptom_cache_ttl=symptom_cache_ttl,
+            symptom_cache_size=int(os.getenv("SYMPTOM_CACHE_SIZE", "10000")),
+            semantic_cache_enabled=_env_bool("SEMANTIC_CACHE_ENABLED", True),
+            semantic_cache_size=int(os.getenv("SEMANTIC_CACHE_SIZE", "5000")),
+            semantic_cache_dim=int(os.getenv("SEMANTIC_CACHE_DIM", "256")),
+            semantic_cache_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.9")),
+            semantic_cache_ttl=float(os.getenv("SEMANTIC_CACHE_TTL", str(symptom_cache_ttl))),
+            singleflight_max_waiters=int(os.getenv("SINGLEFLIGHT_MAX_WAITERS", "1000")),
+            idempotency_ttl=float(os.getenv("IDEMPOTENCY_TTL", "86400")),
+            idempotency_cache_size=int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000")),
+            batch_max_items=int(os.getenv("BATCH_MAX_ITEMS", "50")),
+            batch_concurrency=int(os.getenv("BATCH_CONCURRENCY", "4")),
+            kinship_cache_ttl=float(os.getenv("KINSHIP_CACHE_TTL", "300")),
+            kinship_max_hops=int(os.getenv("KINSHIP_MAX_HOPS", "4")),
+            triage_engine=os.getenv("TRIAGE_ENGINE", "ai"),
+            triage_ai_budget=float(os.getenv("TRIAGE_AI_BUDGET", "10")),
+            triage_emergency_precheck=_env_bool("TRIAGE_EMERGENCY_PRECHECK", False),
+
+            log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            log_sample_rate=float(os.getenv("LOG_SAMPLE_RATE", "1.0")),
+            log_slow_request_seconds=float(os.getenv("LOG_SLOW_REQUEST_SECONDS", "2.0")),
+        )
+
+
+load_dotenv()
+settings = Settings.from_env()
@@ -1,11 +1,15 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from .import models,schemas,utils
 
-def get_user_by_email(db:Session,email:str):
-    return db.query(models.User).filter(models.User.email==email).first()
+async def get_user_by_email(db,email:str):
+    """Works with an AsyncSession or database.ThreadedSession"""
+    result=await db.execute(select(models.User).where(models.User.email==email))
+    return result.scalars().first()
 
-def create_user(db:Session,user:schemas.UserCreate):
-    hashed_password=utils.Hash.bcrypt(user.password)
+async def create_user(db,user:schemas.UserCreate):
+    """Works with an AsyncSession or database.ThreadedSession"""
+    hashed_password=await utils.Hash.bcrypt(user.password)
     db_user=models.User(
         email=user.email,
         full_name=user.full_name,
@@ -15,6 +19,37 @@ def create_user(db:Session,user:schemas.UserCreate):
         gender=user.gender
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
\ No newline at end of file
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+def set_diagnosis_details(db_diagnosis:models.Diagnosis,predicted_disease=None,urgency=None,suggested_treatment=None,symptoms=None):
+    """Fill the structured diagnosis columns; anything not passed is parsed out of user_diagnosis"""
+    parsed=utils.parse_diagnosis_text(db_diagnosis.user_diagnosis)
+    predicted_disease=predicted_disease or parsed["predicted_disease"]
+    urgency=(urgency or parsed["urgency"] or "").upper()
+    symptoms=symptoms or parsed["symptoms"] or []
+
+    db_diagnosis.predicted_disease=predicted_disease[:150] if predicted_disease else None
+    db_diagnosis.urgency=urgency if urgency in utils.URGENCY_LEVELS else None
+    db_diagnosis.suggested_treatment=suggested_treatment or parsed["suggested_treatment"]
+    names=dict.fromkeys(s.strip().lower()[:100] for s in symptoms if s.strip())
+    db_diagnosis.symptoms=[models.DiagnosisSymptom(symptom=name) for name in names]
+    return db_diagnosis
+
+def record_change(db:Session,entity:str,entity_id:int,op:str="upsert",user_id:int=None,family_id:str=None):
+    """Log a change for /sync; call before the commit that makes the change"""
+    db.add(models.ChangeLog(entity=entity,entity_id=entity_id,op=op,user_id=user_id,family_id=family_id))
+
+async def get_diagnosis(db,diagnosis_id:int):
+    """Works with an AsyncSession or database.ThreadedSession"""
+    result=await db.execute(select(models.Diagnosis).where(models.Diagnosis.id==diagnosis_id))
+    return result.scalar_one_or_none()
+
+async def save_diagnosis(db,db_diagnosis:models.Diagnosis):
+    """Insert a diagnosis and its change-log entry in one commit"""
+    db.add(db_diagnosis)
+    await db.flush()
+    record_change(db,"diagnosis",db_diagnosis.id,user_id=db_diagnosis.user_id)
+    await db.commit()
+    return db_diagnosis
@@ -1,13 +1,129 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
-import os
-from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from starlette.concurrency import run_in_threadpool
+import time
+from . import metrics
+from .config import settings
 
-load_dotenv()
-SQLALCHEMY_DATABASE_URL=os.getenv("SQLALCHEMY_DATABASE_URL")
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+SQLALCHEMY_DATABASE_URL=settings.database_url
+# Serve the async route handlers from an AsyncSession (aiomysql/aiosqlite) instead of the threadpool
+DB_ASYNC=settings.db_async
+# Defaults to SQLALCHEMY_DATABASE_URL with the driver swapped for its async counterpart
+SQLALCHEMY_ASYNC_DATABASE_URL=settings.async_database_url
+
+ASYNC_DRIVERS={"mysql":"mysql+aiomysql","sqlite":"sqlite+aiosqlite","postgresql":"postgresql+asyncpg"}
+
+# Connection pool settings (ignored for in-memory SQLite, which needs a single shared connection)
+DB_POOL_SIZE=settings.db_pool_size
+DB_MAX_OVERFLOW=settings.db_max_overflow
+DB_POOL_TIMEOUT=settings.db_pool_timeout
+# Recycle connections before MySQL's wait_timeout (default 8h) closes them server-side
+DB_POOL_RECYCLE=settings.db_pool_recycle
+DB_POOL_PRE_PING=settings.db_pool_pre_ping
+
+pool_checkout_wait=metrics.Histogram("merocare_db_pool_checkout_wait_seconds","Time spent waiting for a pooled DB connection")
+pool_timeouts=metrics.Counter("merocare_db_pool_timeouts","Checkouts that gave up after DB_POOL_TIMEOUT")
+query_seconds=metrics.Histogram("merocare_db_query_seconds","Time spent executing SQL statements",("operation",))
+query_errors=metrics.Counter("merocare_db_query_errors","SQL statements that raised",("operation",))
+
+QUERY_OPERATIONS={"SELECT","INSERT","UPDATE","DELETE"}
+
+class TimedCheckout:
+    """Pool mixin that records how long each checkout waited for a connection"""
+
+    def _do_get(self):
+        start=time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_timeouts.inc()
+            raise
+        finally:
+            pool_checkout_wait.observe(time.perf_counter()-start)
+
+class TimedQueuePool(TimedCheckout,QueuePool):
+    pass
+
+class TimedAsyncQueuePool(TimedCheckout,AsyncAdaptedQueuePool):
+    pass
+
+def async_url(url):
+    url=make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(),url.drivername))
+
+def engine_options(url,poolclass=TimedQueuePool):
+    url=make_url(url)
+    if url.get_backend_name()=="sqlite" and url.database in (None,"",":memory:"):
+        return {}
+    return {
+        "poolclass":poolclass,
+        "pool_size":DB_POOL_SIZE,
+        "max_overflow":DB_MAX_OVERFLOW,
+        "pool_timeout":DB_POOL_TIMEOUT,
+        "pool_recycle":DB_POOL_RECYCLE,
+        "pool_pre_ping":DB_POOL_PRE_PING,
+    }
+
+engine = create_engine(SQLALCHEMY_DATABASE_URL,**engine_options(SQLALCHEMY_DATABASE_URL))
+
+async_engine=None
+if DB_ASYNC:
+    _async_url=SQLALCHEMY_ASYNC_DATABASE_URL or async_url(SQLALCHEMY_DATABASE_URL)
+    async_engine=create_async_engine(_async_url,**engine_options(_async_url,poolclass=TimedAsyncQueuePool))
+
+def _operation(statement):
+    verb=statement.lstrip().split(None,1)[0].upper() if statement and statement.strip() else ""
+    return verb if verb in QUERY_OPERATIONS else "OTHER"
+
+def instrument_queries(sync_engine):
+    """Time every statement run on `sync_engine` (for an AsyncEngine pass its .sync_engine)"""
+
+    @event.listens_for(sync_engine,"before_cursor_execute")
+    def _query_start(conn,cursor,statement,parameters,context,executemany):
+        conn.info.setdefault("query_start",[]).append(time.perf_counter())
+
+    @event.listens_for(sync_engine,"after_cursor_execute")
+    def _query_end(conn,cursor,statement,parameters,context,executemany):
+        started=conn.info["query_start"].pop()
+        query_seconds.observe(time.perf_counter()-started,operation=_operation(statement))
+
+    @event.listens_for(sync_engine,"handle_error")
+    def _query_error(context):
+        starts=context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        query_errors.inc(operation=_operation(context.statement))
+
+instrument_queries(engine)
+if async_engine is not None:
+    instrument_queries(async_engine.sync_engine)
+
+def _pool_stat(name):
+    engines={"sync":engine}
+    if async_engine is not None:
+        engines["async"]=async_engine.sync_engine
+    values={}
+    for label,eng in engines.items():
+        pool=eng.pool
+        if not isinstance(pool,QueuePool):
+            values[(label,)]=0
+        elif name=="overflow":
+            # QueuePool counts unused overflow capacity as negative
+            values[(label,)]=max(pool.overflow(),0)
+        else:
+            values[(label,)]=getattr(pool,name)()
+    return values
+
+metrics.Gauge("merocare_db_pool_size","Configured number of persistent pooled connections",("engine",),function=lambda:_pool_stat("size"))
+metrics.Gauge("merocare_db_pool_in_use","DB connections currently checked out",("engine",),function=lambda:_pool_stat("checkedout"))
+metrics.Gauge("merocare_db_pool_idle","DB connections idle in the pool",("engine",),function=lambda:_pool_stat("checkedin"))
+metrics.Gauge("merocare_db_pool_overflow","DB connections open beyond pool_size",("engine",),function=lambda:_pool_stat("overflow"))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False) if async_engine is not None else None
 
 Base = declarative_base()
 
@@ -16,4 +132,49 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+class ThreadedSession:
+    """
+    The subset of the AsyncSession API used by the async routes, backed by a
+    sync Session whose calls run in the threadpool. Used when DB_ASYNC is off
+    so the same handler code runs in both modes without blocking the event loop.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def add(self, instance):
+        self.session.add(instance)
+
+    async def execute(self, statement, params=None):
+        # Fetch everything in the worker thread; the caller reads rows on the event loop
+        return await run_in_threadpool(lambda: self.session.execute(statement, params).freeze()())
+
+    async def get(self, entity, ident):
+        return await run_in_threadpool(self.session.get, entity, ident)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.session.flush)
+
+    async def commit(self):
+        await run_in_threadpool(self.session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.session.rollback)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.session.refresh, instance)
+
+    async def close(self):
+        await run_in_threadpool(self.session.close)
+
+async def get_async_db():
+    db = AsyncSessionLocal() if AsyncSessionLocal is not None else ThreadedSession(SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
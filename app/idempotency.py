@@ -0,0 +1,106 @@
+"""
+Idempotency-Key support for endpoints that cost money or write rows.
+
+A client that retries with the same Idempotency-Key gets the first answer
+replayed (with an Idempotent-Replayed: true header) instead of a second
+Groq completion or a duplicate insert. A duplicate that arrives while the
+first is still running waits for it and shares its result. Only successful
+answers are stored, so a request that failed can be retried for real.
+
+A key is bound to the request it was first used with: reusing it with a
+different body is a client bug and gets a 422. Keys are scoped per endpoint
+(and per user where the endpoint has one) and kept in memory for
+IDEMPOTENCY_TTL seconds, so they are per worker process.
+"""
+import hashlib
+import json
+
+from fastapi import Header, HTTPException, Response
+
+from . import metrics
+from .cache import TTLCache
+from .config import settings
+from .singleflight import SingleFlight
+
+IDEMPOTENCY_TTL = settings.idempotency_ttl
+IDEMPOTENCY_CACHE_SIZE = settings.idempotency_cache_size
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def idempotency_key(idempotency_key: str = Header(None, max_length=IDEMPOTENCY_KEY_MAX_LENGTH)):
+    """The Idempotency-Key request header, if sent."""
+    return idempotency_key
+
+
+def fingerprint(payload) -> bytes:
+    """Digest of a JSON-able request payload; key order does not matter."""
+    body = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(body.encode(), digest_size=16).digest()
+
+
+class IdempotencyStore:
+    def __init__(self, maxsize=IDEMPOTENCY_CACHE_SIZE, ttl=IDEMPOTENCY_TTL):
+        self._results = TTLCache(maxsize, ttl)    # {scoped key: (fingerprint, result)}
+        self._running = {}                        # {scoped key: fingerprint} while the first call runs
+        self._flight = SingleFlight()
+        self.replayed = 0
+        self.conflicts = 0
+
+    def _check(self, key, stored, digest):
+        if stored != digest:
+            self.conflicts += 1
+            raise HTTPException(
+                status_code=422,
+                detail=f"Idempotency-Key {key!r} was already used with a different request"
+            )
+
+    async def run(self, scope, key, digest, fn, response: Response = None):
+        """
+        Await `fn()` once per (scope, key) and return its result; a repeat
+        with the same key and `digest` replays that result. Without a key
+        `fn()` simply runs.
+        """
+        if key is None:
+            return await fn()
+        scoped = f"{scope}:{key}"
+        running = self._running.get(scoped)
+        stored = (running, None) if running is not None else self._results.get(scoped)
+        if stored is not None:
+            self._check(key, stored[0], digest)
+            self.replayed += 1
+            if response is not None:
+                response.headers["Idempotent-Replayed"] = "true"
+            if running is not None:
+                return await self._flight.do(scoped, fn)    # joins the first call; fn is not run
+            return stored[1]
+
+        # Marked before the first await, so a duplicate can never slip past the fingerprint check
+        self._running[scoped] = digest
+
+        async def first():
+            try:
+                result = await fn()
+            finally:
+                del self._running[scoped]
+            self._results.set(scoped, (digest, result))
+            return result
+
+        return await self._flight.do(scoped, first)
+
+    def clear(self):
+        """Forget every stored result; calls still running are left alone."""
+        self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+
+idempotency_store = IdempotencyStore()
+
+metrics.Counter("merocare_idempotent_replays", "Requests answered from an earlier one with the same Idempotency-Key",
+                function=lambda: idempotency_store.replayed)
+metrics.Counter("merocare_idempotency_conflicts", "Idempotency-Keys reused with a different request",
+                function=lambda: idempotency_store.conflicts)
+metrics.Gauge("merocare_idempotency_keys", "Idempotency-Keys currently remembered",
+              function=lambda: len(idempotency_store))
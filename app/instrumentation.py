@@ -0,0 +1,75 @@
+"""
+Per-route HTTP metrics: request latency, requests in flight and responses by
+status code, labelled with the route template (/family/list/{user_id}) rather
+than the raw path so the label set stays bounded.
+"""
+import time
+
+from starlette.routing import Match
+
+from . import metrics
+from .config import settings
+from .log import get_logger
+
+LOG_SLOW_REQUEST_SECONDS = settings.log_slow_request_seconds
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+request_seconds = metrics.Histogram(
+    "merocare_http_request_seconds", "Time from request start to the last response byte", ("method", "route"))
+requests_in_flight = metrics.Gauge(
+    "merocare_http_requests_in_flight", "Requests currently being handled", ("method", "route"))
+responses = metrics.Counter(
+    "merocare_http_responses", "Responses sent, by status code", ("method", "route", "status"))
+
+logger = get_logger(__name__)
+
+
+def route_template(scope):
+    """Path template of the route that will handle `scope`, resolved the same way the router does."""
+    app = scope.get("app")
+    partial = None
+    for route in getattr(getattr(app, "router", None), "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path    # path matches, method does not (405)
+    return partial or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """ASGI middleware; timing covers streamed bodies up to the final chunk."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = 500    # if the app raises before starting a response
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        requests_in_flight.inc(method=method, route=route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - started
+            requests_in_flight.dec(method=method, route=route)
+            request_seconds.observe(duration, method=method, route=route)
+            responses.inc(method=method, route=route, status=status)
+            if duration >= LOG_SLOW_REQUEST_SECONDS:
+                logger.warning("slow request", extra={
+                    "method": method, "route": route, "status": status,
+                    "duration_ms": round(duration * 1000, 2),
+                })
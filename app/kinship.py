@@ -0,0 +1,204 @@
+import re
+import threading
+import time
+from collections import defaultdict, deque
+
+from . import models, utils
+from .config import settings
+
+KINSHIP_CACHE_TTL = settings.kinship_cache_ttl
+# Longest chain of connections followed when resolving a relationship
+KINSHIP_MAX_HOPS = settings.kinship_max_hops
+
+# Each stored role as one step in the graph:
+# P = parent, C = child, S = spouse, B = sibling (a parent's child)
+ROLE_STEPS = {
+    "Father": "P", "Mother": "P", "Parent": "P",
+    "Son": "C", "Daughter": "C", "Child": "C",
+    "Spouse": "S",
+    "Brother": "B", "Sister": "B", "Sibling": "B",
+}
+
+# Rewrites that shorten a chain without changing who it points at
+STEP_REWRITES = [
+    ("BB", "B"),  # my sibling's sibling is my sibling
+    ("BP", "P"),  # my sibling's parent is my parent
+    ("CB", "C"),  # my child's sibling is my child
+]
+
+GENDERED_ROLES = {
+    "Parent": ("Father", "Mother"),
+    "Child": ("Son", "Daughter"),
+    "Sibling": ("Brother", "Sister"),
+    "Grandparent": ("Grandfather", "Grandmother"),
+    "Grandchild": ("Grandson", "Granddaughter"),
+    "Uncle/Aunt": ("Uncle", "Aunt"),
+    "Nephew/Niece": ("Nephew", "Niece"),
+}
+_ROLE_PARTS_RE = re.compile(r"((?:Great-)*(?:Grand-)?)(.+?)(-in-law)?")
+
+
+def blood_relation(up: int, down: int):
+    """Name for going `up` generations and then `down` generations"""
+    if up == 0 and down == 0:
+        return None
+    if down == 0:
+        return ("Great-" * (up - 2)) + ("Grandparent" if up > 1 else "Parent")
+    if up == 0:
+        return ("Great-" * (down - 2)) + ("Grandchild" if down > 1 else "Child")
+    if up == 1 and down == 1:
+        return "Sibling"
+    if up == 1:
+        return ("Great-" * (down - 3)) + ("Grand-" if down > 2 else "") + "Nephew/Niece"
+    if down == 1:
+        return ("Great-" * (up - 2)) + "Uncle/Aunt"
+    return "Cousin"
+
+
+def classify(steps: str) -> str:
+    """
+    Name the relationship at the end of a chain of steps, e.g.
+    "PP" -> Grandparent, "PB" -> Uncle/Aunt, "SP" -> Parent-in-law, "CS" -> Child-in-law.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for old, new in STEP_REWRITES:
+            if old in steps:
+                steps = steps.replace(old, new)
+                changed = True
+    steps = steps.replace("B", "PC")
+
+    via_spouse = steps.startswith("S")    # my spouse's ...
+    to_spouse = steps.endswith("S") and len(steps) > 1   # ... 's spouse
+    core = steps[1 if via_spouse else 0:len(steps) - 1 if to_spouse else len(steps)]
+
+    match = re.fullmatch(r"(P*)(C*)", core)
+    if not match:
+        return "Family Member"
+    up, down = len(match.group(1)), len(match.group(2))
+    relation = blood_relation(up, down)
+
+    if relation is None:
+        return "Spouse" if via_spouse != to_spouse else "Family Member"
+    if via_spouse and to_spouse:
+        return "Family Member"
+    if via_spouse:
+        # A spouse's descendants are treated as one's own (step-children)
+        return relation if up == 0 else f"{relation}-in-law"
+    if to_spouse:
+        # An elder's spouse keeps the elder's title (step-parent, aunt by marriage)
+        return relation if up > down else f"{relation}-in-law"
+    return relation
+
+
+class KinshipGraph:
+    """
+    Relationships inside one family, resolved for every pair of members up
+    front so lookups are a dict access. A direct connection's role wins;
+    otherwise the role comes from the shortest chain of connections (BFS).
+    """
+
+    def __init__(self, connections, max_hops=KINSHIP_MAX_HOPS):
+        self.built_at = time.monotonic()
+        self.direct = {}                      # {(a, b): b's role as seen from a}
+        self.adjacency = defaultdict(list)    # {a: [(b, step)]}
+        for conn in connections:
+            # An unset role is unknown: it must not hide a role inferred through others
+            role = conn.receiver_role or "Family Member"
+            reverse_role = utils.INVERSE_RELATIONS.get(role, "Family Member")
+            self.direct[(conn.sender_id, conn.receiver_id)] = role
+            self.direct[(conn.receiver_id, conn.sender_id)] = reverse_role
+            if role in ROLE_STEPS and reverse_role in ROLE_STEPS:
+                self.adjacency[conn.sender_id].append((conn.receiver_id, ROLE_STEPS[role]))
+                self.adjacency[conn.receiver_id].append((conn.sender_id, ROLE_STEPS[reverse_role]))
+
+        self.roles = {}
+        for person in list(self.adjacency):
+            self._resolve_from(person, max_hops)
+        for pair, role in self.direct.items():
+            if role != "Family Member" or pair not in self.roles:
+                self.roles[pair] = role
+
+    def _resolve_from(self, origin, max_hops):
+        paths = {origin: ""}
+        queue = deque([origin])
+        while queue:
+            person = queue.popleft()
+            if len(paths[person]) >= max_hops:
+                continue
+            for other, step in self.adjacency[person]:
+                if other not in paths:
+                    paths[other] = paths[person] + step
+                    queue.append(other)
+        for other, steps in paths.items():
+            if other != origin:
+                self.roles[(origin, other)] = classify(steps)
+
+    def relationship(self, user_a_id: int, user_b_id: int) -> str:
+        """What user B is to user A"""
+        return self.roles.get((user_a_id, user_b_id), "Family Member")
+
+
+class KinshipCache:
+    """
+    One KinshipGraph per family, rebuilt when invalidated or older than the TTL.
+    Each invalidation bumps the family's generation; a graph whose build started
+    before one is returned to its caller but not stored, so a read taken before
+    an accepted invite is never cached.
+    """
+
+    def __init__(self, ttl=KINSHIP_CACHE_TTL):
+        self.ttl = ttl
+        self._graphs = {}
+        self._generations = {}    # {family id: invalidations so far}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db, family_id: str) -> KinshipGraph:
+        graph = self._graphs.get(family_id)
+        if graph is not None and time.monotonic() - graph.built_at < self.ttl:
+            self.hits += 1
+            return graph
+        self.misses += 1
+        with self._lock:
+            generation = self._generations.get(family_id, 0)
+        connections = db.query(models.FamilyConnection).filter(
+            models.FamilyConnection.target_family_id == family_id,
+            models.FamilyConnection.status == "accepted"
+        ).all()
+        graph = KinshipGraph(connections)
+        with self._lock:
+            if self._generations.get(family_id, 0) == generation:
+                self._graphs[family_id] = graph
+        return graph
+
+    def invalidate(self, family_id: str):
+        with self._lock:
+            self._graphs.pop(family_id, None)
+            self._generations[family_id] = self._generations.get(family_id, 0) + 1
+
+
+def apply_gender_to_role(role: str, gender: str) -> str:
+    """Apply gender-specific names to generic roles, e.g. Grand-Nephew/Niece -> Grand-Niece"""
+    if not role:
+        return "Family Member"
+    if not gender:
+        return role
+
+    gender_lower = gender.lower()
+    if gender_lower not in ("male", "female"):
+        return role
+
+    match = _ROLE_PARTS_RE.fullmatch(role)
+    if match is None:
+        return role
+    prefix, base, suffix = match.groups()
+    if base not in GENDERED_ROLES:
+        return role
+    male, female = GENDERED_ROLES[base]
+    return prefix + (male if gender_lower == "male" else female) + (suffix or "")
+
+
+kinship_cache = KinshipCache()
@@ -0,0 +1,223 @@
+import asyncio
+import time
+
+from . import metrics
+from .config import settings
+from .llm_scheduler import LLMScheduler, Shed
+
+GROQ_API_KEY = settings.groq_api_key
+# Point this at a local fake server to exercise the client without Groq
+GROQ_BASE_URL = settings.groq_base_url
+GROQ_MODEL = settings.groq_model
+GROQ_TIMEOUT = settings.groq_timeout
+GROQ_MAX_CONNECTIONS = settings.groq_max_connections
+
+# Reply length assumed when reserving tokens-per-minute quota before a call;
+# corrected from the reported usage afterwards
+EXPECTED_COMPLETION_TOKENS = 400
+
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+llm_seconds = metrics.Histogram(
+    "merocare_llm_request_seconds", "Time spent on upstream completions, including queueing and retries",
+    ("call", "outcome"), buckets=LLM_BUCKETS)
+llm_first_token_seconds = metrics.Histogram(
+    "merocare_llm_first_token_seconds", "Time until the first streamed text delta arrived", buckets=LLM_BUCKETS)
+
+
+class LLMError(Exception):
+    """Upstream completion failed or returned nothing usable."""
+
+
+class LLMTimeout(LLMError):
+    """Upstream completion did not finish within the allowed time."""
+
+
+class LLMUnavailable(LLMError):
+    """Completion refused without calling upstream (circuit open, queue full or quota exhausted)."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(messages):
+    """Rough prompt + reply token count (about four characters per token)."""
+    return sum(len(m["content"]) for m in messages) // 4 + EXPECTED_COMPLETION_TOKENS
+
+
+def classify_error(error):
+    """(retry reason, Retry-After seconds) for an upstream error; reason None means do not retry."""
+    from groq import APIConnectionError, APIStatusError, APITimeoutError
+    if isinstance(error, (asyncio.TimeoutError, APITimeoutError)):
+        return "timeout", None
+    if isinstance(error, APIConnectionError):
+        return "connection", None
+    if isinstance(error, APIStatusError):
+        try:
+            retry_after = float(error.response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            retry_after = None
+        if error.status_code == 429:
+            return "rate_limited", retry_after
+        if error.status_code >= 500:
+            return "server_error", retry_after
+    return None, None
+
+
+class LLMClient:
+    """
+    Async Groq client shared by every request in the worker.
+
+    One pooled httpx connection pool is reused across calls, and every call
+    goes through an LLMScheduler (concurrency cap, quota, retries, circuit
+    breaker); the SDK's own retries are off so they cannot stack on top.
+    `timeout` is the whole budget of a call, retries and queueing included.
+    The Groq SDK (and httpx) are only imported when the first completion is
+    made, keeping worker startup fast.
+    """
+
+    def __init__(self, api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, timeout=GROQ_TIMEOUT,
+                 max_connections=GROQ_MAX_CONNECTIONS, scheduler=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.scheduler = scheduler or LLMScheduler()
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import httpx
+            from groq import AsyncGroq
+
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=self.timeout,
+            )
+            self._client = AsyncGroq(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=http_client,
+            )
+        return self._client
+
+    async def complete(self, messages, model=GROQ_MODEL, temperature=0.2, timeout=None):
+        """Run one chat completion and return the stripped message text."""
+        timeout = timeout or self.timeout
+        client = self.client
+        from groq import APITimeoutError, APIError
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        tokens = estimate_tokens(messages)
+        outcome = "error"
+
+        async def attempt(remaining):
+            return await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=remaining,
+                ),
+                timeout=remaining,
+            )
+
+        try:
+            response = await self.scheduler.call(attempt, deadline, classify_error, tokens)
+            self.scheduler.settle(tokens, response.usage.total_tokens if response.usage else None)
+            content = response.choices[0].message.content if response.choices else None
+            if not content:
+                raise LLMError("AI service returned an empty response")
+            outcome = "ok"
+            return content.strip()
+        except Shed as e:
+            outcome = "shed"
+            raise LLMUnavailable(str(e), e.retry_after) from e
+        except (asyncio.TimeoutError, APITimeoutError) as e:
+            outcome = "timeout"
+            raise LLMTimeout(f"AI service timed out after {timeout}s") from e
+        except APIError as e:
+            raise LLMError(f"AI service error: {e}") from e
+        finally:
+            llm_seconds.observe(time.perf_counter() - started, call="complete", outcome=outcome)
+
+    async def stream(self, messages, model=GROQ_MODEL, temperature=0.2, timeout=None):
+        """
+        Yield the text deltas of one streamed chat completion as they arrive.
+        `timeout` bounds the wait for the first chunk and for each one after.
+        Only opening the stream is retried; once text has been yielded an
+        upstream error ends the stream.
+        """
+        timeout = timeout or self.timeout
+        client = self.client
+        from groq import APITimeoutError, APIError
+        started = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        outcome = "error"
+        first_token = True
+
+        async def open_stream(remaining):
+            return await asyncio.wait_for(
+                client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    timeout=remaining,
+                    stream=True,
+                ),
+                timeout=remaining,
+            )
+
+        stream = None
+        try:
+            # The slot is held until the stream is closed
+            async with self.scheduler.slot(deadline, estimate_tokens(messages)):
+                try:
+                    stream = await self.scheduler.retry(open_stream, deadline, classify_error)
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), timeout=timeout)
+                        except StopAsyncIteration:
+                            break
+                        if chunk.choices and chunk.choices[0].delta.content:
+                            if first_token:
+                                llm_first_token_seconds.observe(time.perf_counter() - started)
+                                first_token = False
+                            yield chunk.choices[0].delta.content
+                    outcome = "ok"
+                finally:
+                    if stream is not None:
+                        await stream.close()
+        except Shed as e:
+            outcome = "shed"
+            raise LLMUnavailable(str(e), e.retry_after) from e
+        except (asyncio.TimeoutError, APITimeoutError) as e:
+            outcome = "timeout"
+            raise LLMTimeout(f"AI service timed out after {timeout}s") from e
+        except APIError as e:
+            raise LLMError(f"AI service error: {e}") from e
+        finally:
+            llm_seconds.observe(time.perf_counter() - started, call="stream", outcome=outcome)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+llm_client = LLMClient()
+
+metrics.Gauge("merocare_llm_queue_waiting", "Completions waiting for quota or a concurrency slot",
+              function=lambda: llm_client.scheduler.waiting)
+metrics.Gauge("merocare_llm_in_flight", "Completions currently running upstream",
+              function=lambda: llm_client.scheduler.running)
+metrics.Gauge("merocare_llm_circuit_open", "1 while the Groq circuit breaker is open or probing",
+              function=lambda: int(llm_client.scheduler.breaker.state != "closed"))
@@ -0,0 +1,260 @@
+"""
+Scheduling in front of the Groq client. Every completion passes through
+LLMScheduler before it reaches the network:
+
+  queue    at most GROQ_MAX_CONCURRENCY calls run at once and up to
+           GROQ_QUEUE_SIZE more wait; beyond that calls are shed at once.
+           A waiter is also shed as soon as it is clear it could not start
+           before its deadline, instead of timing out later.
+  quota    token buckets for requests and tokens per minute (GROQ_RPM,
+           GROQ_TPM). Calls wait for quota here instead of collecting 429s
+           upstream, and a 429's Retry-After pauses every call in the worker.
+  retries  429, 5xx, connection errors and timeouts are retried up to
+           GROQ_MAX_RETRIES times with full-jitter exponential backoff, but
+           only while the caller's deadline leaves room for another try.
+  breaker  GROQ_BREAKER_FAILURES upstream failures in a row open the circuit:
+           calls fail fast for GROQ_BREAKER_RESET seconds, then one probe
+           call decides whether it closes again.
+
+Limits are per worker process, so set GROQ_RPM / GROQ_TPM to the key's quota
+divided by the number of workers.
+"""
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+from . import metrics
+from .config import settings
+
+GROQ_RPM = settings.groq_rpm
+GROQ_TPM = settings.groq_tpm
+GROQ_MAX_CONCURRENCY = settings.groq_max_concurrency
+GROQ_MAX_RETRIES = settings.groq_max_retries
+GROQ_RETRY_BASE = settings.groq_retry_base
+GROQ_RETRY_MAX = settings.groq_retry_max
+GROQ_QUEUE_SIZE = settings.groq_queue_size
+GROQ_BREAKER_FAILURES = settings.groq_breaker_failures
+GROQ_BREAKER_RESET = settings.groq_breaker_reset
+
+shed_calls = metrics.Counter("merocare_llm_shed", "Completions refused before reaching Groq", ("reason",))
+retried_calls = metrics.Counter("merocare_llm_retries", "Upstream completion attempts that were retried", ("reason",))
+circuit_opened = metrics.Counter("merocare_llm_circuit_opened", "Times the Groq circuit breaker opened")
+quota_wait_seconds = metrics.Histogram(
+    "merocare_llm_quota_wait_seconds", "Time completions waited for rate-limit quota",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0))
+
+
+class Shed(Exception):
+    """A call refused without going upstream; `retry_after` is a hint in seconds, if known."""
+
+    def __init__(self, reason, retry_after=None):
+        super().__init__(f"AI service is overloaded ({reason.replace('_', ' ')})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    `per_minute` tokens a minute, holding at most a minute's worth. The
+    balance may go negative: that is quota already promised to callers
+    that are sleeping until it refills, which keeps waiters in FIFO order.
+    """
+
+    def __init__(self, per_minute, clock=time.monotonic):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount):
+        """Seconds until `amount` could be taken."""
+        self._refill()
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate)
+
+    def reserve(self, amount):
+        """Take `amount` now and return how long to wait before using it."""
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+
+    def refund(self, amount):
+        """Give back `amount` (negative to charge more, e.g. when a reply used more tokens than estimated)."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class CircuitBreaker:
+    def __init__(self, failures=GROQ_BREAKER_FAILURES, reset=GROQ_BREAKER_RESET, clock=time.monotonic):
+        self.threshold = failures
+        self.reset = reset
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def check(self):
+        """Raise Shed unless a call may go upstream now."""
+        if self.state == "closed" or not self.threshold:
+            return
+        waited = self.clock() - self.opened_at
+        if waited < self.reset:
+            raise Shed("circuit_open", self.reset - waited)
+        # Let this call through as the probe; others are shed until it reports back
+        self.state = "half_open"
+        self.opened_at = self.clock()
+
+    def record_success(self):
+        self.state = "closed"
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or (self.threshold and self.failures >= self.threshold):
+            if self.state != "open":
+                circuit_opened.inc()
+            self.state = "open"
+            self.opened_at = self.clock()
+
+
+class LLMScheduler:
+    def __init__(self, max_concurrency=GROQ_MAX_CONCURRENCY, queue_size=GROQ_QUEUE_SIZE, rpm=GROQ_RPM, tpm=GROQ_TPM,
+                 max_retries=GROQ_MAX_RETRIES, retry_base=GROQ_RETRY_BASE, retry_max=GROQ_RETRY_MAX,
+                 breaker=None):
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._paused_until = 0.0
+        self.waiting = 0
+        self.running = 0
+
+    def _quota_delay(self, tokens):
+        delays = [self._paused_until - time.monotonic()]
+        if self.requests:
+            delays.append(self.requests.delay(1))
+        if self.tokens:
+            delays.append(self.tokens.delay(tokens))
+        return max(0.0, *delays)
+
+    def _reserve(self, tokens):
+        delays = [self._paused_until - time.monotonic()]
+        if self.requests:
+            delays.append(self.requests.reserve(1))
+        if self.tokens:
+            delays.append(self.tokens.reserve(tokens))
+        return max(0.0, *delays)
+
+    def _refund(self, tokens):
+        if self.requests:
+            self.requests.refund(1)
+        if self.tokens:
+            self.tokens.refund(tokens)
+
+    def settle(self, estimated, used):
+        """Correct the token bucket once a reply reports how many tokens it really used."""
+        if self.tokens and used:
+            self.tokens.refund(estimated - used)
+
+    def pause(self, seconds):
+        """Hold every call for `seconds` (upstream said to back off)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def _shed(self, reason, retry_after=None):
+        shed_calls.inc(reason=reason)
+        return Shed(reason, retry_after)
+
+    @asynccontextmanager
+    async def slot(self, deadline, tokens=0):
+        """
+        Admission for one upstream call: waits for quota and a concurrency
+        slot, or raises Shed if the circuit is open, the queue is full or
+        `deadline` (time.monotonic()) would pass first.
+        """
+        try:
+            self.breaker.check()
+        except Shed as e:
+            shed_calls.inc(reason=e.reason)
+            raise
+        if self.waiting >= self.queue_size:
+            raise self._shed("queue_full")
+        delay = self._quota_delay(tokens)
+        if time.monotonic() + delay >= deadline:
+            raise self._shed("deadline", delay)
+
+        self.waiting += 1
+        started = time.monotonic()
+        wait = self._reserve(tokens)
+        try:
+            if wait:
+                await asyncio.sleep(wait)
+            quota_wait_seconds.observe(time.monotonic() - started)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                raise self._shed("deadline") from None
+        except BaseException:
+            self._refund(tokens)
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    def backoff(self, attempt, retry_after=None):
+        """Full-jitter exponential delay before retry number `attempt` (0-based), never below `retry_after`."""
+        delay = random.uniform(0, min(self.retry_max, self.retry_base * 2 ** attempt))
+        return max(delay, retry_after or 0.0)
+
+    async def retry(self, attempt, deadline, classify):
+        """
+        Await `attempt(remaining_seconds)` until it succeeds, fails with an
+        error `classify` does not call retryable, runs out of retries, or the
+        next backoff would pass `deadline`. `classify(error)` returns
+        (reason, retry_after); a reason of None means not retryable.
+        """
+        tries = 0
+        while True:
+            try:
+                result = await attempt(deadline - time.monotonic())
+            except Exception as e:
+                reason, retry_after = classify(e)
+                if reason == "rate_limited":
+                    # Quota, not health: the breaker ignores it
+                    if retry_after:
+                        self.pause(retry_after)
+                elif reason is not None:
+                    self.breaker.record_failure()
+                if reason is None or tries >= self.max_retries:
+                    raise
+                delay = self.backoff(tries, retry_after)
+                if time.monotonic() + delay >= deadline:
+                    raise
+                retried_calls.inc(reason=reason)
+                tries += 1
+                await asyncio.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def call(self, attempt, deadline, classify, tokens=0):
+        """`retry` with every attempt admitted through its own `slot`."""
+        async def admitted(timeout):
+            async with self.slot(deadline, tokens):
+                return await attempt(deadline - time.monotonic())
+        return await self.retry(admitted, deadline, classify)
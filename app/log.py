@@ -0,0 +1,75 @@
+"""
+Structured logging for the app: one JSON object per line on stderr.
+
+    logger = log.get_logger(__name__)
+    logger.info("user signed up", extra={"user_id": user.id})
+
+Anything passed in `extra` becomes a top-level field. Records below WARNING
+are kept with probability LOG_SAMPLE_RATE, so debug/info lines on hot paths
+can stay enabled under load; warnings and errors are never dropped.
+"""
+import json
+import logging
+import random
+import sys
+
+from .config import settings
+
+LOG_LEVEL = settings.log_level
+LOG_SAMPLE_RATE = settings.log_sample_rate
+
+ROOT_LOGGER = "merocare"
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Pass a `rate` fraction of records below WARNING and every record at or above it."""
+
+    def __init__(self, rate=LOG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+def configure(level=LOG_LEVEL, sample_rate=LOG_SAMPLE_RATE, stream=None):
+    """Attach the JSON handler to the app's logger tree; safe to call more than once."""
+    logger = logging.getLogger(ROOT_LOGGER)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(SamplingFilter(sample_rate))
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
+
+
+def get_logger(name):
+    """Logger under the app's tree, e.g. get_logger("app.routers.diagnosis") -> merocare.routers.diagnosis."""
+    if name.startswith("app."):
+        name = name[len("app."):]
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+configure()
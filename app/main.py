@@ -1,10 +1,12 @@
 from fastapi import FastAPI
-from .database import engine, Base
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import authentication,users,diagnosis,family
-from . import models
+from .routers import authentication,users,diagnosis,family,sync
+from . import models,metrics
+from .instrumentation import MetricsMiddleware
+from .llm import llm_client
 
-models.Base.metadata.create_all(bind=engine)
+# Schema changes are applied with `alembic upgrade head`, not at startup
 
 app = FastAPI(title="MeroCare",
               version="1.0.0")
@@ -22,11 +24,24 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"]
 )
+# Added last so it wraps CORS too and times every request end to end
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(authentication.router,tags=["Authentication"])
 app.include_router(users.router,prefix="/users",tags=["Users"])
 app.include_router(diagnosis.router,prefix="/diagnosis",tags=["Diagnosis"])
 app.include_router(family.router,prefix="/family",tags=["Family"])
+app.include_router(sync.router,tags=["Sync"])
+
+
+@app.on_event("shutdown")
+async def close_llm_client():
+    await llm_client.close()
+
+
+@app.get("/metrics",response_class=PlainTextResponse,include_in_schema=False)
+def read_metrics():
+    return metrics.render()
 
 
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column,Integer,String,Text,ForeignKey,Date,DateTime,Float,Boolean
+from sqlalchemy import Column,Integer,String,Text,ForeignKey,Date,DateTime,Float,Boolean,Index
 from datetime import date
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -18,7 +18,7 @@ class User(Base):
     #mobile_number=Column(String(20),nullable=True)
     #address=Column(String(255),nullable=True)
 
-    family_id = Column(String(50), nullable=True)
+    family_id = Column(String(50), nullable=True, index=True)
     family_role = Column(String(50), nullable=True)
     is_main_member = Column(Boolean, default=False) 
     sent_invites = relationship("FamilyConnection", foreign_keys="[FamilyConnection.sender_id]", back_populates="sender")
@@ -39,6 +39,26 @@ class Diagnosis(Base):
     user_diagnosis=Column(Text,nullable=True)
     created_at=Column(DateTime(timezone=True),server_default=func.now())
     visibility=Column(String(10),default="public")
+    # Structured copy of what is inside user_diagnosis, filled at save time
+    predicted_disease=Column(String(150),nullable=True,index=True)
+    urgency=Column(String(20),nullable=True)
+    suggested_treatment=Column(Text,nullable=True)
+    symptoms=relationship("DiagnosisSymptom",back_populates="diagnosis",cascade="all, delete-orphan")
+
+    __table_args__=(
+        Index("ix_Diagnosis_user_urgency_created","user_id","urgency","created_at"),
+        # Keyset pagination of a user's history on (created_at, id)
+        Index("ix_Diagnosis_user_created_id","user_id","created_at","id"),
+        # A family member's public history (/family/member-history)
+        Index("ix_Diagnosis_user_visibility_created","user_id","visibility","created_at"),
+    )
+
+class DiagnosisSymptom(Base):
+    __tablename__="DiagnosisSymptoms"
+    id=Column(Integer,primary_key=True,index=True)
+    diagnosis_id=Column(Integer,ForeignKey("Diagnosis.id",ondelete="CASCADE"),nullable=False,index=True)
+    diagnosis=relationship("Diagnosis",back_populates="symptoms")
+    symptom=Column(String(100),nullable=False,index=True)
 
 class MedicalHistory(Base):
     __tablename__="MedicalRecords"
@@ -58,11 +78,50 @@ class Family(Base):
 class FamilyConnection(Base):
     __tablename__ = "family_connections"
     id = Column(Integer, primary_key=True, index=True)
-    sender_id = Column(Integer, ForeignKey("UserInfo.id"))
+    sender_id = Column(Integer, ForeignKey("UserInfo.id"), index=True)
     receiver_id = Column(Integer, ForeignKey("UserInfo.id"))
     receiver_role = Column(String(50))   
     target_family_id = Column(String(50)) 
     status = Column(String(20), default="pending") 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     sender = relationship("User", foreign_keys=[sender_id], back_populates="sent_invites")
-    receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_invites")
\ No newline at end of file
+    receiver = relationship("User", foreign_keys=[receiver_id], back_populates="received_invites")
+
+    __table_args__ = (
+        Index("ix_family_connections_receiver_status", "receiver_id", "status"),
+        Index("ix_family_connections_target_family_status", "target_family_id", "status"),
+    )
+
+class ChangeLog(Base):
+    """Append-only record of changes a client may need to sync; its id is the sync version"""
+    __tablename__ = "change_log"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=True)        # change visible to this user
+    family_id = Column(String(50), nullable=True)   # ...or to every member of this family
+    entity = Column(String(20), nullable=False)     # diagnosis | invite | family_member
+    entity_id = Column(Integer, nullable=False)
+    op = Column(String(10), nullable=False)         # upsert | delete
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_change_log_user_id_id", "user_id", "id"),
+        Index("ix_change_log_family_id_id", "family_id", "id"),
+    )
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("UserInfo.id"), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)   # sha256 hex, never the token itself
+    expires_at = Column(DateTime, nullable=False)       # naive UTC
+    revoked_at = Column(DateTime, nullable=True)
+    replaced_by_id = Column(Integer, nullable=True)     # set when rotated
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class RevokedToken(Base):
+    """Access tokens of `user_id` issued at or before `revoked_at` are no longer valid"""
+    __tablename__ = "revoked_tokens"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False)       # naive UTC
+    expires_at = Column(DateTime, nullable=False, index=True)  # after this every affected token has expired anyway
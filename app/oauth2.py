@@ -1,45 +1,220 @@
-from jose import jwt,JWTError
 from datetime import datetime,timedelta,timezone
 from fastapi import Depends,HTTPException,status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect,select
+from sqlalchemy.orm import Session,make_transient_to_detached
 from . import schemas,database,models
-import os
-from dotenv import load_dotenv
+from .cache import TTLCache
+from .config import settings
+from .revocation import revocation_index
+import hashlib
+import secrets
 
-load_dotenv()
-SECRET_KEY=os.getenv("SECRET_KEY")
+SECRET_KEY=settings.secret_key
 
 if not SECRET_KEY:
     raise ValueError("No SECRET_KEY found")
 
 ALGORITHM="HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES=60
+REFRESH_TOKEN_EXPIRE_DAYS=settings.refresh_token_expire_days
+
+# Authenticated users are cached per (user id, token iat) for this many seconds
+AUTH_CACHE_TTL=settings.auth_cache_ttl
+AUTH_CACHE_SIZE=settings.auth_cache_size
+# When true, routes using get_current_user_id take the id from the signed token without a DB check
+AUTH_TRUST_CLAIMS=settings.auth_trust_claims
 
 oauth2_scheme=OAuth2PasswordBearer(tokenUrl="login")
 
+identity_cache=TTLCache(AUTH_CACHE_SIZE,AUTH_CACHE_TTL)
+
 def create_access_token(data:dict):
+    from jose import jwt  # python-jose pulls in its crypto backends; load on first use
     to_encode=data.copy()
-    expire=datetime.now(timezone.utc)+timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp":expire})
+    now=datetime.now(timezone.utc)
+    expire=now+timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode.update({"exp":expire,"iat":int(now.timestamp())})
     encoded_jwt=jwt.encode(to_encode,SECRET_KEY,algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token:str=Depends(oauth2_scheme),db:Session=Depends(database.get_db)):
-    credentials_exception=HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Failed to validate credentials",headers={"WWW-Authenticate":"Bearer"})
+def hash_refresh_token(token:str)->str:
+    # Refresh tokens are long random strings, so a fast hash is enough (no bcrypt)
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def new_refresh_token(user_id:int):
+    """A new refresh token row for the user, not yet added to a session; returns (row, raw token). Only the hash is kept."""
+    token=secrets.token_urlsafe(32)
+    db_token=models.RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.now(timezone.utc).replace(tzinfo=None)+timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    return db_token,token
+
+def create_refresh_token(db:Session,user_id:int):
+    """Store a new refresh token for the user; returns (row, raw token)"""
+    db_token,token=new_refresh_token(user_id)
+    db.add(db_token)
+    db.flush()
+    return db_token,token
+
+def rotate_refresh_token(db:Session,token:str):
+    """
+    Exchange a refresh token for a new one; returns (user_id, new raw token).
+    Presenting an already-rotated or revoked token revokes every refresh token
+    of that user, since it means the token leaked.
+    """
+    now=datetime.now(timezone.utc).replace(tzinfo=None)
+    db_token=db.query(models.RefreshToken).filter(models.RefreshToken.token_hash==hash_refresh_token(token)).first()
+    if db_token is None or db_token.expires_at<=now:
+        raise credentials_exception()
+
+    # Claim the token with a conditional UPDATE: of two requests presenting it
+    # at once, only one sees rowcount 1; the other is handled as a reuse
+    claimed=db.query(models.RefreshToken).filter(
+        models.RefreshToken.id==db_token.id,
+        models.RefreshToken.revoked_at.is_(None)
+    ).update({models.RefreshToken.revoked_at:now},synchronize_session=False)
+    if claimed!=1:
+        revoke_refresh_tokens(db,db_token.user_id)
+        db.commit()
+        raise credentials_exception()
+
+    user_id=db_token.user_id
+    new_token,raw_token=create_refresh_token(db,user_id)
+    db_token.replaced_by_id=new_token.id
+    db.commit()
+    return user_id,raw_token
+
+def revoke_refresh_tokens(db:Session,user_id:int):
+    db.query(models.RefreshToken).filter(
+        models.RefreshToken.user_id==user_id,
+        models.RefreshToken.revoked_at.is_(None)
+    ).update({models.RefreshToken.revoked_at:datetime.now(timezone.utc).replace(tzinfo=None)},synchronize_session=False)
+
+def revoke_user_tokens(db:Session,user_id:int):
+    """
+    Invalidate every refresh token and every access token issued so far for
+    the user. Call before committing; once the commit succeeded pass the
+    returned time to revocation_index.add so this worker sees it immediately.
+    The time is cut to whole seconds, like the iat it is compared with, so
+    every DB (including MySQL DATETIME, which rounds) stores the same cutoff.
+    """
+    now=datetime.now(timezone.utc).replace(tzinfo=None,microsecond=0)
+    revoke_refresh_tokens(db,user_id)
+    db.add(models.RevokedToken(user_id=user_id,revoked_at=now,expires_at=now+timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)))
+    return now
+
+def credentials_exception():
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED,detail="Failed to validate credentials",headers={"WWW-Authenticate":"Bearer"})
+
+def decode_access_token(token:str):
+    """Verify the token signature/expiry and return (TokenData, iat)"""
+    from jose import jwt,JWTError
     try:
         payload=jwt.decode(token,SECRET_KEY,algorithms=[ALGORITHM])
         user_id:str=payload.get("user_id")
 
         if user_id is None:
-            raise credentials_exception
+            raise credentials_exception()
         
-        token_data=schemas.TokenData(user_id=int(user_id))
-    except JWTError:
-        raise credentials_exception
+        return schemas.TokenData(user_id=int(user_id)),payload.get("iat")
+    except (JWTError,ValueError):
+        raise credentials_exception()
+
+def snapshot_user(user:models.User)->models.User:
+    """Detached, session-free copy of a loaded user"""
+    copy=models.User(**{attr.key:getattr(user,attr.key) for attr in inspect(models.User).column_attrs})
+    make_transient_to_detached(copy)
+    return copy
+
+def invalidate_user(user_id:int):
+    """Drop cached identities for a user; call after every commit that changes their row (profile, password, family)"""
+    identity_cache.discard_if(lambda key:key[0]==user_id)
+
+def check_not_revoked(db:Session,user_id:int,iat):
+    revocation_index.maybe_refresh(db)
+    if revocation_index.is_revoked(user_id,iat):
+        raise credentials_exception()
+
+def get_current_user(token:str=Depends(oauth2_scheme),db:Session=Depends(database.get_db)):
+    """
+    The authenticated user, possibly as a detached copy from identity_cache.
+    Treat it as read-only: the copy is never put in the session, so later
+    queries in the request still load fresh rows. Routes that modify the
+    user depend on get_current_user_for_update instead.
+    """
+    token_data,iat=decode_access_token(token)
+    check_not_revoked(db,token_data.user_id,iat)
+    cache_key=(token_data.user_id,iat)
+
+    cached=identity_cache.get(cache_key)
+    if cached is not None:
+        return snapshot_user(cached)
     
-    user=db.query(models.User).filter(models.User.id==token_data.user_id).first()
+    user=load_user(db,token_data.user_id)
+    identity_cache.set(cache_key,snapshot_user(user))
+    return user
+
+async def check_not_revoked_async(db,user_id:int,iat):
+    await revocation_index.maybe_refresh_async(db)
+    if revocation_index.is_revoked(user_id,iat):
+        raise credentials_exception()
+
+async def get_current_user_async(token:str=Depends(oauth2_scheme),db=Depends(database.get_async_db)):
+    """
+    get_current_user for async routes: queries go through the request's
+    AsyncSession (DB_ASYNC) or ThreadedSession, the same one the route gets
+    from get_async_db, so auth never touches the sync pool from an async route.
+    """
+    token_data,iat=decode_access_token(token)
+    await check_not_revoked_async(db,token_data.user_id,iat)
+    cache_key=(token_data.user_id,iat)
+
+    cached=identity_cache.get(cache_key)
+    if cached is not None:
+        return snapshot_user(cached)
+
+    user=await load_user_async(db,token_data.user_id)
+    identity_cache.set(cache_key,snapshot_user(user))
+    return user
+
+def get_current_user_for_update(token:str=Depends(oauth2_scheme),db:Session=Depends(database.get_db)):
+    """The authenticated user loaded from the DB into this request's session, bypassing the cache"""
+    token_data,iat=decode_access_token(token)
+    check_not_revoked(db,token_data.user_id,iat)
+    return load_user(db,token_data.user_id)
+
+def load_user(db:Session,user_id:int)->models.User:
+    user=db.query(models.User).filter(models.User.id==user_id).first()
     if user is None:
-        raise credentials_exception
-    
-    return user
\ No newline at end of file
+        raise credentials_exception()
+    return user
+
+async def load_user_async(db,user_id:int)->models.User:
+    """Works with an AsyncSession or database.ThreadedSession"""
+    user=(await db.execute(select(models.User).where(models.User.id==user_id))).scalars().first()
+    if user is None:
+        raise credentials_exception()
+    return user
+
+def get_current_user_id(token:str=Depends(oauth2_scheme),db:Session=Depends(database.get_db))->int:
+    """
+    Id of the authenticated user, for read-only routes that need nothing else.
+    With AUTH_TRUST_CLAIMS the signed token is trusted (only the in-memory revocation check runs);
+    otherwise this goes through get_current_user.
+    """
+    if AUTH_TRUST_CLAIMS:
+        token_data,iat=decode_access_token(token)
+        check_not_revoked(db,token_data.user_id,iat)
+        return token_data.user_id
+    return get_current_user(token,db).id
+
+async def get_current_user_id_async(token:str=Depends(oauth2_scheme),db=Depends(database.get_async_db))->int:
+    """get_current_user_id for async routes (see get_current_user_async)"""
+    if AUTH_TRUST_CLAIMS:
+        token_data,iat=decode_access_token(token)
+        await check_not_revoked_async(db,token_data.user_id,iat)
+        return token_data.user_id
+    return (await get_current_user_async(token,db)).id
@@ -0,0 +1,118 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from . import models
+from .config import settings
+
+# How often each worker reloads revocations written by other workers
+REVOCATION_REFRESH_SECONDS = settings.revocation_refresh_seconds
+REVOCATION_BLOOM_BITS = settings.revocation_bloom_bits
+REVOCATION_BLOOM_HASHES = 4
+
+
+class BloomFilter:
+    """Fixed-size bloom filter; `might_contain` never gives a false negative."""
+
+    def __init__(self, bits=REVOCATION_BLOOM_BITS, hashes=REVOCATION_BLOOM_HASHES):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(str(item).encode(), digest_size=8 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[i * 8:(i + 1) * 8], "little") % self.bits
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self._array[pos >> 3] |= 1 << (pos & 7)
+
+    def might_contain(self, item):
+        return all(self._array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class RevocationIndex:
+    """
+    In-memory view of revoked_tokens: for each user, the time before which
+    their access tokens are no longer valid. Lookups hit the bloom filter
+    first, so the common "not revoked" answer costs a few hash probes and no
+    dict or DB access. The index is rebuilt from the DB every
+    REVOCATION_REFRESH_SECONDS so revocations from other workers show up.
+    """
+
+    def __init__(self, refresh_seconds=REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._bloom = BloomFilter()
+        self._cutoffs = {}    # {user_id: unix seconds}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _query(now):
+        return select(models.RevokedToken.user_id, models.RevokedToken.revoked_at).where(
+            models.RevokedToken.expires_at > now.replace(tzinfo=None)
+        )
+
+    def refresh(self, db):
+        now = datetime.now(timezone.utc)
+        self._load(db.execute(self._query(now)).all(), now)
+
+    async def refresh_async(self, db):
+        """refresh() for an AsyncSession or database.ThreadedSession"""
+        now = datetime.now(timezone.utc)
+        self._load((await db.execute(self._query(now))).all(), now)
+
+    def _load(self, rows, now):
+        bloom, cutoffs = BloomFilter(), {}
+        for user_id, revoked_at in rows:
+            cutoff = _timestamp(revoked_at)
+            if cutoff > cutoffs.get(user_id, 0):
+                cutoffs[user_id] = cutoff
+            bloom.add(user_id)
+        with self._lock:
+            # Keep revocations made locally since the query ran
+            for user_id, cutoff in self._cutoffs.items():
+                if cutoff > cutoffs.get(user_id, 0) and cutoff > now.timestamp() - self.refresh_seconds:
+                    cutoffs[user_id] = cutoff
+                    bloom.add(user_id)
+            self._bloom, self._cutoffs = bloom, cutoffs
+            self._loaded_at = time.monotonic()
+
+    def _stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_seconds
+
+    def maybe_refresh(self, db):
+        if self._stale():
+            self.refresh(db)
+
+    async def maybe_refresh_async(self, db):
+        if self._stale():
+            await self.refresh_async(db)
+
+    def add(self, user_id, revoked_at):
+        with self._lock:
+            cutoff = _timestamp(revoked_at)
+            if cutoff > self._cutoffs.get(user_id, 0):
+                self._cutoffs[user_id] = cutoff
+            self._bloom.add(user_id)
+
+    def is_revoked(self, user_id, issued_at):
+        if not self._bloom.might_contain(user_id):
+            return False
+        cutoff = self._cutoffs.get(user_id)
+        # iat and the cutoff are whole seconds: a token from the second of the
+        # revocation is kept, so logging in right after it works
+        return cutoff is not None and (issued_at is None or issued_at < cutoff)
+
+
+def _timestamp(value):
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+revocation_index = RevocationIndex()
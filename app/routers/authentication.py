@@ -2,27 +2,53 @@ from fastapi import APIRouter,Depends,HTTPException,status
 from sqlalchemy.orm import Session
 from .. import database,schemas,models,utils,crud,oauth2
 from fastapi.security import OAuth2PasswordRequestForm
+from ..log import get_logger
 
 router=APIRouter()
+logger=get_logger(__name__)
+
+# Signup and login are async so a request waiting for the bcrypt pool holds
+# no threadpool thread; their session is an AsyncSession or ThreadedSession.
+# The read transaction is ended before hashing so no pooled DB connection is
+# held while the job waits either.
 
 @router.post("/signup",response_model=schemas.UserResponse)
-def create_user(user:schemas.UserCreate,db:Session=Depends(database.get_db)):
-    db_user=crud.get_user_by_email(db,email=user.email)
+async def create_user(user:schemas.UserCreate,db=Depends(database.get_async_db)):
+    db_user=await crud.get_user_by_email(db,email=user.email)
     if db_user:
         raise HTTPException(status_code=400,detail="Email already registered")
-    new_user=crud.create_user(db=db,user=user)
-    print(f"Debug:Saved User to db with id : {new_user.id}")
+    await db.rollback()
+    new_user=await crud.create_user(db=db,user=user)
+    logger.info("user signed up",extra={"user_id":new_user.id})
     return new_user
 
 @router.post("/login",response_model=schemas.Token)
-def login(user_credentials:OAuth2PasswordRequestForm=Depends(),db:Session=Depends(database.get_db)):
-    user=crud.get_user_by_email(db,email=user_credentials.username)
+async def login(user_credentials:OAuth2PasswordRequestForm=Depends(),db=Depends(database.get_async_db)):
+    user=await crud.get_user_by_email(db,email=user_credentials.username)
     if not user:
         raise HTTPException(
             status_code=404, 
             detail="Account not found. Please sign up."
         )
-    if not utils.Hash.verify(user_credentials.password,user.hashed_password):
+    user_id,hashed_password=user.id,user.hashed_password
+    await db.rollback()
+    verified,new_hash=await utils.Hash.verify_and_update(user_credentials.password,hashed_password)
+    if not verified:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,detail="Invalid Credentials")
-    access_token=oauth2.create_access_token(data={"user_id":str(user.id)})
-    return {"access_token":access_token,"token_type":"bearer"}
\ No newline at end of file
+    if new_hash:
+        # Stored hash used an outdated cost factor; upgrade it while we have the password
+        # (committed together with the refresh token below)
+        user=await db.get(models.User,user_id)
+        user.hashed_password=new_hash
+    access_token=oauth2.create_access_token(data={"user_id":str(user_id)})
+    db_token,refresh_token=oauth2.new_refresh_token(user_id)
+    db.add(db_token)
+    await db.commit()
+    return {"access_token":access_token,"token_type":"bearer","refresh_token":refresh_token}
+
+@router.post("/token/refresh",response_model=schemas.Token)
+def refresh_access_token(request:schemas.RefreshRequest,db:Session=Depends(database.get_db)):
+    """Trade a refresh token for a new access + refresh token pair without re-checking the password"""
+    user_id,refresh_token=oauth2.rotate_refresh_token(db,request.refresh_token)
+    access_token=oauth2.create_access_token(data={"user_id":str(user_id)})
+    return {"access_token":access_token,"token_type":"bearer","refresh_token":refresh_token}
\ No newline at end of file
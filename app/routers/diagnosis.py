@@ -1,25 +1,60 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from dotenv import load_dotenv
-from groq import Groq
-import os
+import asyncio
 import json
+import math
 import re
-from app.schemas import SymptomInput , Diagnosis, SaveHistoryRequest, DiagnosisHistoryResponse
+from typing import List, Literal, Optional
+from app.schemas import SymptomInput , Diagnosis, SaveHistoryRequest, DiagnosisHistoryResponse, BatchDiagnosisResult, DiagnosisHistoryPage, DiagnosisSummary, SymptomSuggestion
 from datetime import datetime
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.models import Diagnosis as DiagnosisModel
-from app import oauth2  
+from app import oauth2, crud, utils, metrics
 from app.models import User
-import pytz
-load_dotenv()
+from app.llm import llm_client, LLMError, LLMTimeout, LLMUnavailable
+from app.cache import symptom_cache, symptom_cache_key
+from app.semantic_cache import semantic_cache
+from app.singleflight import SingleFlight, TooManyWaiters
+from app.streaming import DiagnosisFieldParser, STREAMED_FIELDS, sse_event
+from app.config import settings
+from app.log import get_logger
+from app.triage import get_triage_engine
+from app.symptoms import MAX_SUGGESTIONS, normalize_symptoms, symptom_index
+from app.idempotency import fingerprint, idempotency_key, idempotency_store
 
 
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+router = APIRouter()
 
+# Concurrent checks with the same cache key share one upstream completion
+symptom_flight = SingleFlight()
 
-router = APIRouter()
+metrics.Gauge("merocare_symptom_flight_in_flight", "Distinct symptom checks currently waiting on Groq",
+              function=symptom_flight.in_flight)
+metrics.Counter("merocare_symptom_flight_executions", "Symptom checks that started an upstream completion",
+                function=lambda: symptom_flight.executions)
+metrics.Counter("merocare_symptom_flight_shared", "Symptom checks that joined an identical one already in flight",
+                function=lambda: symptom_flight.shared)
+
+logger = get_logger(__name__)
+
+BATCH_MAX_ITEMS = settings.batch_max_items
+# Distinct symptom sets from one batch that may hit Groq at the same time
+BATCH_CONCURRENCY = settings.batch_concurrency
+
+# Engine used when a check does not pick one: "ai" (default), or the opt-in "local" or "auto"
+TRIAGE_ENGINE = settings.triage_engine
+# How long "auto" waits for Groq before answering from the offline engine
+TRIAGE_AI_BUDGET = settings.triage_ai_budget
+# When true, "auto" answers offline without asking Groq if the offline engine finds an emergency
+TRIAGE_EMERGENCY_PRECHECK = settings.triage_emergency_precheck
+
+Engine = Literal["ai", "local", "auto"]
+
+triage_answers = metrics.Counter(
+    "merocare_triage_answers", "Symptom checks by the engine that answered and why", ("source", "reason"))
 
 
 #class SymptomInput(BaseModel):
@@ -34,13 +69,27 @@ router = APIRouter()
    # urgency: str
     #full_response: str
 
-@router.post("/check")
-async def check_symptoms(data: SymptomInput):
+def parse_ai_response(raw_text: str) -> dict:
     """
-    User sends symptoms → AI responds → we return diseases, first aid, urgency, full response.
+    Parse the model's JSON reply, stripping markdown fences if it added any.
     """
-    
-    prompt = f"""
+    try:
+        return json.loads(raw_text)
+    except Exception:
+        cleaned = re.sub(r"```.*?```", "", raw_text, flags=re.DOTALL)
+        cleaned = cleaned.replace("```json", "").replace("```", "").strip()
+
+        try:
+            return json.loads(cleaned)
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"AI returned invalid JSON.\nError: {e}\nRaw Response:\n{raw_text}",
+            )
+
+
+def build_prompt(data: SymptomInput) -> str:
+    return f"""
 IMPORTANT: You MUST reply in VALID JSON ONLY. 
 NO text outside JSON. NO markdown. NO comments.
 - Max 5 diseases
@@ -67,47 +116,289 @@ Age: {data.age}
 Gender: {data.gender}
 """
 
-    response = groq_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
-        messages=[
-            {"role": "system", "content": "Return ONLY JSON. No extra words at all."},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-    )
 
-    raw_text = response.choices[0].message.content.strip()
+def build_messages(data: SymptomInput) -> list:
+    return [
+        {"role": "system", "content": "Return ONLY JSON. No extra words at all."},
+        {"role": "user", "content": build_prompt(data)},
+    ]
+
 
-    print("\n====== AI RAW RESPONSE ======")
-    print(raw_text)
-    print("================================\n")
+def fields_from_response(raw_text: str) -> dict:
+    """
+    Parse a completed AI reply into the diagnosis fields
+    (everything except the per-request id, timestamp and symptoms).
+    """
+    parsed = parse_ai_response(raw_text)
 
+    return {
+        "predicted_disease": parsed.get("predicted_disease", "Unknown"),
+        "suggested_treatment": parsed.get("suggested_treatment", "Consult a healthcare professional"),
+        "urgency": parsed.get("urgency", "ROUTINE"),
+        "full_response": raw_text,
+    }
+
+
+async def ask_ai(data: SymptomInput) -> dict:
+    """Run one upstream completion and return the diagnosis fields."""
     try:
-        parsed = json.loads(raw_text)
-    except Exception:
-       
-        cleaned = re.sub(r"```.*?```", "", raw_text, flags=re.DOTALL)
-        cleaned = cleaned.replace("```json", "").replace("```", "").strip()
+        raw_text = await llm_client.complete(messages=build_messages(data), temperature=0.2)
+    except LLMTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except LLMUnavailable as e:
+        headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+        raise HTTPException(status_code=503, detail=str(e), headers=headers)
+    except LLMError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
-        try:
-            parsed = json.loads(cleaned)
-        except Exception as e:
-            raise HTTPException(
-                status_code=500,
-                detail=f"AI returned invalid JSON.\nError: {e}\nRaw Response:\n{raw_text}",
-            )
+    logger.debug("ai raw response", extra={"raw_text": raw_text})
 
+    return fields_from_response(raw_text)
+
+
+def build_diagnosis(data: SymptomInput, fields: dict) -> Diagnosis:
     return Diagnosis(
         id=0, 
-        predicted_disease=parsed.get("predicted_disease", "Unknown"),
-        suggested_treatment=parsed.get("suggested_treatment", "Consult a healthcare professional"),
         created_at=datetime.utcnow(),
         symptoms=", ".join(data.symptoms), 
-        urgency=parsed.get("urgency", "ROUTINE"),
-        full_response=raw_text
+        **fields
     )
 
 
+async def cached_fields(data: SymptomInput, key: str):
+    """Cached fields for an exact repeat, else for a near-duplicate (same age band and gender)."""
+    fields = await symptom_cache.get(key)
+    if fields is None and semantic_cache is not None:
+        fields = semantic_cache.get(data.symptoms, data.age, data.gender)
+    return fields
+
+
+async def cache_fields(data: SymptomInput, key: str, fields: dict):
+    await symptom_cache.set(key, fields)
+    if semantic_cache is not None:
+        semantic_cache.set(key, data.symptoms, data.age, data.gender, fields)
+
+
+async def fetch_and_cache(data: SymptomInput, key: str) -> dict:
+    fields = await ask_ai(data)
+    await cache_fields(data, key, fields)
+    return fields
+
+
+async def diagnosis_fields(data: SymptomInput, key: str = None) -> dict:
+    """
+    Diagnosis fields for a symptom check, serving repeats of the same normalized
+    symptoms / age band / gender (or a near-duplicate wording of them) from
+    the cache instead of calling Groq. Identical checks that miss the cache at
+    the same time wait on a single upstream call and share its result (or its error).
+    """
+    key = key or symptom_cache_key(data.symptoms, data.age, data.gender)
+    fields = await cached_fields(data, key)
+    if fields is None:
+        try:
+            fields = await symptom_flight.do(key, lambda: fetch_and_cache(data, key))
+        except TooManyWaiters as e:
+            raise HTTPException(status_code=503, detail=str(e))
+    return fields
+
+
+def local_fields(data: SymptomInput) -> dict:
+    """Diagnosis fields from the offline triage engine (sub-millisecond, no network)."""
+    return get_triage_engine().assess(data.symptoms, data.age, data.gender).fields()
+
+
+async def engine_fields(data: SymptomInput, engine: str, key: str = None) -> dict:
+    """
+    Diagnosis fields from the chosen engine:
+      ai    - Groq (through the cache); upstream failures are errors
+      local - the offline triage engine only
+      auto  - Groq, but answered offline when Groq fails or takes longer
+              than TRIAGE_AI_BUDGET. A Groq call that runs past the budget
+              still finishes and fills the cache. With
+              TRIAGE_EMERGENCY_PRECHECK an offline EMERGENCY answer is
+              returned without asking Groq at all.
+    """
+    if engine == "local":
+        triage_answers.inc(source="local", reason="requested")
+        return local_fields(data)
+    if engine == "ai":
+        fields = await diagnosis_fields(data, key)
+        triage_answers.inc(source="ai", reason="requested")
+        return fields
+
+    local = local_fields(data)
+    if TRIAGE_EMERGENCY_PRECHECK and local["urgency"] == "EMERGENCY":
+        triage_answers.inc(source="local", reason="emergency")
+        return local
+    try:
+        fields = await asyncio.wait_for(diagnosis_fields(data, key), TRIAGE_AI_BUDGET)
+    except asyncio.TimeoutError:
+        reason = "timeout"
+    except HTTPException as e:
+        if e.status_code < 500:
+            raise
+        reason = "upstream_error"
+    else:
+        triage_answers.inc(source="ai", reason="ok")
+        return fields
+    logger.warning("symptom check answered offline", extra={"reason": reason})
+    triage_answers.inc(source="local", reason=reason)
+    return local
+
+
+def canonicalize(data: SymptomInput) -> SymptomInput:
+    """Same check with its symptoms mapped to canonical names, so the prompt and cache key see one spelling."""
+    return data.model_copy(update={"symptoms": normalize_symptoms(data.symptoms)})
+
+
+async def diagnose(data: SymptomInput, engine: str = TRIAGE_ENGINE) -> Diagnosis:
+    return build_diagnosis(data, await engine_fields(data, engine))
+
+
+@router.post("/check")
+async def check_symptoms(
+    data: SymptomInput,
+    response: Response,
+    engine: Engine = Query(TRIAGE_ENGINE),
+    key: Optional[str] = Depends(idempotency_key),
+):
+    """
+    User sends symptoms → AI responds → we return diseases, first aid, urgency, full response.
+    `engine` picks who answers: ai, local (offline triage) or auto (AI with offline fallback).
+    A retry with the same Idempotency-Key header gets the first answer back.
+    """
+    return await idempotency_store.run(
+        "check", key, fingerprint([data.model_dump(), engine]),
+        lambda: diagnose(canonicalize(data), engine), response,
+    )
+
+
+def answer_events(data: SymptomInput, fields: dict):
+    """The field and result events for an answer that is already complete."""
+    for name in STREAMED_FIELDS:
+        yield sse_event("field", {"name": name, "value": fields[name]})
+    yield sse_event("result", build_diagnosis(data, fields).model_dump(mode="json"))
+
+
+async def stream_diagnosis(data: SymptomInput, engine: str = TRIAGE_ENGINE):
+    """
+    Server-Sent Events for one symptom check:
+      token  - raw text deltas as the model generates them
+      field  - predicted_disease / urgency / suggested_treatment, each as soon as its value is complete
+      result - the final Diagnosis, same shape as /check
+      error  - {"detail": ...} if the upstream call or parsing fails (engine=ai)
+    With engine=auto an upstream failure ends the stream with the offline
+    engine's result instead of an error.
+    """
+    local = local_fields(data) if engine != "ai" else None
+    precheck = TRIAGE_EMERGENCY_PRECHECK and local is not None and local["urgency"] == "EMERGENCY"
+    if engine == "local" or precheck:
+        triage_answers.inc(source="local", reason="requested" if engine == "local" else "emergency")
+        for event in answer_events(data, local):
+            yield event
+        return
+
+    key = symptom_cache_key(data.symptoms, data.age, data.gender)
+    fields = await cached_fields(data, key)
+    if fields is not None:
+        for event in answer_events(data, fields):
+            yield event
+        return
+
+    parser = DiagnosisFieldParser()
+    try:
+        async for delta in llm_client.stream(messages=build_messages(data), temperature=0.2):
+            yield sse_event("token", {"text": delta})
+            for name, value in parser.feed(delta):
+                yield sse_event("field", {"name": name, "value": value})
+        fields = fields_from_response(parser.buffer.strip())
+    except (LLMError, HTTPException) as e:
+        if local is None:
+            yield sse_event("error", {"detail": e.detail if isinstance(e, HTTPException) else str(e)})
+            return
+        logger.warning("streamed symptom check answered offline", extra={"reason": "upstream_error"})
+        triage_answers.inc(source="local", reason="upstream_error")
+        yield sse_event("result", build_diagnosis(data, local).model_dump(mode="json"))
+        return
+
+    await cache_fields(data, key, fields)
+    yield sse_event("result", build_diagnosis(data, fields).model_dump(mode="json"))
+
+
+@router.post("/check/stream")
+async def check_symptoms_stream(data: SymptomInput, engine: Engine = Query(TRIAGE_ENGINE)):
+    """
+    Streaming variant of /check: the client sees tokens and parsed fields
+    while the model is still generating instead of waiting for the whole reply.
+    """
+    return StreamingResponse(
+        stream_diagnosis(canonicalize(data), engine),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/check-batch", response_model=List[BatchDiagnosisResult])
+async def check_symptoms_batch(items: List[SymptomInput], engine: Engine = Query(TRIAGE_ENGINE)):
+    """
+    Check many symptom sets in one request (clinic kiosks, offline sync).
+    Identical entries are answered once, the rest run with bounded
+    concurrency, and results come back in input order with per-item errors.
+    """
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(items)} items (max {BATCH_MAX_ITEMS})"
+        )
+
+    items = [canonicalize(item) for item in items]
+    # Dedupe on the cache key so identical entries share one lookup/call
+    keys = [symptom_cache_key(item.symptoms, item.age, item.gender) for item in items]
+    unique = {}
+    for key, item in zip(keys, items):
+        unique.setdefault(key, item)
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run(key, item):
+        async with semaphore:
+            try:
+                return await engine_fields(item, engine, key)
+            except HTTPException as e:
+                return e
+            except Exception as e:
+                return HTTPException(status_code=500, detail=f"Error checking symptoms: {str(e)}")
+
+    outcomes = dict(zip(unique, await asyncio.gather(*(run(k, i) for k, i in unique.items()))))
+
+    results = []
+    for index, (key, item) in enumerate(zip(keys, items)):
+        outcome = outcomes[key]
+        if isinstance(outcome, HTTPException):
+            results.append(BatchDiagnosisResult(index=index, status_code=outcome.status_code, error=str(outcome.detail)))
+        else:
+            results.append(BatchDiagnosisResult(index=index, status_code=200, result=build_diagnosis(item, outcome)))
+    return results
+
+
+@router.get("/symptoms/suggest", response_model=List[SymptomSuggestion])
+async def suggest_symptoms(q: str = Query(..., min_length=1, max_length=100), limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS)):
+    """
+    Typeahead for the symptom input: canonical symptoms whose name, a synonym,
+    or any word in either starts with `q`. Served from an in-memory trie.
+    """
+    return symptom_index.suggest(q, limit)
+
+
+@router.get("/cache/stats")
+def symptom_cache_stats():
+    """Hit/miss counters for the symptom-check cache and its near-duplicate layer"""
+    return {
+        **symptom_cache.stats(),
+        "semantic": semantic_cache.stats() if semantic_cache is not None else {"enabled": False},
+    }
+
+
 @router.get("/")
 def diagnosis_home():
     return {"message": "Diagnosis API is running!"}
@@ -115,17 +406,28 @@ def diagnosis_home():
 @router.post("/save-history")
 async def save_history(
     request: SaveHistoryRequest,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(oauth2.get_current_user)  # <- ADDED: Get logged-in user
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(oauth2.get_current_user_async),  # <- ADDED: Get logged-in user
+    key: Optional[str] = Depends(idempotency_key),
 ):
     """
-    Save diagnosis to the current user's history
+    Save diagnosis to the current user's history.
+    A retry with the same Idempotency-Key header returns the first save instead of inserting again.
     """
+    return await idempotency_store.run(
+        f"save-history:{current_user.id}", key, fingerprint(request.model_dump()),
+        lambda: insert_diagnosis(request, db, current_user), response,
+    )
+
+
+async def insert_diagnosis(request: SaveHistoryRequest, db: AsyncSession, current_user: User):
     try:
         # Parse as UTC time
         utc_time = datetime.fromisoformat(request.created_at.replace('Z', '+00:00'))
         
         # Convert to Nepal timezone (UTC+5:45)
+        import pytz  # only needed here; kept out of startup
         nepal_tz = pytz.timezone('Asia/Kathmandu')
         nepal_time = utc_time.astimezone(nepal_tz)
         
@@ -136,10 +438,16 @@ async def save_history(
             created_at=nepal_time,
             visibility=request.visibility
         )
+        crud.set_diagnosis_details(
+            new_diagnosis,
+            predicted_disease=request.predicted_disease,
+            urgency=request.urgency,
+            suggested_treatment=request.suggested_treatment,
+            symptoms=request.symptoms
+        )
         
-        db.add(new_diagnosis)
-        db.commit()
-        db.refresh(new_diagnosis)
+        await crud.save_diagnosis(db, new_diagnosis)
+        await db.refresh(new_diagnosis)
         
         return {
             "success": True,
@@ -147,7 +455,7 @@ async def save_history(
             "id": new_diagnosis.id
         }
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error saving diagnosis: {str(e)}"
@@ -156,17 +464,26 @@ async def save_history(
 
 @router.get("/my", response_model=list[DiagnosisHistoryResponse])
 async def get_my_diagnosis_history(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(oauth2.get_current_user)  # <- ADDED: Get logged-in user
+    urgency: Optional[str] = None,
+    since: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(oauth2.get_current_user_id_async)
 ):
     """
-    Fetch ONLY the current user's diagnosis history ordered by most recent first
+    Fetch ONLY the current user's diagnosis history ordered by most recent first.
+    Optionally narrow it to one urgency level and/or entries created at or after `since`.
     """
     try:
         # FIXED: Now filters by current user's ID
-        diagnoses = db.query(DiagnosisModel).filter(
-            DiagnosisModel.user_id == current_user.id  # <- CRITICAL FIX!
-        ).order_by(DiagnosisModel.created_at.desc()).all()
+        query = select(DiagnosisModel).where(
+            DiagnosisModel.user_id == current_user_id  # <- CRITICAL FIX!
+        )
+        if urgency:
+            query = query.where(DiagnosisModel.urgency == urgency.upper())
+        if since:
+            query = query.where(DiagnosisModel.created_at >= since)
+        result = await db.execute(query.order_by(DiagnosisModel.created_at.desc()))
+        diagnoses = result.scalars().all()
         
         # Transform database records to response format
         result = []
@@ -174,9 +491,9 @@ async def get_my_diagnosis_history(
             result.append(DiagnosisHistoryResponse(
                 id=diagnosis.id,
                 symptoms=diagnosis.user_diagnosis or "No data available",
-                diagnosis_result="",  # Empty since everything is in user_diagnosis
-                treatment="",
-                urgency="ROUTINE",
+                diagnosis_result=diagnosis.predicted_disease or "",
+                treatment=diagnosis.suggested_treatment or "",
+                urgency=diagnosis.urgency or "ROUTINE",
                 visibility=diagnosis.visibility,
                 created_at=diagnosis.created_at
             ))
@@ -189,12 +506,63 @@ async def get_my_diagnosis_history(
         )
     
 
+@router.get("/my/page", response_model=DiagnosisHistoryPage)
+async def get_my_diagnosis_page(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    urgency: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(oauth2.get_current_user_id_async)
+):
+    """
+    One page of the current user's history, newest first, without the full
+    diagnosis text. Pass back `next_cursor` to get the following page; `since`
+    limits the result to entries created at or after that time (mobile sync).
+    """
+    query = select(
+        DiagnosisModel.id,
+        DiagnosisModel.predicted_disease,
+        DiagnosisModel.urgency,
+        DiagnosisModel.visibility,
+        DiagnosisModel.created_at,
+    ).where(DiagnosisModel.user_id == current_user_id)
+
+    if cursor:
+        try:
+            cursor_created_at, cursor_id = utils.decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        # Keyset: strictly after the last row of the previous page in (created_at, id) DESC order
+        query = query.where(or_(
+            DiagnosisModel.created_at < cursor_created_at,
+            and_(DiagnosisModel.created_at == cursor_created_at, DiagnosisModel.id < cursor_id),
+        ))
+    if since:
+        query = query.where(DiagnosisModel.created_at >= since)
+    if urgency:
+        query = query.where(DiagnosisModel.urgency == urgency.upper())
+
+    query = query.order_by(DiagnosisModel.created_at.desc(), DiagnosisModel.id.desc()).limit(limit + 1)
+    rows = (await db.execute(query)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = utils.encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return DiagnosisHistoryPage(
+        items=[DiagnosisSummary.model_validate(row) for row in rows],
+        next_cursor=next_cursor
+    )
+
+
 @router.patch("/update-visibility/{diagnosis_id}")
 async def update_visibility(
     diagnosis_id: int,
     visibility: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(oauth2.get_current_user)  # <- ADDED: Security check
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(oauth2.get_current_user_async)  # <- ADDED: Security check
 ):
     """
     Update the visibility of a diagnosis record (only owner can update)
@@ -208,7 +576,7 @@ async def update_visibility(
             )
         
         # Find the diagnosis record
-        diagnosis = db.query(DiagnosisModel).filter(DiagnosisModel.id == diagnosis_id).first()
+        diagnosis = await crud.get_diagnosis(db, diagnosis_id)
         
         if not diagnosis:
             raise HTTPException(
@@ -225,8 +593,9 @@ async def update_visibility(
         
         # Update visibility
         diagnosis.visibility = visibility
-        db.commit()
-        db.refresh(diagnosis)
+        crud.record_change(db, "diagnosis", diagnosis.id, user_id=current_user.id)
+        await db.commit()
+        await db.refresh(diagnosis)
         
         return {
             "success": True,
@@ -237,7 +606,7 @@ async def update_visibility(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error updating visibility: {str(e)}"
@@ -247,15 +616,15 @@ async def update_visibility(
 @router.delete("/delete/{diagnosis_id}")
 async def delete_diagnosis(
     diagnosis_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(oauth2.get_current_user)  # <- ADDED: Security check
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(oauth2.get_current_user_async)  # <- ADDED: Security check
 ):
     """
     Delete a diagnosis record from the database (only owner can delete)
     """
     try:
         # Find the diagnosis record
-        diagnosis = db.query(DiagnosisModel).filter(DiagnosisModel.id == diagnosis_id).first()
+        diagnosis = await crud.get_diagnosis(db, diagnosis_id)
         
         if not diagnosis:
             raise HTTPException(
@@ -271,8 +640,9 @@ async def delete_diagnosis(
             )
         
         # Delete the record
-        db.delete(diagnosis)
-        db.commit()
+        await db.delete(diagnosis)
+        crud.record_change(db, "diagnosis", diagnosis_id, op="delete", user_id=current_user.id)
+        await db.commit()
         
         return {
             "success": True,
@@ -282,7 +652,7 @@ async def delete_diagnosis(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=500,
             detail=f"Error deleting diagnosis: {str(e)}"
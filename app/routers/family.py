@@ -1,15 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
-from .. import database, models, schemas, oauth2, utils
+from typing import List, Optional
+from .. import database, models, schemas, oauth2, crud, kinship
 from sqlalchemy import or_, and_
+from ..log import get_logger
 
 router=APIRouter()
+logger = get_logger(__name__)
 
 @router.post("/invite", tags=["Family"])
 def send_invite(request:schemas.FamilyInviteRequest, db: Session = Depends(database.get_db)):
     """Invite someone to your family group via email"""
-    print(f"DEBUG: Searching for email: '{request.receiver_email}'")
+    logger.debug("family invite", extra={"sender_id": request.sender_id})
     sender = db.query(models.User).filter(models.User.id == request.sender_id).first()
     receiver = db.query(models.User).filter(models.User.email == request.receiver_email).first()
     if not receiver: 
@@ -21,6 +23,7 @@ def send_invite(request:schemas.FamilyInviteRequest, db: Session = Depends(datab
         db.add(new_family_entry)
         db.flush() 
         sender.family_id = str(new_family_entry.id) 
+        crud.record_change(db, "family_member", sender.id, family_id=sender.family_id)
         db.commit()
 
     new_invite = models.FamilyConnection(
@@ -30,25 +33,40 @@ def send_invite(request:schemas.FamilyInviteRequest, db: Session = Depends(datab
         target_family_id=sender.family_id
     )
     db.add(new_invite)
+    db.flush()
+    for party_id in (sender.id, receiver.id):
+        crud.record_change(db, "invite", new_invite.id, user_id=party_id)
     db.commit()
+    oauth2.invalidate_user(sender.id)
     return {"message": "Invitation Sent"}
 
 @router.get("/pending-requests/{user_id}", tags=["Family"])
-def get_pending_invites(user_id: int, db: Session = Depends(database.get_db)):
-    """List invitations waiting for this user"""
-    invites = db.query(models.FamilyConnection).filter(
+def get_pending_invites(
+    user_id: int,
+    invite_status: str = Query("pending", alias="status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(database.get_db)
+):
+    """List invitations waiting for this user (one query: sender name joined in)"""
+    invites = db.query(
+        models.FamilyConnection.id,
+        models.FamilyConnection.receiver_role,
+        models.User.full_name,
+    ).outerjoin(
+        models.User, models.User.id == models.FamilyConnection.sender_id
+    ).filter(
         models.FamilyConnection.receiver_id == user_id, 
-        models.FamilyConnection.status == "pending"
-    ).all()
-    results = []
-    for i in invites:
-        sender = db.query(models.User).filter(models.User.id == i.sender_id).first()
-        results.append({
+        models.FamilyConnection.status == invite_status
+    ).order_by(models.FamilyConnection.id.desc()).offset(skip).limit(limit).all()
+    return [
+        {
             "invite_id": i.id, 
-            "from_name": sender.full_name if sender else "Unknown", 
+            "from_name": i.full_name or "Unknown", 
             "assigned_role": i.receiver_role
-        })
-    return results
+        }
+        for i in invites
+    ]
 
 @router.post("/accept/{request_id}", tags=["Family"])
 def accept_invite(request_id: int, db: Session = Depends(database.get_db)):
@@ -59,8 +77,13 @@ def accept_invite(request_id: int, db: Session = Depends(database.get_db)):
     receiver = db.query(models.User).filter(models.User.id == invite.receiver_id).first()
     if receiver and not receiver.family_id: # Only update if they aren't in a family already
         receiver.family_id = invite.target_family_id
+        crud.record_change(db, "family_member", receiver.id, family_id=invite.target_family_id)
     invite.status = "accepted"
+    for party_id in (invite.sender_id, invite.receiver_id):
+        crud.record_change(db, "invite", invite.id, user_id=party_id)
     db.commit()
+    oauth2.invalidate_user(invite.receiver_id)
+    kinship.kinship_cache.invalidate(invite.target_family_id)
     return {"message": "Joined Family"}
 
 @router.get("/list/{user_id}", response_model=List[schemas.FamilyMemberResponse], tags=["Family"])
@@ -83,20 +106,8 @@ def get_family_members(user_id: int, db: Session = Depends(database.get_db)):
         models.User.family_id == myself.family_id
     ).all()
     
-    # Get ALL connections in this family for relationship inference
-    all_connections = db.query(models.FamilyConnection).filter(
-        models.FamilyConnection.target_family_id == myself.family_id,
-        models.FamilyConnection.status == "accepted"
-    ).all()
-    
-    # Build a relationship map: {(user1_id, user2_id): role}
-    relationship_map = {}
-    for conn in all_connections:
-        # Direct relationship: sender → receiver
-        relationship_map[(conn.sender_id, conn.receiver_id)] = conn.receiver_role
-        # Reverse relationship: receiver → sender
-        reverse_role = utils.INVERSE_RELATIONS.get(conn.receiver_role, "Family Member")
-        relationship_map[(conn.receiver_id, conn.sender_id)] = reverse_role
+    # Relationships for the whole family, built once and cached until an invite changes
+    graph = kinship.kinship_cache.get(db, myself.family_id)
     
     family_members_data = []
     
@@ -108,20 +119,11 @@ def get_family_members(user_id: int, db: Session = Depends(database.get_db)):
             member_data['role'] = "Self"
             family_members_data.append(member_data)
         else:
-            # Check if there's a direct relationship
-            role_to_display = relationship_map.get((user_id, member.id))
-            
-            # If no direct relationship, try to infer through a common connection
-            if not role_to_display or role_to_display == "Family Member":
-                role_to_display = infer_relationship(
-                    user_id, 
-                    member.id, 
-                    all_connections, 
-                    relationship_map
-                )
+            # Direct role if there is one, otherwise inferred through the family graph
+            role_to_display = graph.relationship(user_id, member.id)
             
             # Apply gender-based role names
-            role_to_display = apply_gender_to_role(role_to_display, member.gender)
+            role_to_display = kinship.apply_gender_to_role(role_to_display, member.gender)
             
             member_data = schemas.UserResponse.model_validate(member).model_dump()
             member_data['role'] = role_to_display
@@ -130,109 +132,6 @@ def get_family_members(user_id: int, db: Session = Depends(database.get_db)):
     return family_members_data
 
 
-def infer_relationship(user_a_id: int, user_b_id: int, connections, relationship_map) -> str:
-    """
-    Infer relationship between two users through common connections.
-    For example: If A's father is B's spouse, then B is A's mother/father.
-    """
-    
-    # Try to find a common person both are connected to
-    a_connections = {}  # {connected_person_id: role_from_a's_perspective}
-    b_connections = {}  # {connected_person_id: role_from_b's_perspective}
-    
-    for conn in connections:
-        # Build A's connections
-        if conn.sender_id == user_a_id:
-            a_connections[conn.receiver_id] = conn.receiver_role
-        elif conn.receiver_id == user_a_id:
-            reverse_role = utils.INVERSE_RELATIONS.get(conn.receiver_role, "Family Member")
-            a_connections[conn.sender_id] = reverse_role
-        
-        # Build B's connections
-        if conn.sender_id == user_b_id:
-            b_connections[conn.receiver_id] = conn.receiver_role
-        elif conn.receiver_id == user_b_id:
-            reverse_role = utils.INVERSE_RELATIONS.get(conn.receiver_role, "Family Member")
-            b_connections[conn.sender_id] = reverse_role
-    
-    # Find common connections
-    common_people = set(a_connections.keys()) & set(b_connections.keys())
-    
-    for common_id in common_people:
-        a_to_common = a_connections[common_id]  # A's relationship to common person
-        b_to_common = b_connections[common_id]  # B's relationship to common person
-        
-        # Infer A's relationship to B based on common connection
-        inferred = infer_through_common(a_to_common, b_to_common)
-        if inferred and inferred != "Family Member":
-            return inferred
-    
-    # If we can't infer, return generic
-    return "Family Member"
-
-
-def infer_through_common(my_role_to_common: str, their_role_to_common: str) -> str:
-    """
-    Infer relationship based on a common person.
-    Example: If I call someone "Father" and another person calls them "Spouse",
-    that person is likely my "Mother" or "Father" (parent).
-    """
-    
-    # Parent relationships
-    if my_role_to_common in ["Father", "Mother", "Parent"]:
-        if their_role_to_common == "Spouse":
-            return "Parent"  # My parent's spouse is also my parent
-        elif their_role_to_common in ["Son", "Daughter", "Child"]:
-            return "Sibling"  # My parent's child is my sibling
-    
-    # Child relationships
-    elif my_role_to_common in ["Son", "Daughter", "Child"]:
-        if their_role_to_common in ["Son", "Daughter", "Child"]:
-            return "Sibling"  # My parent's other child is my sibling
-        elif their_role_to_common == "Spouse":
-            return "Parent"  # My child's spouse is my child-in-law (simplified to Parent)
-    
-    # Sibling relationships
-    elif my_role_to_common in ["Brother", "Sister", "Sibling"]:
-        if their_role_to_common in ["Father", "Mother", "Parent"]:
-            return "Parent"  # My sibling's parent is my parent
-        elif their_role_to_common in ["Son", "Daughter", "Child"]:
-            return "Sibling"  # My parent's child is my sibling
-    
-    # Spouse relationships
-    elif my_role_to_common == "Spouse":
-        if their_role_to_common in ["Son", "Daughter", "Child"]:
-            return "Child"  # My spouse's child could be my child
-        elif their_role_to_common in ["Father", "Mother", "Parent"]:
-            return "Parent"  # My spouse's parent is my parent-in-law (simplified)
-    
-    return "Family Member"
-
-
-def apply_gender_to_role(role: str, gender: str) -> str:
-    """Apply gender-specific names to generic roles"""
-    if not gender:
-        return role
-    
-    gender_lower = gender.lower()
-    
-    if role == "Parent":
-        if gender_lower == "male":
-            return "Father"
-        elif gender_lower == "female":
-            return "Mother"
-    elif role == "Child":
-        if gender_lower == "male":
-            return "Son"
-        elif gender_lower == "female":
-            return "Daughter"
-    elif role == "Sibling":
-        if gender_lower == "male":
-            return "Brother"
-        elif gender_lower == "female":
-            return "Sister"
-    
-    return role
 @router.get("/member-history/{target_user_id}", tags=["Family"])
 def get_member_history(target_user_id: int, requester_id: int, db: Session = Depends(database.get_db)):
     """Allow family members to see each other's PUBLIC medical records"""
@@ -262,25 +161,37 @@ def get_member_history(target_user_id: int, requester_id: int, db: Session = Dep
 
 @router.get("/sent-invites", tags=["Family"])
 def get_sent_invites(
+    invite_status: Optional[str] = Query(None, alias="status"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
     db: Session = Depends(database.get_db),
     current_user: models.User = Depends(oauth2.get_current_user)
 ):
-    """List all invitations sent BY the current user (pending, accepted, or denied)"""
-    
-    invites = db.query(models.FamilyConnection).filter(
+    """List invitations sent BY the current user (pending, accepted, or denied; filter with `status`)"""
+    
+    query = db.query(
+        models.FamilyConnection.id,
+        models.FamilyConnection.status,
+        models.FamilyConnection.receiver_role,
+        models.User.full_name,
+    ).outerjoin(
+        models.User, models.User.id == models.FamilyConnection.receiver_id
+    ).filter(
         models.FamilyConnection.sender_id == current_user.id
-    ).all()
+    )
+    if invite_status:
+        query = query.filter(models.FamilyConnection.status == invite_status)
+    invites = query.order_by(models.FamilyConnection.id.desc()).offset(skip).limit(limit).all()
     
-    results = []
-    for i in invites:
-        receiver = db.query(models.User).filter(models.User.id == i.receiver_id).first()
-        results.append({
+    return [
+        {
             "invite_id": i.id, 
-            "to_name": receiver.full_name if receiver else "Unknown/Deleted User", 
+            "to_name": i.full_name or "Unknown/Deleted User", 
             "status": i.status,
             "assigned_role": i.receiver_role
-        })
-    return results
+        }
+        for i in invites
+    ]
 
 @router.post("/reject/{request_id}", tags=["Family"])
 def reject_invite(request_id: int, db: Session = Depends(database.get_db)):
@@ -291,6 +202,10 @@ def reject_invite(request_id: int, db: Session = Depends(database.get_db)):
         raise HTTPException(status_code=404, detail="Invite not found")
         
     db.delete(invite)
+    for party_id in (invite.sender_id, invite.receiver_id):
+        crud.record_change(db, "invite", request_id, op="delete", user_id=party_id)
     db.commit()
+    oauth2.invalidate_user(invite.receiver_id)
+    kinship.kinship_cache.invalidate(invite.target_family_id)
     
     return {"message": "Invitation rejected and removed"}
\ No newline at end of file
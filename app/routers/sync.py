@@ -0,0 +1,126 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import or_, and_, func
+from sqlalchemy.orm import Session, joinedload
+from typing import Optional
+from .. import database, models, schemas, oauth2
+from .family import get_family_members
+
+router = APIRouter()
+
+# Change-log ids are handed out when a transaction inserts its row, not when it
+# commits, so a slow transaction can make id 41 visible after id 42 was synced.
+# Ids missing from the last GAP_WINDOW ids at sync time travel in the version
+# token and are looked up again on the next call; older holes are rollbacks.
+GAP_WINDOW = 200
+
+
+def parse_version(since: str):
+    """'<watermark>' or '<watermark>:<gap>,<gap>...' -> (watermark, gaps)"""
+    watermark, _, gaps = since.partition(":")
+    return int(watermark), [int(gap) for gap in gaps.split(",") if gap]
+
+
+def format_version(db: Session, watermark: int, gaps=()):
+    """Version token for `watermark`, carrying every id in its trailing window not yet visible"""
+    floor = max(watermark - GAP_WINDOW, 0)
+    seen = {row_id for (row_id,) in db.query(models.ChangeLog.id).filter(
+        models.ChangeLog.id > floor, models.ChangeLog.id <= watermark)}
+    missing = sorted(set(range(floor + 1, watermark + 1)) - seen)
+    return f"{watermark}:{','.join(map(str, missing))}" if missing else str(watermark)
+
+
+def diagnosis_summaries(db: Session, user_id: int, ids=None):
+    query = db.query(
+        models.Diagnosis.id,
+        models.Diagnosis.predicted_disease,
+        models.Diagnosis.urgency,
+        models.Diagnosis.visibility,
+        models.Diagnosis.created_at,
+    ).filter(models.Diagnosis.user_id == user_id)
+    if ids is not None:
+        query = query.filter(models.Diagnosis.id.in_(ids))
+    return [schemas.DiagnosisSummary.model_validate(row) for row in query.all()]
+
+
+def sync_invites(db: Session, user_id: int, ids=None):
+    query = db.query(models.FamilyConnection).options(
+        joinedload(models.FamilyConnection.sender),
+        joinedload(models.FamilyConnection.receiver),
+    ).filter(or_(
+        models.FamilyConnection.sender_id == user_id,
+        models.FamilyConnection.receiver_id == user_id,
+    ))
+    if ids is not None:
+        query = query.filter(models.FamilyConnection.id.in_(ids))
+
+    results = []
+    for invite in query.all():
+        received = invite.receiver_id == user_id
+        other = invite.sender if received else invite.receiver
+        results.append(schemas.SyncInvite(
+            invite_id=invite.id,
+            direction="received" if received else "sent",
+            name=other.full_name if other else "Unknown/Deleted User",
+            status=invite.status,
+            assigned_role=invite.receiver_role,
+        ))
+    return results
+
+
+@router.get("/sync", response_model=schemas.SyncResponse)
+def sync(
+    since: Optional[str] = None,
+    db: Session = Depends(database.get_db),
+    current_user: models.User = Depends(oauth2.get_current_user)
+):
+    """
+    Everything that changed for the current user since the `version` returned
+    by a previous call: diagnoses (including visibility changes), invites and
+    family membership, with deleted ids as tombstones. Call without `since`
+    for a full snapshot. The version is opaque; pass it back unchanged.
+    """
+    try:
+        since_id, gaps = parse_version(since) if since else (0, [])
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync version")
+
+    version = db.query(func.max(models.ChangeLog.id)).scalar() or 0
+
+    if not since_id:
+        return schemas.SyncResponse(
+            version=format_version(db, version),
+            full=True,
+            diagnoses=diagnosis_summaries(db, current_user.id),
+            invites=sync_invites(db, current_user.id),
+            family_members=get_family_members(current_user.id, db),
+        )
+
+    scope = models.ChangeLog.user_id == current_user.id
+    if current_user.family_id:
+        scope = or_(scope, models.ChangeLog.family_id == current_user.family_id)
+    unseen = and_(models.ChangeLog.id > since_id, models.ChangeLog.id <= version)
+    if gaps:
+        unseen = or_(unseen, models.ChangeLog.id.in_(gaps))
+    changes = db.query(models.ChangeLog).filter(and_(unseen, scope)).order_by(models.ChangeLog.id).all()
+
+    # Last operation per entity wins
+    latest = {}
+    for change in changes:
+        latest[(change.entity, change.entity_id)] = change.op
+
+    def ids(entity, op):
+        return [entity_id for (e, entity_id), o in latest.items() if e == entity and o == op]
+
+    upserted_diagnoses = ids("diagnosis", "upsert")
+    upserted_invites = ids("invite", "upsert")
+    family_changed = any(e == "family_member" for e, _ in latest)
+
+    return schemas.SyncResponse(
+        version=format_version(db, max(version, since_id)),
+        full=False,
+        diagnoses=diagnosis_summaries(db, current_user.id, upserted_diagnoses) if upserted_diagnoses else [],
+        deleted_diagnoses=ids("diagnosis", "delete"),
+        invites=sync_invites(db, current_user.id, upserted_invites) if upserted_invites else [],
+        deleted_invites=ids("invite", "delete"),
+        family_members=get_family_members(current_user.id, db) if family_changed else None,
+    )
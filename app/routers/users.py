@@ -1,7 +1,8 @@
 from fastapi import APIRouter,Depends,HTTPException
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List
-from .. import database,models,schemas,oauth2,utils
+from .. import database,models,schemas,oauth2,utils,crud
 
 router=APIRouter()
 
@@ -20,7 +21,7 @@ def read_user(user_id:int,db:Session=Depends(database.get_db)):
     return user
 
 @router.put("/me",response_model=schemas.UserResponse)
-def update_user_profile(user_update:schemas.UserUpdate,db:Session=Depends(database.get_db),current_user:models.User=Depends(oauth2.get_current_user)):
+def update_user_profile(user_update:schemas.UserUpdate,db:Session=Depends(database.get_db),current_user:models.User=Depends(oauth2.get_current_user_for_update)):
     if user_update.full_name is not None:
         current_user.full_name=user_update.full_name
     if user_update.mobile_number is not None:
@@ -33,16 +34,32 @@ def update_user_profile(user_update:schemas.UserUpdate,db:Session=Depends(databa
         current_user.dob=user_update.dob
     if user_update.gender is not None:
         current_user.gender=user_update.gender
+    if current_user.family_id:
+        crud.record_change(db,"family_member",current_user.id,family_id=current_user.family_id)
     
     db.commit()
+    oauth2.invalidate_user(current_user.id)
     db.refresh(current_user)
 
     return current_user
 
+def save_new_password(db:Session,user_id:int,hashed_password:str):
+    """Store the new hash and revoke the user's tokens in one commit; returns the revocation time"""
+    db.get(models.User,user_id).hashed_password=hashed_password
+    revoked_at=oauth2.revoke_user_tokens(db,user_id)
+    db.commit()
+    return revoked_at
+
 @router.post("/change_password")
-def change_password(pass_data:schemas.UserPasswordChange,db:Session=Depends(database.get_db),current_user:models.User=Depends(oauth2.get_current_user)):
-    if not utils.Hash.verify(pass_data.old_password,current_user.hashed_password):
+async def change_password(pass_data:schemas.UserPasswordChange,db:Session=Depends(database.get_db),current_user:models.User=Depends(oauth2.get_current_user_for_update)):
+    # Async so the two bcrypt jobs are awaited without holding a threadpool
+    # thread, and the read transaction ends first so no DB connection is held
+    user_id,old_hash=current_user.id,current_user.hashed_password
+    await run_in_threadpool(db.rollback)
+    if not await utils.Hash.verify(pass_data.old_password,old_hash):
         raise HTTPException(status_code=403,detail="Old password is incorrect")
-    current_user.hashed_password=utils.Hash.bcrypt(pass_data.new_password)
-    db.commit()
+    hashed_password=await utils.Hash.bcrypt(pass_data.new_password)
+    revoked_at=await run_in_threadpool(save_new_password,db,user_id,hashed_password)
+    oauth2.revocation_index.add(user_id,revoked_at)
+    oauth2.invalidate_user(user_id)
     return{"message":"Password Updated successfully"}
\ No newline at end of file
@@ -5,6 +5,10 @@ from datetime import datetime,date
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
 
 class TokenData(BaseModel):
     user_id:Optional[int]=None
@@ -59,14 +63,32 @@ class Diagnosis(BaseModel):
     symptoms:str
     urgency: str
     full_response: str
+    # "ai" (Groq) or "local" (offline triage engine)
+    source: str = "ai"
 
     class Config:
         from_attributes=True
 
+class SymptomSuggestion(BaseModel):
+    symptom:str
+    # the name or synonym that matched the query
+    matched:str
+
+class BatchDiagnosisResult(BaseModel):
+    index:int
+    status_code:int
+    result:Optional[Diagnosis]=None
+    error:Optional[str]=None
+
 class SaveHistoryRequest(BaseModel):
     user_diagnosis: str
     visibility: str
     created_at: str
+    # Optional structured fields; parsed from user_diagnosis when omitted
+    predicted_disease: Optional[str] = None
+    urgency: Optional[str] = None
+    suggested_treatment: Optional[str] = None
+    symptoms: Optional[List[str]] = None
     
 class CreateMedicalRecord(BaseModel):
     illness:str
@@ -93,10 +115,41 @@ class DiagnosisHistoryResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class DiagnosisSummary(BaseModel):
+    id: int
+    predicted_disease: Optional[str] = None
+    urgency: Optional[str] = None
+    visibility: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class DiagnosisHistoryPage(BaseModel):
+    items: List[DiagnosisSummary]
+    next_cursor: Optional[str] = None
+
 class FamilyInviteRequest(BaseModel):
     sender_id: int
     receiver_email: EmailStr
     role_for_receiver: str
 
 class FamilyMemberResponse(UserResponse):
-    role: str    
\ No newline at end of file
+    role: str    
+
+class SyncInvite(BaseModel):
+    invite_id: int
+    direction: str          # "received" or "sent"
+    name: str               # the other party
+    status: str
+    assigned_role: Optional[str] = None
+
+class SyncResponse(BaseModel):
+    version: str
+    full: bool
+    diagnoses: List[DiagnosisSummary] = []
+    deleted_diagnoses: List[int] = []
+    invites: List[SyncInvite] = []
+    deleted_invites: List[int] = []
+    # Whole family list, only sent when membership or a member's profile changed
+    family_members: Optional[List[FamilyMemberResponse]] = None
@@ -0,0 +1,272 @@
+"""
+Near-duplicate cache for symptom checks.
+
+The exact cache only matches the same normalized symptom entries; this one
+also matches sets that are worded differently ("coughing, fever since
+yesterday" and "cough, fever"). Each set is embedded locally as a hashed bag of word and
+character n-gram features (no model, no network), and a lookup is a cosine
+top-k over every cached vector in one NumPy product. A hit needs similarity
+>= SEMANTIC_CACHE_THRESHOLD and the same age band and gender.
+
+Similarity alone can pass a set that adds or drops one symptom ("cough,
+sneezing" vs "cough, sneezing, difficulty breathing" scores 0.9), so every
+entry also keeps its canonical symptom set (see canonical) and a hit needs
+the query's set to be exactly the same. Similarity only decides which
+wordings of one set may share an answer; it never merges different sets.
+
+Memory is bounded: SEMANTIC_CACHE_SIZE x SEMANTIC_CACHE_DIM float32 vectors,
+allocated on first use; a full cache evicts expired entries first, then the
+least recently used.
+"""
+import re
+import threading
+import time
+import zlib
+
+from . import metrics
+from .cache import age_band
+from .config import settings
+from .symptoms import VOCABULARY, symptom_index
+from .triage import NEGATIONS as TRIAGE_NEGATIONS
+
+SEMANTIC_CACHE_ENABLED = settings.semantic_cache_enabled
+SEMANTIC_CACHE_SIZE = settings.semantic_cache_size
+SEMANTIC_CACHE_DIM = settings.semantic_cache_dim
+SEMANTIC_CACHE_THRESHOLD = settings.semantic_cache_threshold
+SEMANTIC_CACHE_TTL = settings.semantic_cache_ttl
+
+STOP_WORDS = {"a", "an", "and", "the", "of", "in", "on", "my", "with", "i", "have", "having", "feel",
+              "feeling", "some", "bit", "little", "very", "also",
+              # when it started, not what it is
+              "since", "for", "ago", "today", "yesterday", "last", "night", "morning", "day", "days",
+              "week", "weeks"}
+NEGATIONS = set(TRIAGE_NEGATIONS)
+# Words that qualify a symptom without changing what it is; weighted down.
+# "severe" is deliberately not here: a severe headache triages differently
+MODIFIERS = {"high", "mild", "slight", "low", "bad", "constant", "frequent", "persistent"}
+MODIFIER_WEIGHT = 0.5
+# Share of a word's weight spread over its character trigrams (typo tolerance)
+CHAR_WEIGHT = 0.5
+
+_WORD_RE = re.compile(r"[a-z0-9']+")
+# Plural "s" on a word of four or more letters ("headaches", not "loss")
+_PLURAL_RE = re.compile(r"\b([a-z]{3,}[^s\W])s\b")
+
+lookup_seconds = metrics.Histogram(
+    "merocare_semantic_cache_lookup_seconds", "Time to embed a symptom set and search the semantic cache",
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05))
+
+
+def _stem(word):
+    for suffix in ("ing", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+    return word[:-1] if word.endswith("e") and len(word) > 3 else word
+
+
+def features(symptoms):
+    """{feature: weight} for a symptom set; the same for any order or repetition of the entries."""
+    out = {}
+    for text in symptoms:
+        negate = False
+        for word in _WORD_RE.findall(text.casefold()):
+            if word in NEGATIONS:
+                negate = True
+                continue
+            if word in STOP_WORDS:
+                continue
+            stem = _stem(word)
+            weight = MODIFIER_WEIGHT if word in MODIFIERS else 1.0
+            # "no fever" must not look like "fever"
+            token = f"no_{stem}" if negate else stem
+            out[f"w:{token}"] = max(out.get(f"w:{token}", 0), weight)
+            padded = f"#{token}#"
+            grams = [padded[i:i + 3] for i in range(len(padded) - 2)]
+            for gram in grams:
+                key = f"c:{gram}"
+                out[key] = max(out.get(key, 0), weight * CHAR_WEIGHT / len(grams))
+    return out
+
+
+def canonical(symptoms):
+    """
+    The set of symptoms as symptoms.normalize reads them: vocabulary names,
+    plus the cleaned text of anything it does not fully recognise (including
+    negated entries such as "no fever"), so free text still counts.
+    """
+    names = set()
+    for entry in symptoms:
+        found = symptom_index.normalize([entry])
+        if any(name not in VOCABULARY for name in found):
+            singular = symptom_index.normalize([_PLURAL_RE.sub(r"\1", entry.casefold())])
+            if all(name in VOCABULARY for name in singular):
+                found = singular
+        names.update(found)
+    return frozenset(names)
+
+
+def embed(symptoms, dim=SEMANTIC_CACHE_DIM):
+    """Unit-length hashed feature vector (signed hashing trick) for a symptom set."""
+    import numpy as np
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, weight in features(symptoms).items():
+        h = zlib.crc32(feature.encode())
+        vector[h % dim] += weight if h & 0x80000000 else -weight
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticCache:
+    """
+    Fixed-capacity vector index of cached answers. Slots are reused in place,
+    so memory never grows past `maxsize` vectors.
+    """
+
+    def __init__(self, maxsize=SEMANTIC_CACHE_SIZE, threshold=SEMANTIC_CACHE_THRESHOLD,
+                 ttl=SEMANTIC_CACHE_TTL, dim=SEMANTIC_CACHE_DIM):
+        self.maxsize = maxsize
+        self.threshold = threshold
+        self.ttl = ttl
+        self.dim = dim
+        self._lock = threading.Lock()
+        self._vectors = None    # allocated on first use so NumPy stays out of startup
+        self._groups = {}       # {(age band, gender): group id}
+        self._slots = {}        # {exact key: slot}
+        self._values = [None] * maxsize
+        self._keys = [None] * maxsize
+        self._symptoms = [frozenset()] * maxsize    # canonical symptoms per slot
+        self._used = 0          # slots ever filled (high-water mark)
+        self._tick = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookups = 0
+        self.lookup_seconds = 0.0
+
+    def _arrays(self):
+        if self._vectors is None:
+            import numpy as np
+            self._vectors = np.zeros((self.maxsize, self.dim), dtype=np.float32)
+            self._group_of = np.full(self.maxsize, -1, dtype=np.int32)
+            self._expires = np.zeros(self.maxsize)
+            self._last_used = np.zeros(self.maxsize, dtype=np.int64)
+        return self._vectors
+
+    def _group(self, age, gender, create=False):
+        group = (age_band(age), gender.strip().casefold())
+        if group not in self._groups and create:
+            self._groups[group] = len(self._groups)
+        return self._groups.get(group, -1)
+
+    def nearest(self, symptoms, age, gender, k=1):
+        """Up to `k` (similarity, exact key, value, canonical symptoms) for live entries in the same age band and gender, best first."""
+        import numpy as np
+        vectors = self._arrays()
+        query = embed(symptoms, self.dim)
+        with self._lock:
+            group = self._group(age, gender)
+            n = self._used
+            if group < 0 or n == 0:
+                return []
+            scores = vectors[:n] @ query
+            live = (self._group_of[:n] == group) & (self._expires[:n] > time.monotonic())
+            scores = np.where(live, scores, -np.inf)
+            k = min(k, n)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            found = [(float(scores[i]), self._keys[i], self._values[i], self._symptoms[i])
+                     for i in top if np.isfinite(scores[i])]
+            if found:
+                self._tick += 1
+                self._last_used[top[0]] = self._tick
+            return found
+
+    def get(self, symptoms, age, gender):
+        """
+        The cached value of the closest match at or above the threshold with
+        the same canonical symptom set, else None.
+        """
+        self._arrays()    # one-off allocation is not lookup time
+        started = time.perf_counter()
+        found = self.nearest(symptoms, age, gender, k=1)
+        hit = bool(found) and found[0][0] >= self.threshold and canonical(symptoms) == found[0][3]
+        elapsed = time.perf_counter() - started
+        lookup_seconds.observe(elapsed)
+        with self._lock:
+            self.lookups += 1
+            self.lookup_seconds += elapsed
+            if hit:
+                self.hits += 1
+                return found[0][2]
+            self.misses += 1
+        return None
+
+    def set(self, key, symptoms, age, gender, value):
+        vectors = self._arrays()
+        vector = embed(symptoms, self.dim)
+        if not vector.any():
+            return
+        names = canonical(symptoms)
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._free_slot()
+            self._slots[key] = slot
+            self._keys[slot] = key
+            self._values[slot] = value
+            self._symptoms[slot] = names
+            vectors[slot] = vector
+            self._group_of[slot] = self._group(age, gender, create=True)
+            self._expires[slot] = time.monotonic() + self.ttl
+            self._tick += 1
+            self._last_used[slot] = self._tick
+
+    def _free_slot(self):
+        if self._used < self.maxsize:
+            self._used += 1
+            return self._used - 1
+        # Full: reuse an expired slot if there is one, else the least recently used
+        expired = self._expires < time.monotonic()
+        slot = int(expired.argmax()) if expired.any() else int(self._last_used.argmin())
+        if not expired[slot]:
+            self.evictions += 1
+        del self._slots[self._keys[slot]]
+        return slot
+
+    def clear(self):
+        with self._lock:
+            self._slots.clear()
+            self._values = [None] * self.maxsize
+            self._keys = [None] * self.maxsize
+            self._symptoms = [frozenset()] * self.maxsize
+            self._used = 0
+
+    def __len__(self):
+        return len(self._slots)
+
+    def stats(self):
+        return {
+            "enabled": True,
+            "size": len(self._slots),
+            "maxsize": self.maxsize,
+            "threshold": self.threshold,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "avg_lookup_ms": round(self.lookup_seconds / self.lookups * 1000, 4) if self.lookups else 0.0,
+            "memory_bytes": self.maxsize * self.dim * 4,
+        }
+
+
+semantic_cache = SemanticCache() if SEMANTIC_CACHE_ENABLED else None
+
+if semantic_cache is not None:
+    metrics.Counter("merocare_semantic_cache_hits", "Symptom checks answered from a near-duplicate",
+                    function=lambda: semantic_cache.hits)
+    metrics.Counter("merocare_semantic_cache_misses", "Semantic cache lookups without a close enough match",
+                    function=lambda: semantic_cache.misses)
+    metrics.Counter("merocare_semantic_cache_evictions", "Live semantic cache entries evicted to make room",
+                    function=lambda: semantic_cache.evictions)
+    metrics.Gauge("merocare_semantic_cache_size", "Entries in the semantic cache",
+                  function=lambda: len(semantic_cache))
@@ -0,0 +1,59 @@
+import asyncio
+
+from .config import settings
+
+SINGLEFLIGHT_MAX_WAITERS = settings.singleflight_max_waiters
+
+
+class TooManyWaiters(Exception):
+    """Too many callers are already waiting on the same in-flight call."""
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is still running await that same task and receive its result,
+    or its exception. The key is dropped as soon as the task finishes, so
+    failures are never reused by later calls. A caller being cancelled
+    does not cancel the shared task for the others.
+    """
+
+    def __init__(self, max_waiters=SINGLEFLIGHT_MAX_WAITERS):
+        self.max_waiters = max_waiters
+        self._calls = {}  # {key: [task, waiter_count]}
+        self.executions = 0
+        self.shared = 0
+
+    async def do(self, key, fn):
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = self._calls[key] = [task, 0]
+            task.add_done_callback(lambda _t, key=key, call=call: self._forget(key, call))
+            self.executions += 1
+        else:
+            if call[1] >= self.max_waiters:
+                raise TooManyWaiters(f"Too many identical requests in flight for {key!r}")
+            self.shared += 1
+
+        call[1] += 1
+        try:
+            return await asyncio.shield(call[0])
+        finally:
+            call[1] -= 1
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Nobody is left to retrieve a failure; mark it seen so asyncio
+        # does not log "exception was never retrieved"
+        if not call[0].cancelled():
+            call[0].exception()
+
+    def in_flight(self):
+        return len(self._calls)
+
+    def stats(self):
+        return {"in_flight": len(self._calls), "executions": self.executions, "shared": self.shared}
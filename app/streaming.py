@@ -0,0 +1,44 @@
+import json
+import re
+
+STREAMED_FIELDS = ("predicted_disease", "urgency", "suggested_treatment")
+
+# A complete "key": "value" pair; the value ends at the first unescaped quote
+_FIELD_RE = re.compile(r'"(%s)"\s*:\s*"((?:[^"\\]|\\.)*)"' % "|".join(STREAMED_FIELDS))
+
+
+class DiagnosisFieldParser:
+    """
+    Pull diagnosis fields out of a JSON object while it is still being
+    generated. Feed it text deltas; each call returns the (name, value)
+    pairs whose string value was closed by that delta.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields = {}
+        self._scan_from = 0
+
+    def feed(self, text: str):
+        self.buffer += text
+        if len(self.fields) == len(STREAMED_FIELDS) or '"' not in text:
+            return []
+
+        completed = []
+        for match in _FIELD_RE.finditer(self.buffer, self._scan_from):
+            name = match.group(1)
+            if name in self.fields:
+                continue
+            try:
+                value = json.loads(f'"{match.group(2)}"')
+            except ValueError:
+                value = match.group(2)
+            self.fields[name] = value
+            completed.append((name, value))
+            self._scan_from = match.end()
+        return completed
+
+
+def sse_event(event: str, data) -> str:
+    """Format one Server-Sent Event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,236 @@
+"""
+Canonical symptom vocabulary, typeahead and normalization.
+
+VOCABULARY maps each canonical symptom name to the other ways people write
+it (including common romanized Nepali). It is shared by the typeahead
+endpoint, the normalizer that canonicalizes symptom checks before the
+prompt and cache key are built, and the offline triage engine.
+
+The typeahead is a character trie over every name and synonym, plus every
+word-start inside them ("pain" finds "chest pain"). Each node stores its best
+completions precomputed, so a lookup is one walk down the prefix.
+"""
+import re
+from typing import List, Optional
+
+# Suggestions precomputed per trie node; the endpoint can ask for fewer
+MAX_SUGGESTIONS = 20
+
+VOCABULARY = {
+    "abdominal pain": ("stomach ache", "stomach pain", "tummy ache", "belly pain", "pet dukhne"),
+    "anxiety": ("nervousness", "feeling anxious", "worry"),
+    "arm pain": ("left arm pain", "pain in arm"),
+    "back pain": ("backache", "lower back pain"),
+    "barking cough": ("croupy cough",),
+    "bleeding": ("unexplained bleeding", "bleeding gums"),
+    "blisters": ("blister", "fluid filled spots"),
+    "bloating": ("bloated", "gas", "flatulence"),
+    "blood in stool": ("bloody stool", "black stool"),
+    "blood in urine": ("bloody urine", "red urine"),
+    "blurred vision": ("blurry vision", "vision problems"),
+    "body aches": ("body ache", "body pain", "aching body"),
+    "burning urination": ("painful urination", "burning while urinating", "burning pee"),
+    "chest pain": ("chest ache", "pain in chest"),
+    "chest tightness": ("tight chest", "chest pressure"),
+    "chills": ("shivering", "rigors"),
+    "cloudy urine": ("murky urine",),
+    "cold hands": ("cold feet", "cold hands and feet"),
+    "confusion": ("confused", "disoriented", "disorientation"),
+    "constipation": ("constipated", "hard stool"),
+    "cough": ("coughing", "khoki"),
+    "coughing blood": ("blood in cough", "hemoptysis"),
+    "dark urine": ("brown urine",),
+    "dehydration": ("dehydrated",),
+    "diarrhea": ("diarrhoea", "loose motion", "loose motions", "loose stools", "watery stool", "pakhala"),
+    "difficulty breathing": ("trouble breathing", "can't breathe", "breathing difficulty", "laboured breathing"),
+    "difficulty swallowing": ("painful swallowing", "trouble swallowing"),
+    "dizziness": ("dizzy", "lightheaded", "vertigo", "giddiness"),
+    "dry cough": ("tickly cough",),
+    "dry mouth": ("parched mouth",),
+    "ear pain": ("earache", "ear ache"),
+    "excessive thirst": ("very thirsty", "always thirsty"),
+    "eye discharge": ("sticky eyes", "pus from eye"),
+    "facial drooping": ("face drooping", "drooping face"),
+    "facial pain": ("face pain", "sinus pain"),
+    "fainting": ("fainted", "blackout"),
+    "fatigue": ("tiredness", "tired", "exhaustion", "exhausted", "lethargy"),
+    "fever": ("temperature", "feverish", "pyrexia", "jwaro"),
+    "flank pain": ("side pain", "kidney pain"),
+    "frequent urination": ("peeing often", "urinating often", "polyuria"),
+    "hair loss": ("losing hair",),
+    "headache": ("head ache", "head pain", "tauko dukhne"),
+    "hearing loss": ("can't hear", "muffled hearing"),
+    "heartburn": ("acidity", "acid reflux", "reflux"),
+    "high fever": ("high temperature",),
+    "hives": ("urticaria", "welts"),
+    "insomnia": ("can't sleep", "sleeplessness", "trouble sleeping"),
+    "itching": ("itchy", "itchiness", "pruritus"),
+    "jaundice": ("yellow eyes", "yellow skin", "yellowing"),
+    "jaw pain": ("pain in jaw",),
+    "joint pain": ("joint aches", "aching joints", "arthralgia"),
+    "knee pain": ("sore knee",),
+    "leg pain": ("sore legs", "pain in legs"),
+    "loss of appetite": ("not hungry", "poor appetite", "no appetite"),
+    "loss of smell": ("can't smell", "anosmia", "loss of smell and taste"),
+    "loss of taste": ("can't taste",),
+    "lower abdominal pain": ("lower stomach pain", "pelvic pain", "period pain"),
+    "lower right abdominal pain": ("right lower abdominal pain", "pain in lower right abdomen"),
+    "mouth ulcers": ("mouth sores", "canker sores"),
+    "muscle pain": ("muscle aches", "myalgia", "sore muscles"),
+    "nasal congestion": ("blocked nose", "stuffy nose", "congestion"),
+    "nausea": ("nauseous", "feeling sick", "queasy"),
+    "neck pain": ("sore neck",),
+    "numbness": ("numb", "pins and needles", "tingling"),
+    "pain behind the eyes": ("eye pain", "retro-orbital pain"),
+    "pale skin": ("pale", "pallor"),
+    "palpitations": ("racing heart", "heart pounding", "fast heartbeat"),
+    "productive cough": ("wet cough", "cough with phlegm", "phlegm", "mucus"),
+    "rash": ("skin rash", "spots", "red spots"),
+    "red eyes": ("pink eye", "bloodshot eyes"),
+    "runny nose": ("running nose", "rhinorrhea", "rugha"),
+    "seizure": ("fits", "convulsions", "fit"),
+    "sensitivity to light": ("light sensitivity", "photophobia"),
+    "severe bleeding": ("heavy bleeding",),
+    "severe headache": ("migraine", "worst headache", "splitting headache"),
+    "shortness of breath": ("breathlessness", "short of breath", "breathless", "out of breath"),
+    "slurred speech": ("difficulty speaking", "trouble speaking"),
+    "sneezing": ("sneeze", "sneezes"),
+    "sore throat": ("throat pain", "scratchy throat", "throat ache"),
+    "stiff neck": ("neck stiffness",),
+    "sweating": ("sweats", "night sweats", "cold sweat"),
+    "swelling of the face": ("face swelling", "swollen face", "swollen lips", "swollen tongue"),
+    "swollen glands": ("swollen lymph nodes", "swollen neck glands"),
+    "toothache": ("tooth pain",),
+    "trembling": ("shaking", "tremor", "shaky"),
+    "unconsciousness": ("unconscious", "passed out", "unresponsive"),
+    "upper abdominal pain": ("upper stomach pain", "epigastric pain"),
+    "vomiting": ("vomit", "throwing up", "being sick", "banta"),
+    "watery eyes": ("teary eyes", "tearing"),
+    "weakness": ("weak", "feeling weak"),
+    "weakness on one side": ("one sided weakness", "weakness in one arm"),
+    "weight loss": ("losing weight", "lost weight"),
+    "wheezing": ("wheeze", "whistling breath"),
+}
+
+# {synonym: canonical name}
+ALIASES = {synonym: canonical for canonical, synonyms in VOCABULARY.items() for synonym in synonyms}
+
+# Words that can surround a symptom without adding to it ("i have fever since 2 days")
+FILLER_WORDS = {"a", "an", "the", "my", "i", "im", "i'm", "have", "having", "has", "got", "feel", "feeling",
+                "some", "bit", "little", "very", "also", "since", "for", "ago", "today", "yesterday",
+                "last", "night", "morning", "day", "days", "week", "weeks", "mild"}
+
+# Separators between symptoms inside one entry; a whole-entry match is tried first
+# so names like "loss of smell and taste" are not split
+_SPLIT_RE = re.compile(r"[,;/+&]|\band\b|\bwith\b")
+
+
+def clean(text: str) -> str:
+    """Case-folded, punctuation stripped, single spaces: the form every lookup uses."""
+    return " ".join(re.sub(r"[^a-z0-9']+", " ", text.casefold()).split())
+
+
+class _Node:
+    __slots__ = ("children", "entries", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.entries = []    # (rank, canonical, matched term) for keys ending here
+        self.top = []        # best completions below this node, one per canonical name
+
+
+class SymptomIndex:
+    def __init__(self, vocabulary=VOCABULARY, max_suggestions=MAX_SUGGESTIONS):
+        self.max_suggestions = max_suggestions
+        self.terms = {}    # {cleaned name or synonym: canonical name}
+        for canonical, synonyms in vocabulary.items():
+            self.terms[clean(canonical)] = canonical
+            for synonym in synonyms:
+                self.terms.setdefault(clean(synonym), canonical)
+
+        self._root = _Node()
+        for term, canonical in self.terms.items():
+            words = term.split(" ")
+            for start in range(len(words)):
+                # Rank: whole-name prefix before word-inside match, canonical before
+                # synonym, then shorter and alphabetical
+                rank = (start > 0, term != canonical, len(term), term)
+                self._insert(" ".join(words[start:]), (rank, canonical, term))
+        self._fill_top(self._root)
+
+        # Longest first, so "severe headache" wins over "headache" in free text
+        names = sorted(self.terms, key=len, reverse=True)
+        self._pattern = re.compile(r"(?<![a-z0-9'])(%s)(?![a-z0-9'])" % "|".join(re.escape(n) for n in names))
+
+    def _insert(self, key, entry):
+        node = self._root
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+        node.entries.append(entry)
+
+    def _fill_top(self, root):
+        # Children before parents, without recursion
+        order, stack = [], [root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+        for node in reversed(order):
+            candidates = list(node.entries)
+            for child in node.children.values():
+                candidates.extend(child.top)
+            seen = set()
+            node.top = []
+            for entry in sorted(candidates):
+                if entry[1] not in seen:
+                    seen.add(entry[1])
+                    node.top.append(entry)
+                    if len(node.top) == self.max_suggestions:
+                        break
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        """Up to `limit` canonical symptoms whose name, synonym, or a word in either starts with `prefix`."""
+        node = self._root
+        for char in clean(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [{"symptom": canonical, "matched": term} for _, canonical, term in node.top[:limit]]
+
+    def canonical(self, text: str) -> Optional[str]:
+        return self.terms.get(clean(text))
+
+    def normalize(self, symptoms: List[str]) -> List[str]:
+        """
+        Canonical names for free-text symptom entries, de-duplicated, in the
+        order given. An entry may hold several symptoms ("fever and coughing").
+        Text that is not fully recognised is kept in its cleaned form rather
+        than dropped, so nothing the user wrote is lost.
+        """
+        out = []
+        for entry in symptoms:
+            whole = self.canonical(entry)
+            parts = [entry] if whole else _SPLIT_RE.split(entry.casefold())
+            for part in parts:
+                part = clean(part)
+                if not part:
+                    continue
+                names = [self.terms[part]] if part in self.terms else self._match(part)
+                for name in names:
+                    if name not in out:
+                        out.append(name)
+        return out
+
+    def _match(self, text):
+        found = self._pattern.findall(text)
+        leftover = self._pattern.sub(" ", text).split()
+        if found and all(word in FILLER_WORDS or word.isdigit() for word in leftover):
+            return [self.terms[term] for term in found]
+        return [text]
+
+
+symptom_index = SymptomIndex()
+
+
+def normalize_symptoms(symptoms: List[str]) -> List[str]:
+    return symptom_index.normalize(symptoms)
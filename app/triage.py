@@ -0,0 +1,377 @@
+"""
+Offline symptom triage: answers a symptom check in-process, without Groq.
+
+Each condition is a row of weights over a fixed symptom list; a check is
+scored as the cosine similarity between its symptoms and every row at once
+(NumPy), after masking out conditions that do not fit the age or gender.
+Urgency is the top condition's level, raised by URGENCY_RULES (red-flag
+symptoms and combinations) whichever condition wins.
+
+This is a coarse safety net for when the AI is slow or down, not a
+replacement for it: answers say they came from the offline engine.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from .symptoms import ALIASES
+from .utils import URGENCY_LEVELS
+
+EMERGENCY_ADVICE = "Call an ambulance (102) or go to the nearest emergency department now."
+# Put in front of the treatment when a rule raises urgency above the condition's own level
+ADVICE = {
+    "URGENT": "See a doctor today.",
+    "EMERGENCY": EMERGENCY_ADVICE,
+}
+
+# A symptom after one of these words, in the same clause, is reported absent:
+# "no chest pain", "denies shortness of breath", "fever without a stiff neck"
+NEGATIONS = ("no", "not", "without", "denies", "denied", "deny", "never")
+# A negation stops at punctuation or a joining word ("no fever, but chest pain")
+_CLAUSE_BREAK_RE = re.compile(r"[,;.!?]|\b(?:but|and|with|though|although|however|except)\b")
+_NEGATION_RE = re.compile(r"\b(?:%s)\b|n't\b" % "|".join(NEGATIONS))
+
+# Below this similarity the top condition is only a guess: its urgency and
+# name are not used, and the answer falls back to "see a doctor"
+MIN_CONFIDENCE = 0.3
+
+# (condition, urgency, treatment, {symptom: weight}, (min age, max age), gender or None)
+CONDITIONS = [
+    ("Common Cold", "ROUTINE", "Rest, drink warm fluids, use saline nasal drops and take paracetamol for discomfort.",
+     {"runny nose": 1, "nasal congestion": .9, "sneezing": .9, "sore throat": .7, "cough": .5,
+      "headache": .3, "fatigue": .3, "fever": .2}, (0, 120), None),
+    ("Influenza", "ROUTINE", "Rest, plenty of fluids and paracetamol for fever and aches. See a doctor if "
+     "breathing becomes difficult or the fever lasts more than 3 days.",
+     {"fever": 1, "body aches": 1, "chills": .8, "high fever": .8, "fatigue": .8, "dry cough": .7,
+      "muscle pain": .7, "headache": .6, "cough": .6, "sore throat": .4}, (0, 120), None),
+    ("COVID-19", "ROUTINE", "Isolate, rest, drink fluids and take paracetamol for fever. Get tested and watch "
+     "for shortness of breath.",
+     {"loss of smell": 1, "loss of taste": 1, "dry cough": .8, "fever": .7, "fatigue": .7, "cough": .6,
+      "shortness of breath": .5, "body aches": .5, "sore throat": .4, "headache": .4}, (0, 120), None),
+    ("Strep Throat", "ROUTINE", "See a doctor for a throat swab; antibiotics are needed if it is confirmed. "
+     "Warm salt-water gargles and paracetamol ease the pain.",
+     {"sore throat": 1, "difficulty swallowing": .8, "swollen glands": .8, "fever": .7, "headache": .3},
+     (0, 120), None),
+    ("Sinusitis", "ROUTINE", "Steam inhalation, saline nasal rinses and paracetamol. See a doctor if it lasts "
+     "more than 10 days.",
+     {"facial pain": 1, "nasal congestion": .9, "headache": .6, "runny nose": .5, "cough": .3, "fever": .3},
+     (0, 120), None),
+    ("Allergic Rhinitis", "ROUTINE", "Avoid the trigger; an over-the-counter antihistamine usually helps.",
+     {"sneezing": 1, "watery eyes": .9, "runny nose": .8, "nasal congestion": .6, "itching": .5,
+      "red eyes": .4}, (0, 120), None),
+    ("Asthma Attack", "URGENT", "Use your reliever inhaler, sit upright and stay calm. Get emergency help if "
+     "it does not improve within minutes.",
+     {"wheezing": 1, "shortness of breath": .9, "chest tightness": .9, "cough": .6, "difficulty breathing": .6},
+     (0, 120), None),
+    ("Pneumonia", "URGENT", "See a doctor today; antibiotics may be needed. Rest and drink plenty of fluids.",
+     {"productive cough": 1, "shortness of breath": .8, "fever": .7, "high fever": .6, "chills": .6,
+      "cough": .6, "chest pain": .5, "difficulty breathing": .5, "fatigue": .4}, (0, 120), None),
+    ("Heart Attack", "EMERGENCY", EMERGENCY_ADVICE + " Chew an aspirin if you are not allergic.",
+     {"chest pain": 1, "arm pain": 1, "chest tightness": .8, "sweating": .7, "jaw pain": .6,
+      "shortness of breath": .6, "nausea": .4, "dizziness": .4}, (25, 120), None),
+    ("Stroke", "EMERGENCY", EMERGENCY_ADVICE + " Note the time the symptoms started.",
+     {"weakness on one side": 1, "facial drooping": 1, "slurred speech": 1, "confusion": .6, "numbness": .6,
+      "severe headache": .4, "blurred vision": .4, "dizziness": .3}, (0, 120), None),
+    ("Meningitis", "EMERGENCY", EMERGENCY_ADVICE,
+     {"stiff neck": 1, "severe headache": .9, "sensitivity to light": .8, "fever": .7, "high fever": .6,
+      "headache": .5, "confusion": .5, "vomiting": .4, "rash": .3}, (0, 120), None),
+    ("Migraine", "ROUTINE", "Rest in a dark, quiet room, drink water and take a painkiller early.",
+     {"severe headache": 1, "headache": .8, "sensitivity to light": .8, "nausea": .6, "blurred vision": .4,
+      "vomiting": .3, "dizziness": .3}, (0, 120), None),
+    ("Tension Headache", "ROUTINE", "Rest, drink water, take paracetamol and relax the neck and shoulders.",
+     {"headache": 1, "neck pain": .6, "fatigue": .3}, (0, 120), None),
+    ("Gastroenteritis", "ROUTINE", "Drink oral rehydration solution (ORS) in small, frequent sips and eat light "
+     "food. See a doctor if you cannot keep fluids down.",
+     {"diarrhea": 1, "vomiting": .8, "nausea": .8, "abdominal pain": .6, "fever": .4, "dehydration": .4,
+      "loss of appetite": .3}, (0, 120), None),
+    ("Typhoid Fever", "URGENT", "See a doctor today for a blood test; typhoid needs antibiotics. Drink plenty "
+     "of fluids.",
+     {"high fever": .9, "fever": .7, "abdominal pain": .6, "fatigue": .6, "loss of appetite": .6,
+      "headache": .5, "constipation": .5, "diarrhea": .3}, (0, 120), None),
+    ("Dengue Fever", "URGENT", "See a doctor today for a blood test. Take paracetamol only (no ibuprofen or "
+     "aspirin) and drink plenty of fluids.",
+     {"high fever": 1, "pain behind the eyes": 1, "joint pain": .8, "muscle pain": .7, "fever": .6,
+      "severe headache": .6, "rash": .6, "nausea": .4, "bleeding": .4}, (0, 120), None),
+    ("Malaria", "URGENT", "See a doctor today for a blood test; malaria needs prompt treatment.",
+     {"chills": 1, "fever": .8, "sweating": .8, "high fever": .6, "headache": .5, "body aches": .5,
+      "fatigue": .4, "nausea": .4, "vomiting": .3}, (0, 120), None),
+    ("Appendicitis", "EMERGENCY", "Go to the emergency department now. Do not eat, drink or take painkillers "
+     "until a doctor has seen you.",
+     {"lower right abdominal pain": 1, "abdominal pain": .6, "nausea": .6, "loss of appetite": .6,
+      "vomiting": .5, "fever": .4}, (0, 120), None),
+    ("Gastritis", "ROUTINE", "Eat small meals, avoid spicy food, alcohol and painkillers like ibuprofen; an "
+     "antacid can help.",
+     {"heartburn": 1, "upper abdominal pain": .8, "bloating": .6, "nausea": .5, "loss of appetite": .3},
+     (0, 120), None),
+    ("Urinary Tract Infection", "ROUTINE", "Drink plenty of water and see a doctor for a urine test; "
+     "antibiotics are usually needed.",
+     {"burning urination": 1, "frequent urination": .9, "cloudy urine": .6, "lower abdominal pain": .6,
+      "blood in urine": .5, "fever": .2}, (0, 120), None),
+    ("Kidney Stones", "URGENT", "See a doctor today. Drink plenty of water; painkillers can ease the pain.",
+     {"flank pain": 1, "blood in urine": .7, "nausea": .4, "vomiting": .4, "frequent urination": .3,
+      "burning urination": .3}, (0, 120), None),
+    ("Hepatitis", "URGENT", "See a doctor for liver tests. Rest, avoid alcohol and do not take paracetamol "
+     "without advice.",
+     {"jaundice": 1, "dark urine": .8, "fatigue": .6, "loss of appetite": .6, "nausea": .5,
+      "abdominal pain": .4, "upper abdominal pain": .4, "fever": .3}, (0, 120), None),
+    ("High Blood Sugar (Diabetes)", "ROUTINE", "See a doctor for a blood sugar test.",
+     {"excessive thirst": 1, "frequent urination": .8, "weight loss": .6, "fatigue": .5, "blurred vision": .5},
+     (0, 120), None),
+    ("Anaphylaxis", "EMERGENCY", EMERGENCY_ADVICE + " Use an adrenaline auto-injector if one is available.",
+     {"swelling of the face": 1, "difficulty breathing": .9, "hives": .8, "wheezing": .5, "itching": .5,
+      "rash": .4, "dizziness": .4}, (0, 120), None),
+    ("Allergic Skin Reaction", "ROUTINE", "Avoid the trigger and take an antihistamine; a cool compress eases "
+     "itching.",
+     {"hives": 1, "itching": 1, "rash": .8}, (0, 120), None),
+    ("Ear Infection", "ROUTINE", "Paracetamol for pain and fever; see a doctor if it lasts more than 2 days.",
+     {"ear pain": 1, "hearing loss": .6, "fever": .5}, (0, 120), None),
+    ("Conjunctivitis", "ROUTINE", "Clean the eyes with cooled boiled water, do not share towels, and see a "
+     "doctor if vision changes.",
+     {"red eyes": 1, "eye discharge": 1, "watery eyes": .7, "itching": .6}, (0, 120), None),
+    ("Dehydration", "ROUTINE", "Drink oral rehydration solution (ORS) or water in frequent sips and rest in a "
+     "cool place.",
+     {"dehydration": 1, "dry mouth": .9, "excessive thirst": .7, "dark urine": .6, "dizziness": .6,
+      "fatigue": .5}, (0, 120), None),
+    ("Anemia", "ROUTINE", "See a doctor for a blood test; iron-rich food helps if iron is low.",
+     {"pale skin": 1, "fatigue": .8, "weakness": .6, "dizziness": .6, "cold hands": .5,
+      "shortness of breath": .4}, (0, 120), None),
+    ("Panic Attack", "ROUTINE", "Sit down and breathe slowly; it usually passes within minutes. Seek help if "
+     "chest pain does not go away.",
+     {"palpitations": 1, "trembling": .8, "shortness of breath": .6, "sweating": .6, "chest tightness": .5,
+      "dizziness": .5}, (0, 120), None),
+    ("Back Strain", "ROUTINE", "Keep gently active, use a warm compress and take a painkiller if needed.",
+     {"back pain": 1, "muscle pain": .4}, (0, 120), None),
+    ("Chickenpox", "ROUTINE", "Rest, keep nails short, use calamine lotion for itching and paracetamol for "
+     "fever. Stay away from pregnant women and newborns.",
+     {"blisters": 1, "rash": .9, "itching": .8, "fever": .6, "fatigue": .3}, (0, 120), None),
+    ("Croup", "URGENT", "Keep the child calm and upright; cool or humid air can help. See a doctor today.",
+     {"barking cough": 1, "difficulty breathing": .5, "fever": .4, "runny nose": .3}, (0, 10), None),
+    ("Menstrual Cramps", "ROUTINE", "A warm compress on the lower abdomen and a painkiller such as ibuprofen.",
+     {"lower abdominal pain": 1, "back pain": .4, "nausea": .3}, (10, 55), "female"),
+]
+
+# (symptoms that must all be present, (min age, max age), urgency, reason)
+URGENCY_RULES = [
+    (("difficulty breathing",), (0, 120), "EMERGENCY", "difficulty breathing"),
+    (("unconsciousness",), (0, 120), "EMERGENCY", "loss of consciousness"),
+    (("seizure",), (0, 120), "EMERGENCY", "a seizure"),
+    (("severe bleeding",), (0, 120), "EMERGENCY", "severe bleeding"),
+    (("coughing blood",), (0, 120), "EMERGENCY", "coughing up blood"),
+    (("weakness on one side",), (0, 120), "EMERGENCY", "possible stroke signs"),
+    (("facial drooping",), (0, 120), "EMERGENCY", "possible stroke signs"),
+    (("slurred speech",), (0, 120), "EMERGENCY", "possible stroke signs"),
+    (("swelling of the face",), (0, 120), "EMERGENCY", "facial swelling"),
+    (("chest pain", "shortness of breath"), (0, 120), "EMERGENCY", "chest pain with shortness of breath"),
+    (("chest pain", "sweating"), (0, 120), "EMERGENCY", "chest pain with sweating"),
+    (("fever", "stiff neck"), (0, 120), "EMERGENCY", "fever with a stiff neck"),
+    (("severe headache", "stiff neck"), (0, 120), "EMERGENCY", "severe headache with a stiff neck"),
+    (("fever",), (0, 0), "EMERGENCY", "fever in a baby under 1 year"),
+    (("high fever",), (0, 0), "EMERGENCY", "fever in a baby under 1 year"),
+    (("chest pain",), (0, 120), "URGENT", "chest pain"),
+    (("confusion",), (0, 120), "URGENT", "confusion"),
+    (("fainting",), (0, 120), "URGENT", "fainting"),
+    (("severe headache",), (0, 120), "URGENT", "a severe headache"),
+    (("blood in urine",), (0, 120), "URGENT", "blood in the urine"),
+    (("jaundice",), (0, 120), "URGENT", "yellowing of the skin or eyes"),
+    (("bleeding",), (0, 120), "URGENT", "unexplained bleeding"),
+    (("high fever",), (0, 4), "URGENT", "high fever in a young child"),
+    (("high fever",), (65, 120), "URGENT", "high fever at 65 or over"),
+    (("fever",), (65, 120), "URGENT", "fever at 65 or over"),
+    (("vomiting", "diarrhea"), (0, 4), "URGENT", "vomiting and diarrhoea in a young child"),
+    (("vomiting", "diarrhea"), (65, 120), "URGENT", "vomiting and diarrhoea at 65 or over"),
+    (("dehydration",), (0, 4), "URGENT", "dehydration in a young child"),
+]
+
+
+def normalize_symptom(text: str) -> str:
+    return re.sub(r"\s+", " ", text.strip().casefold())
+
+
+@dataclass
+class TriageResult:
+    condition: str
+    score: float
+    urgency: str
+    treatment: str
+    ranked: List[Tuple[str, float]]          # best conditions first, with their scores
+    matched: List[str]                       # recognised symptoms
+    unknown: List[str] = field(default_factory=list)
+    absent: List[str] = field(default_factory=list)     # recognised but negated ("no chest pain")
+    reasons: List[str] = field(default_factory=list)    # why urgency was raised
+
+    def fields(self) -> dict:
+        """The same fields an AI reply is turned into, for building a schemas.Diagnosis."""
+        return {
+            "predicted_disease": self.condition,
+            "suggested_treatment": self.treatment,
+            "urgency": self.urgency,
+            "full_response": self.explanation(),
+            "source": "local",
+        }
+
+    def explanation(self) -> str:
+        lines = ["Offline triage (the AI service was not used)."]
+        if self.matched:
+            lines.append(f"Recognised symptoms: {', '.join(self.matched)}.")
+        if self.absent:
+            lines.append(f"Reported absent: {', '.join(self.absent)}.")
+        if self.unknown:
+            lines.append(f"Not recognised: {', '.join(self.unknown)}.")
+        others = [name for name, score in self.ranked[1:3] if score > 0]
+        if self.score >= MIN_CONFIDENCE:
+            lines.append(f"Most consistent with {self.condition} (match {self.score:.2f}).")
+            if others:
+                lines.append(f"Other possibilities: {', '.join(others)}.")
+        else:
+            lines.append("No condition matched these symptoms well.")
+        if self.reasons:
+            lines.append(f"Marked {self.urgency} because of {'; '.join(self.reasons)}.")
+        lines.append("This is an automated estimate, not a diagnosis. Consult a healthcare professional.")
+        return " ".join(lines)
+
+
+class TriageEngine:
+    """Condition and rule tables compiled into NumPy arrays; score many checks in one call."""
+
+    def __init__(self, conditions=CONDITIONS, rules=URGENCY_RULES, aliases=ALIASES):
+        import numpy as np
+        self.np = np
+
+        symptoms = sorted({s for c in conditions for s in c[3]} | {s for r in rules for s in r[0]})
+        self.symptoms = symptoms
+        self.index = {name: i for i, name in enumerate(symptoms)}
+        self.aliases = {normalize_symptom(k): v for k, v in aliases.items()}
+        # Longest names first, so "severe headache" wins over "headache" inside free text
+        names = sorted(list(self.index) + list(self.aliases), key=len, reverse=True)
+        self._pattern = re.compile(r"\b(%s)\b" % "|".join(re.escape(name) for name in names))
+
+        self.conditions = [c[0] for c in conditions]
+        self.treatments = [c[2] for c in conditions]
+        self.condition_urgency = np.array([URGENCY_LEVELS.index(c[1]) for c in conditions])
+        self.weights = np.zeros((len(conditions), len(symptoms)), dtype=np.float32)
+        for row, condition in enumerate(conditions):
+            for name, weight in condition[3].items():
+                self.weights[row, self.index[name]] = weight
+        self.norms = np.linalg.norm(self.weights, axis=1)
+        self.min_age = np.array([c[4][0] for c in conditions])
+        self.max_age = np.array([c[4][1] for c in conditions])
+        self.gender = np.array([c[5] or "" for c in conditions])
+
+        self.rule_required = np.zeros((len(rules), len(symptoms)), dtype=np.float32)
+        for row, rule in enumerate(rules):
+            for name in rule[0]:
+                self.rule_required[row, self.index[name]] = 1
+        self.rule_sizes = self.rule_required.sum(axis=1)
+        self.rule_min_age = np.array([r[1][0] for r in rules])
+        self.rule_max_age = np.array([r[1][1] for r in rules])
+        self.rule_urgency = np.array([URGENCY_LEVELS.index(r[2]) for r in rules])
+        self.rule_reasons = [r[3] for r in rules]
+
+    def parse(self, text):
+        """
+        (present, absent) symptom names in one free-text entry: "severe headache
+        and fever" -> both present, "no chest pain, but sweating" -> sweating
+        present and chest pain absent.
+        """
+        text = normalize_symptom(text)
+        if text in self.index:
+            return [text], []
+        present, absent = [], []
+        start = 0
+        for clause_end in [m.start() for m in _CLAUSE_BREAK_RE.finditer(text)] + [len(text)]:
+            clause = text[start:clause_end]
+            negation = _NEGATION_RE.search(clause)
+            for m in self._pattern.finditer(clause):
+                name = self.aliases.get(m.group(1), m.group(1))
+                (absent if negation and negation.start() < m.start() else present).append(name)
+            start = clause_end
+        return present, absent
+
+    def match(self, text):
+        """Symptom names present in one free-text entry; negated ones are left out."""
+        return self.parse(text)[0]
+
+    def vectorize(self, symptoms):
+        """(binary symptom vector, matched names, unrecognised entries, names reported absent)."""
+        vector = self.np.zeros(len(self.symptoms), dtype=self.np.float32)
+        matched, unknown, absent = [], [], []
+        for text in symptoms:
+            names, negated = self.parse(text)
+            if not names and not negated and text.strip():
+                unknown.append(text.strip())
+            for name in names:
+                if not vector[self.index[name]]:
+                    vector[self.index[name]] = 1
+                    matched.append(name)
+            absent.extend(name for name in negated if name not in absent)
+        # Reported both ways ("chest pain", "no chest pain"): keep it, the safer reading
+        return vector, matched, unknown, [name for name in absent if name not in matched]
+
+    def score(self, vectors, ages, genders):
+        """Cosine similarity of each check (row of `vectors`) to every condition, 0 where age/gender rule it out."""
+        np = self.np
+        ages = np.asarray(ages)[:, None]
+        genders = np.array([g.strip().casefold() for g in genders])[:, None]
+        lengths = np.sqrt(vectors.sum(axis=1, keepdims=True))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scores = (vectors @ self.weights.T) / (lengths * self.norms)
+        allowed = (ages >= self.min_age) & (ages <= self.max_age) & ((self.gender == "") | (self.gender == genders))
+        return np.where(allowed & np.isfinite(scores), scores, 0)
+
+    def rule_urgency_for(self, vectors, ages):
+        """(highest urgency index raised by the rules, mask of fired rules) per check."""
+        np = self.np
+        ages = np.asarray(ages)[:, None]
+        fired = ((vectors @ self.rule_required.T) >= self.rule_sizes) \
+            & (ages >= self.rule_min_age) & (ages <= self.rule_max_age)
+        return np.where(fired, self.rule_urgency, 0).max(axis=1, initial=0), fired
+
+    def assess_many(self, checks):
+        """Triage a list of (symptoms, age, gender) in one vectorised pass."""
+        np = self.np
+        encoded = [self.vectorize(symptoms) for symptoms, _, _ in checks]
+        vectors = np.stack([vector for vector, _, _, _ in encoded]) if encoded \
+            else np.zeros((0, len(self.symptoms)), dtype=np.float32)
+        ages = [age for _, age, _ in checks]
+        scores = self.score(vectors, ages, [gender for _, _, gender in checks])
+        rule_levels, fired = self.rule_urgency_for(vectors, ages)
+
+        results = []
+        for i, (_, matched, unknown, absent) in enumerate(encoded):
+            order = np.argsort(-scores[i], kind="stable")
+            best = int(order[0])
+            confident = scores[i, best] >= MIN_CONFIDENCE
+            own_level = int(self.condition_urgency[best]) if confident else 0
+            level = max(own_level, int(rule_levels[i]))
+            urgency = URGENCY_LEVELS[level]
+            treatment = self.treatments[best] if confident else "Consult a healthcare professional about these symptoms."
+            if level > own_level:
+                treatment = f"{ADVICE[urgency]} {treatment}"
+            results.append(TriageResult(
+                condition=self.conditions[best] if confident else "Unknown",
+                score=round(float(scores[i, best]), 3),
+                urgency=urgency,
+                treatment=treatment,
+                ranked=[(self.conditions[j], round(float(scores[i, j]), 3)) for j in order[:5]],
+                matched=matched,
+                unknown=unknown,
+                absent=absent,
+                reasons=list(dict.fromkeys(
+                    self.rule_reasons[r] for r in np.flatnonzero(fired[i]) if self.rule_urgency[r] == level
+                )),
+            ))
+        return results
+
+    def assess(self, symptoms, age, gender) -> TriageResult:
+        return self.assess_many([(symptoms, age, gender)])[0]
+
+
+_engine = None
+
+
+def get_triage_engine():
+    """The shared engine, built on first use so NumPy stays out of worker startup"""
+    global _engine
+    if _engine is None:
+        _engine = TriageEngine()
+    return _engine
@@ -1,6 +1,44 @@
-from passlib.context import CryptContext
+import asyncio
+import base64
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from fastapi import HTTPException
+from . import metrics
+from .config import settings
 
-pwd_context=CryptContext(schemes=["bcrypt"],deprecated="auto")
+# bcrypt work factor for new hashes. Stored hashes outside [MIN, MAX] are
+# rehashed at this cost the next time their owner logs in.
+BCRYPT_ROUNDS=settings.bcrypt_rounds
+BCRYPT_MIN_ROUNDS=settings.bcrypt_min_rounds
+BCRYPT_MAX_ROUNDS=settings.bcrypt_max_rounds
+
+def make_pwd_context(rounds=BCRYPT_ROUNDS,min_rounds=BCRYPT_MIN_ROUNDS,max_rounds=BCRYPT_MAX_ROUNDS):
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=min(min_rounds,rounds),
+        bcrypt__max_rounds=max(max_rounds,rounds),
+    )
+
+_pwd_context=None
+
+def get_pwd_context():
+    """The shared CryptContext, built on first use so passlib stays out of worker startup"""
+    global _pwd_context
+    if _pwd_context is None:
+        _pwd_context=make_pwd_context()
+    return _pwd_context
+
+# bcrypt releases the GIL, so a thread pool gives real parallelism while
+# capping how many cores auth can take from the rest of the app
+HASH_POOL_SIZE=settings.hash_pool_size
+# Hash jobs allowed to be running or queued before new ones get a 503
+HASH_MAX_PENDING=settings.hash_max_pending
 
 INVERSE_RELATIONS = {
     "Father": "Child",
@@ -14,11 +52,108 @@ INVERSE_RELATIONS = {
     "Ward": "Guardian",
 }
 
+URGENCY_LEVELS = ("ROUTINE", "URGENT", "EMERGENCY")
+
+# Section labels the app writes into a saved diagnosis text
+DIAGNOSIS_TEXT_FIELDS = {
+    "symptoms": r"Symptoms\s*:",
+    # The app prefixes this line with an urgency emoji
+    "predicted_disease": r"(?:[^\w\s]+\s*)?Predicted Disease\s*:",
+    "suggested_treatment": r"Treatment\s*:",
+    "urgency": r"Urgency Level\s*:",
+}
+_DIAGNOSIS_TEXT_RE = re.compile(
+    "|".join(f"(?P<{name}>{label})" for name, label in DIAGNOSIS_TEXT_FIELDS.items())
+)
+
+def parse_diagnosis_text(text: str) -> dict:
+    """
+    Pull the structured fields back out of a saved diagnosis text, e.g.
+    "Symptoms:fever, cough\n\n ✅ Predicted Disease: Flu\n\nTreatment: ...\n\nUrgency Level: URGENT".
+    Missing fields come back as None; symptoms as a list of lower-cased names.
+    """
+    text = text or ""
+    fields = dict.fromkeys(DIAGNOSIS_TEXT_FIELDS)
+    matches = list(_DIAGNOSIS_TEXT_RE.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        fields[match.lastgroup] = text[match.end():end].strip() or None
+
+    if fields["symptoms"]:
+        fields["symptoms"] = [s.strip().lower() for s in fields["symptoms"].split(",") if s.strip()]
+    if fields["urgency"]:
+        level = fields["urgency"].split()[0].upper()
+        fields["urgency"] = level if level in URGENCY_LEVELS else None
+    return fields
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor pointing just past the row (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError on anything malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+hash_seconds=metrics.Histogram("merocare_hash_seconds","Time spent computing bcrypt hashes",["op"])
+hash_wait_seconds=metrics.Histogram("merocare_hash_queue_wait_seconds","Time bcrypt jobs waited for a pool thread",["op"])
+hash_rejected=metrics.Counter("merocare_hash_rejected","bcrypt jobs rejected because the pool was saturated",["op"])
+
+class HashPool:
+    """
+    Bounded worker pool for password hashing. Callers await their job, so a
+    queued hash holds no event loop or threadpool thread while it waits.
+    """
+
+    def __init__(self,size=HASH_POOL_SIZE,max_pending=HASH_MAX_PENDING):
+        self.size=size
+        self.max_pending=max_pending
+        self.pending=0
+        self._executor=ThreadPoolExecutor(max_workers=size,thread_name_prefix="bcrypt")
+        self._slots=threading.BoundedSemaphore(max_pending)
+        self._lock=threading.Lock()
+
+    async def run(self,op,fn,*args):
+        if not self._slots.acquire(blocking=False):
+            hash_rejected.inc(op=op)
+            raise HTTPException(status_code=503,detail="Server is busy, please try again",headers={"Retry-After":"1"})
+        with self._lock:
+            self.pending+=1
+        submitted=time.perf_counter()
+
+        def job():
+            started=time.perf_counter()
+            hash_wait_seconds.observe(started-submitted,op=op)
+            try:
+                return fn(*args)
+            finally:
+                hash_seconds.observe(time.perf_counter()-started,op=op)
+
+        try:
+            return await asyncio.wrap_future(self._executor.submit(job))
+        finally:
+            with self._lock:
+                self.pending-=1
+            self._slots.release()
+
+hash_pool=HashPool()
+metrics.Gauge("merocare_hash_pending","bcrypt jobs running or queued",function=lambda:hash_pool.pending)
+
 class Hash:
     @staticmethod
-    def bcrypt(password:str):
-        return pwd_context.hash(password)
+    async def bcrypt(password:str):
+        return await hash_pool.run("hash",get_pwd_context().hash,password)
     
     @staticmethod
-    def verify(plain_password,hashed_password):
-        return pwd_context.verify(plain_password,hashed_password)
\ No newline at end of file
+    async def verify(plain_password,hashed_password):
+        return await hash_pool.run("verify",get_pwd_context().verify,plain_password,hashed_password)
+
+    @staticmethod
+    async def verify_and_update(plain_password,hashed_password):
+        """(verified, new_hash); new_hash is set when the stored hash no longer matches the cost policy"""
+        return await hash_pool.run("verify",get_pwd_context().verify_and_update,plain_password,hashed_password)
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Compare the async route handlers with DB_ASYNC off (sync Session run in the
+threadpool) and on (AsyncSession over aiosqlite/aiomysql).
+
+    python -m bench.async_db --concurrency 50 --requests 3000 --rows 200
+
+Each mode gets a fresh single-worker server; one user is seeded with
+`--rows` saved diagnoses and /diagnosis/my and /diagnosis/my/page are then
+driven at a fixed concurrency. Uses SQLALCHEMY_DATABASE_URL when set,
+otherwise a throwaway SQLite file per mode.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from bench.common import run_server, summarize
+
+ENDPOINTS = ["/diagnosis/my", "/diagnosis/my/page?limit=20"]
+
+
+def seed(base_url, rows):
+    with httpx.Client(base_url=base_url, timeout=30) as client:
+        credentials = {"email": "async-bench@example.com", "password": "bench-password"}
+        client.post("/signup", json={**credentials, "full_name": "Async Bench", "gender": "male"})
+        token = client.post("/login", data={"username": credentials["email"],
+                                            "password": credentials["password"]}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        for i in range(rows):
+            client.post("/diagnosis/save-history", headers=headers, json={
+                "user_diagnosis": f"Symptoms:fever, cough\n\nPredicted Disease: Flu {i}\n\nUrgency Level: ROUTINE",
+                "created_at": f"2025-01-01T{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}Z",
+                "visibility": "private",
+            })
+        return headers
+
+
+async def drive(base_url, headers, concurrency, total):
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def worker(client):
+        nonlocal issued, errors
+        while issued < total:
+            path = ENDPOINTS[issued % len(ENDPOINTS)]
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--rows", type=int, default=200, help="saved diagnoses for the benchmark user")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for mode in ("sync", "async"):
+        db_url = os.getenv("SQLALCHEMY_DATABASE_URL") or \
+            f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='merocare-async-'), 'bench.db')}"
+        env = {
+            "SQLALCHEMY_DATABASE_URL": db_url,
+            "SECRET_KEY": os.getenv("SECRET_KEY", "bench-secret"),
+            "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "bench"),
+            "DB_ASYNC": "true" if mode == "async" else "false",
+        }
+        with run_server("app.main:app", env=env, migrate=True) as base_url:
+            headers = seed(base_url, args.rows)
+            summary = asyncio.run(drive(base_url, headers, args.concurrency, args.requests))
+        summary["mode"] = mode
+        results.append(summary)
+        print(f"{mode:>6} {summary['throughput_rps']:>8.1f} {summary['p50_ms']:>8} "
+              f"{summary['p95_ms']:>8} {summary['p99_ms']:>8} {summary['errors']:>7}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"concurrency": args.concurrency, "rows": args.rows, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
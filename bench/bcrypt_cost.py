@@ -0,0 +1,72 @@
+"""
+Measure bcrypt throughput per core for a range of cost factors, to pick a
+BCRYPT_ROUNDS that fits the login throughput target.
+
+    python -m bench.bcrypt_cost --rounds 10-14 --target 50 --cores 4
+
+Each cost is timed on a single thread, so the result is hashes/second for
+one core; with the hash pool sized to N cores expect roughly N times that.
+"""
+import argparse
+import json
+import os
+import time
+
+from passlib.hash import bcrypt
+
+
+def parse_range(text):
+    if "-" in text:
+        low, high = text.split("-", 1)
+        return list(range(int(low), int(high) + 1))
+    return [int(r) for r in text.split(",")]
+
+
+def measure(rounds, min_seconds):
+    handler = bcrypt.using(rounds=rounds)
+    stored = handler.hash("correct horse battery staple")
+    count = 0
+    start = time.perf_counter()
+    while True:
+        handler.verify("correct horse battery staple", stored)
+        count += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds and count >= 3:
+            break
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", default="10-14", help="cost factors, e.g. 10-14 or 10,12")
+    parser.add_argument("--seconds", type=float, default=2.0, help="minimum time spent per cost factor")
+    parser.add_argument("--cores", type=int, default=os.cpu_count() or 1, help="cores given to the hash pool")
+    parser.add_argument("--target", type=float, default=None, help="logins/second the deployment must sustain")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'rounds':>6} {'ms/hash':>9} {'hashes/s/core':>14} {f'hashes/s ({args.cores} cores)':>22}")
+    for rounds in parse_range(args.rounds):
+        per_core = measure(rounds, args.seconds)
+        total = per_core * args.cores
+        fits = args.target is None or total >= args.target
+        results.append({"rounds": rounds, "hashes_per_second_per_core": per_core,
+                        "hashes_per_second": total, "meets_target": fits})
+        flag = "" if args.target is None else ("  ok" if fits else "  below target")
+        print(f"{rounds:>6} {1000 / per_core:>9.1f} {per_core:>14.1f} {total:>22.1f}{flag}")
+
+    if args.target is not None:
+        fitting = [r["rounds"] for r in results if r["meets_target"]]
+        if fitting:
+            print(f"Highest cost meeting {args.target:g} logins/s: BCRYPT_ROUNDS={max(fitting)}")
+        else:
+            print(f"No tested cost meets {args.target:g} logins/s on {args.cores} cores")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"cores": args.cores, "target": args.target, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
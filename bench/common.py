@@ -0,0 +1,120 @@
+"""Helpers shared by the benchmark scripts."""
+import contextlib
+import datetime
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "bench", "results")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list (pct in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies, errors, elapsed):
+    """Throughput and latency percentiles (ms) for one endpoint or run."""
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": (len(latencies) + errors) / elapsed if elapsed else 0.0,
+        "p50_ms": _ms(percentile(latencies, 50)),
+        "p95_ms": _ms(percentile(latencies, 95)),
+        "p99_ms": _ms(percentile(latencies, 99)),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def run_metadata():
+    """Where and on what code a result was produced, so saved runs can be told apart."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save_results(name, results, path=None):
+    """
+    Write `results` plus run metadata as JSON, by default to
+    bench/results/<name>-<UTC timestamp>.json, and return the path.
+    """
+    payload = {"benchmark": name, "meta": run_metadata(), **results}
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = payload["meta"]["timestamp"].replace(":", "").replace("+0000", "Z")
+        path = os.path.join(RESULTS_DIR, f"{name}-{stamp}.json")
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+@contextlib.contextmanager
+def run_server(app_path, env=None, port=None, workers=1, migrate=False):
+    """
+    Start `uvicorn app_path` in a subprocess and yield its base URL once it
+    answers. With `migrate`, `alembic upgrade head` is run against the same
+    environment first (the app no longer creates its tables on startup).
+    """
+    port = port or free_port()
+    env = {**os.environ, **(env or {})}
+    if migrate:
+        result = subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"],
+                                cwd=ROOT, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"alembic upgrade head failed:\n{result.stderr}")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app_path, "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"{app_path} exited with code {process.returncode}")
+            try:
+                httpx.get(base_url + "/", timeout=1)
+                break
+            except httpx.TransportError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"{app_path} did not start on port {port}")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
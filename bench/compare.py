@@ -0,0 +1,86 @@
+"""
+Compare two saved benchmark results (bench.load, bench.micro or bench.triage JSON).
+
+    python -m bench.compare bench/results/load-<old>.json bench/results/load-<new>.json
+
+Prints each latency/throughput figure found in both files with the relative
+change. Latency rising or throughput falling by more than --threshold percent
+is marked as a regression, and the exit code is 1 if there is any.
+"""
+import argparse
+import json
+import sys
+
+# Fields compared, and whether a higher value is better
+FIELDS = {
+    "throughput_rps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "ops_per_second": True,
+    "p50_us": False,
+    "p99_us": False,
+    "top1": True,
+    "top3": True,
+    "urgency": True,
+    "single_p50_us": False,
+    "single_p99_us": False,
+    "batch_p50_us_per_check": False,
+}
+
+
+def rows(result):
+    """Flatten a saved result into {row label: {field: value}}."""
+    if "levels" in result:
+        out = {}
+        for level in result["levels"]:
+            prefix = f"c={level['concurrency']}"
+            out[f"{prefix} (all)"] = level["total"]
+            for endpoint, summary in level["endpoints"].items():
+                out[f"{prefix} {endpoint}"] = summary
+        return out
+    if "accuracy" in result:
+        return {"accuracy": result["accuracy"], "latency": result["latency"]}
+    return dict(result.get("benchmarks", {}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        sys.exit(f"Cannot compare a {baseline.get('benchmark')} result with a {candidate.get('benchmark')} one")
+
+    for label, result in (("baseline", baseline), ("candidate", candidate)):
+        meta = result.get("meta", {})
+        print(f"{label:>9}: {meta.get('timestamp')} commit {meta.get('commit')}")
+
+    old_rows, new_rows = rows(baseline), rows(candidate)
+    regressions = 0
+    print(f"\n{'':<48} {'field':<24} {'baseline':>10} {'candidate':>10} {'change':>8}")
+    for name in old_rows:
+        if name not in new_rows:
+            continue
+        for field, higher_is_better in FIELDS.items():
+            old, new = old_rows[name].get(field), new_rows[name].get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            flag = "  regression" if worse > args.threshold else ""
+            regressions += bool(flag)
+            print(f"{name:<48} {field:<24} {old:>10.2f} {new:>10.2f} {change:>+7.1f}%{flag}")
+
+    print(f"\n{regressions} regression(s) beyond {args.threshold:g}%")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
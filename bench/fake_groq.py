@@ -0,0 +1,139 @@
+"""
+Minimal stand-in for the Groq chat completions API.
+
+Run it locally and point the backend at it:
+
+    uvicorn bench.fake_groq:app --port 9000
+    GROQ_BASE_URL=http://127.0.0.1:9000 GROQ_API_KEY=fake uvicorn app.main:app
+
+FAKE_GROQ_LATENCY sets how long each completion takes (seconds); streamed
+completions spread that time over FAKE_GROQ_CHUNKS chunks.
+
+Faults, to exercise the client's rate limiting, retries and circuit breaker:
+  FAKE_GROQ_RPM         requests per minute, refilled continuously from a full
+                        minute's worth; the rest get 429 and Retry-After (0 = no limit)
+  FAKE_GROQ_ERROR_RATE  share of requests answered with 503
+They can be changed while running with POST /faults {"rpm": .., "error_rate": ..,
+"latency": ..}, which also resets the counters in GET /stats.
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+CHUNKS = int(os.getenv("FAKE_GROQ_CHUNKS", "20"))
+
+faults = {
+    "latency": float(os.getenv("FAKE_GROQ_LATENCY", "0.5")),
+    "rpm": int(os.getenv("FAKE_GROQ_RPM", "0")),
+    "error_rate": float(os.getenv("FAKE_GROQ_ERROR_RATE", "0")),
+}
+
+DIAGNOSIS = {
+    "predicted_disease": "Common Cold",
+    "suggested_treatment": "Rest, fluids and paracetamol for fever",
+    "urgency": "ROUTINE",
+    "full_response": "Symptoms are consistent with a mild viral infection.",
+}
+
+app = FastAPI(title="Fake Groq")
+app.state.calls = 0
+app.state.throttled = 0
+app.state.failed = 0
+quota = {"tokens": float(faults["rpm"]), "updated": time.monotonic()}
+
+
+def completion_body(model, content):
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": {"prompt_tokens": 200, "completion_tokens": 60, "total_tokens": 260},
+    }
+
+
+def chunk_body(completion_id, model, content, finish_reason=None):
+    delta = {"content": content} if content else {}
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+async def stream_completion(model, content):
+    completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+    size = max(1, -(-len(content) // CHUNKS))
+    for start in range(0, len(content), size):
+        await asyncio.sleep(faults["latency"] / CHUNKS)
+        yield f"data: {json.dumps(chunk_body(completion_id, model, content[start:start + size]))}\n\n"
+    yield f"data: {json.dumps(chunk_body(completion_id, model, None, 'stop'))}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    app.state.calls += 1
+    fault = injected_fault()
+    if fault is not None:
+        return fault
+    model = body.get("model", "fake")
+    content = json.dumps(DIAGNOSIS)
+    if body.get("stream"):
+        return StreamingResponse(stream_completion(model, content), media_type="text/event-stream")
+    await asyncio.sleep(faults["latency"])
+    return completion_body(model, content)
+
+
+def injected_fault():
+    """A 429 or 503 response if this request should fail, else None."""
+    now = time.monotonic()
+    rate = faults["rpm"] / 60
+    quota["tokens"] = min(faults["rpm"], quota["tokens"] + (now - quota["updated"]) * rate)
+    quota["updated"] = now
+    if faults["rpm"] and quota["tokens"] < 1:
+        app.state.throttled += 1
+        retry_after = math.ceil((1 - quota["tokens"]) / rate)
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "Rate limit reached for requests per minute",
+                               "type": "requests", "code": "rate_limit_exceeded"}},
+            headers={"retry-after": str(retry_after), "x-ratelimit-limit-requests": str(faults["rpm"]),
+                     "x-ratelimit-remaining-requests": "0"},
+        )
+    quota["tokens"] -= 1
+    if random.random() < faults["error_rate"]:
+        app.state.failed += 1
+        return JSONResponse(status_code=503, content={"error": {"message": "Service Unavailable",
+                                                                 "type": "internal_server_error"}})
+    return None
+
+
+@app.post("/faults")
+async def set_faults(request: Request):
+    faults.update({k: v for k, v in (await request.json()).items() if k in faults})
+    quota.update(tokens=float(faults["rpm"]), updated=time.monotonic())
+    app.state.calls = app.state.throttled = app.state.failed = 0
+    return faults
+
+
+@app.get("/stats")
+def stats():
+    return {"calls": app.state.calls, "throttled": app.state.throttled, "failed": app.state.failed}
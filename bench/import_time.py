@@ -0,0 +1,132 @@
+"""
+Measure how long `import app.main` takes in a fresh interpreter, using
+`python -X importtime`, and fail if deferring LAZY_MODULES no longer pays
+off or if one of them is imported at startup.
+
+    python -m bench.import_time --runs 21 --min-saving 10 --top 15
+
+One warm-up import fills the OS file cache and is discarded. Then --runs
+pairs of imports alternate between the app as shipped and a baseline that
+imports LAZY_MODULES first, as the app did before they were deferred. Both
+are measured in the same run on the same machine, so the check does not
+depend on the hardware: the app's median must be at least --min-saving
+percent below the baseline's. Exits 1 when it is not, or when any module in
+LAZY_MODULES shows up during the app's own import (that check is exact).
+
+The default margin is half the measured saving. Three 15-pair runs on a
+single-core box gave medians of 1280-1340 ms against 1607-1614 ms for the
+baseline, a 17-20% saving, so 10% leaves room for noise and still fails if
+the deferred imports come back. --budget-ms adds an absolute limit for a
+known reference machine; it is off by default.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from bench.common import ROOT
+
+# Loaded on first use (first LLM call, login, token check, offline triage, history save), never at startup
+LAZY_MODULES = ("groq", "httpx", "jose.jwt", "numpy", "passlib.context", "pytz")
+
+ENV = {
+    "SQLALCHEMY_DATABASE_URL": "sqlite://",
+    "SECRET_KEY": "import-time",
+    "GROQ_API_KEY": "import-time",
+}
+
+
+def import_statement(statement):
+    """
+    Run `statement` in a fresh interpreter; returns ({module name: (self us,
+    cumulative us)}, total ms of its top-level imports).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT, env={**os.environ, **ENV}, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{statement} failed:\n{result.stderr}")
+    timings = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if name.strip() == "site":
+            # Everything so far was interpreter startup, not the import being measured
+            timings.clear()
+            total_us = 0
+            continue
+        if not name.startswith("  "):
+            # Nested imports are indented; their time is already in their parent's
+            total_us += int(cumulative_us)
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings, total_us / 1000
+
+
+def import_once(module):
+    """One cold import; returns {module name: (self us, cumulative us)}."""
+    return import_statement(f"import {module}")[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=21, help="pairs of app and baseline imports")
+    parser.add_argument("--min-saving", type=float, default=10,
+                        help="percent the app's median must be below the eager-import baseline's")
+    parser.add_argument("--budget-ms", type=float, default=None, help="optional absolute limit for the app's median")
+    parser.add_argument("--top", type=int, default=15, help="slowest top-level dependencies to list")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    args = parser.parse_args()
+
+    app_import = f"import {args.module}"
+    baseline_import = f"import {', '.join(LAZY_MODULES)}; import {args.module}"
+    import_statement(app_import)
+    runs, baseline = [], []
+    for _ in range(args.runs):
+        runs.append(import_statement(app_import))
+        baseline.append(import_statement(baseline_import)[1])
+    totals = [total for _, total in runs]
+    median = statistics.median(totals)
+    baseline_median = statistics.median(baseline)
+    saving = 100 * (1 - median / baseline_median)
+    last = runs[-1][0]
+
+    # Packages imported directly by the app, ranked by cumulative time
+    packages = {}
+    for name, (_, cumulative) in last.items():
+        root = name.split(".")[0]
+        if root != "app":
+            packages[root] = max(packages.get(root, 0), cumulative)
+    print(f"{args.module}: median {median:.1f} ms over {args.runs} runs "
+          f"(min {min(totals):.1f}, max {max(totals):.1f})")
+    print(f"baseline with LAZY_MODULES imported first: median {baseline_median:.1f} ms; "
+          f"saving {saving:.1f}% (minimum {args.min_saving:g}%)")
+    for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {cumulative / 1000:>8.1f} ms  {name}")
+
+    eager = [name for name in LAZY_MODULES if name in last]
+    too_slow = saving < args.min_saving
+    over_budget = args.budget_ms is not None and median > args.budget_ms
+    if eager:
+        print(f"Imported at startup but should be lazy: {', '.join(eager)}")
+    if too_slow:
+        print(f"Saving below the minimum by {args.min_saving - saving:.1f} points")
+    if over_budget:
+        print(f"Over the {args.budget_ms:g} ms budget by {median - args.budget_ms:.1f} ms")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"module": args.module, "budget_ms": args.budget_ms, "median_ms": median,
+                       "runs_ms": totals, "baseline_median_ms": baseline_median, "baseline_runs_ms": baseline,
+                       "saving_pct": saving, "min_saving_pct": args.min_saving, "eager_lazy_modules": eager,
+                       "packages_ms": {k: v / 1000 for k, v in packages.items()}}, f, indent=2)
+    sys.exit(1 if eager or too_slow or over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
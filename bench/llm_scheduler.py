@@ -0,0 +1,172 @@
+"""
+The Groq scheduler (app/llm_scheduler.py) against a fake Groq that injects
+throttling and failures (bench/fake_groq.py), in-process through LLMClient.
+
+    python -m bench.llm_scheduler --quota 60 --burst 120 --deadline 5
+
+burst    --burst concurrent completions against a --quota requests/minute
+         limit, once with no scheduling (no quota, no retries: the old client
+         without its SDK retries) and once scheduled with the same quota.
+         Scheduled, calls beyond the quota should be shed locally and fast
+         instead of each collecting a 429 upstream.
+flaky    --calls completions while --error-rate of upstream answers are 503,
+         without and with retries.
+outage   every upstream answer is 503: after --breaker-failures failures the
+         breaker opens and the remaining calls fail without reaching upstream;
+         once the fault clears and the reset time passes, a probe closes it.
+
+Exits 1 if any caller in the scheduled burst got a quota error (the odd
+upstream 429 from clock skew between the two buckets is retried), if the
+breaker let more than --breaker-failures requests through during the outage,
+or if it did not close again afterwards.
+Results go to bench/results/ unless --json is given.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import httpx
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "scheduler-bench")
+
+from app.llm import LLMClient, LLMError, LLMTimeout, LLMUnavailable  # noqa: E402
+from app.llm_scheduler import CircuitBreaker, LLMScheduler  # noqa: E402
+from bench.common import percentile, run_server, save_results  # noqa: E402
+
+MESSAGES = [{"role": "user", "content": "Symptoms: fever, cough. Age: 30. Gender: male."}]
+
+
+def set_faults(groq_url, **faults):
+    httpx.post(groq_url + "/faults", json=faults).raise_for_status()
+
+
+def upstream_stats(groq_url):
+    return httpx.get(groq_url + "/stats").json()
+
+
+async def fire(client, count, deadline, concurrent=True):
+    """Outcome counts and latencies of `count` completions."""
+    outcomes = {"ok": 0, "shed": 0, "timeout": 0, "error": 0}
+    latencies = {name: [] for name in outcomes}
+
+    async def one():
+        started = time.perf_counter()
+        try:
+            await client.complete(MESSAGES, timeout=deadline)
+            outcome = "ok"
+        except LLMUnavailable:
+            outcome = "shed"
+        except LLMTimeout:
+            outcome = "timeout"
+        except LLMError:
+            outcome = "error"
+        outcomes[outcome] += 1
+        latencies[outcome].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    if concurrent:
+        await asyncio.gather(*(one() for _ in range(count)))
+    else:
+        for _ in range(count):
+            await one()
+    result = {**outcomes, "elapsed_s": round(time.perf_counter() - started, 3)}
+    for name, values in latencies.items():
+        if values:
+            result[f"{name}_p50_ms"] = round(percentile(values, 50) * 1000, 1)
+            result[f"{name}_p99_ms"] = round(percentile(values, 99) * 1000, 1)
+    return result
+
+
+async def scenario(groq_url, scheduler, count, deadline, concurrent=True, **faults):
+    set_faults(groq_url, **faults)
+    client = LLMClient(api_key="bench", base_url=groq_url, scheduler=scheduler)
+    try:
+        result = await fire(client, count, deadline, concurrent)
+    finally:
+        await client.close()
+    return {**result, "upstream": upstream_stats(groq_url)}
+
+
+def unscheduled():
+    return LLMScheduler(rpm=0, tpm=0, max_retries=0, breaker=CircuitBreaker(failures=0))
+
+
+def print_row(name, r):
+    print(f"  {name:<12} ok {r['ok']:>4}  shed {r['shed']:>4}  timeout {r['timeout']:>3}  error {r['error']:>4}  "
+          f"| upstream calls {r['upstream']['calls']:>4}, 429s {r['upstream']['throttled']:>4}, "
+          f"503s {r['upstream']['failed']:>4}  | {r['elapsed_s']:.2f}s")
+
+
+async def run(groq_url, args):
+    results = {}
+    latency = args.groq_latency
+
+    print(f"burst: {args.burst} concurrent calls, quota {args.quota}/min, deadline {args.deadline}s")
+    burst = {
+        "unscheduled": await scenario(groq_url, unscheduled(), args.burst, args.deadline,
+                                      rpm=args.quota, error_rate=0, latency=latency),
+        "scheduled": await scenario(groq_url, LLMScheduler(rpm=args.quota, max_retries=args.retries),
+                                    args.burst, args.deadline, rpm=args.quota, error_rate=0, latency=latency),
+    }
+    for name, r in burst.items():
+        print_row(name, r)
+    if "shed_p50_ms" in burst["scheduled"]:
+        print(f"  shed calls answered in p50 {burst['scheduled']['shed_p50_ms']} ms")
+    results["burst"] = burst
+
+    print(f"\nflaky: {args.calls} calls, {args.error_rate:.0%} upstream 503s")
+    flaky = {
+        "no retries": await scenario(groq_url, unscheduled(), args.calls, args.deadline,
+                                     rpm=0, error_rate=args.error_rate, latency=latency),
+        "retries": await scenario(groq_url, LLMScheduler(max_retries=args.retries, retry_base=0.05,
+                                                         breaker=CircuitBreaker(failures=0)),
+                                  args.calls, args.deadline, rpm=0, error_rate=args.error_rate, latency=latency),
+    }
+    for name, r in flaky.items():
+        print_row(name, r)
+    results["flaky"] = flaky
+
+    print(f"\noutage: {args.calls} sequential calls, every upstream answer 503")
+    breaker = CircuitBreaker(failures=args.breaker_failures, reset=args.breaker_reset)
+    scheduler = LLMScheduler(max_retries=0, breaker=breaker)
+    outage = await scenario(groq_url, scheduler, args.calls, args.deadline, concurrent=False,
+                            rpm=0, error_rate=1.0, latency=latency)
+    print_row("breaker", outage)
+    set_faults(groq_url, error_rate=0)
+    await asyncio.sleep(args.breaker_reset)
+    recovered = await scenario(groq_url, scheduler, 1, args.deadline, rpm=0, error_rate=0, latency=latency)
+    print(f"  after {args.breaker_reset}s with upstream healthy again: probe {'ok' if recovered['ok'] else 'failed'}, "
+          f"breaker {breaker.state}")
+    results["outage"] = {**outage, "recovered": bool(recovered["ok"]), "breaker_state": breaker.state}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quota", type=int, default=60, help="requests per minute allowed by the fake Groq")
+    parser.add_argument("--burst", type=int, default=120)
+    parser.add_argument("--calls", type=int, default=50, help="calls in the flaky and outage scenarios")
+    parser.add_argument("--error-rate", type=float, default=0.3)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--deadline", type=float, default=5.0, help="budget of each call in seconds")
+    parser.add_argument("--breaker-failures", type=int, default=5)
+    parser.add_argument("--breaker-reset", type=float, default=1.0)
+    parser.add_argument("--groq-latency", type=float, default=0.05)
+    parser.add_argument("--json", dest="json_path", default=None, help="write results here instead of bench/results/")
+    args = parser.parse_args()
+
+    with run_server("bench.fake_groq:app") as groq_url:
+        results = asyncio.run(run(groq_url, args))
+
+    path = save_results("llm_scheduler", {"config": vars(args), **results}, args.json_path)
+    print(f"\nResults written to {path}")
+    over_quota = results["burst"]["scheduled"]["error"]
+    leaked = results["outage"]["upstream"]["calls"] > args.breaker_failures
+    sys.exit(1 if over_quota or leaked or not results["outage"]["recovered"] else 0)
+
+
+if __name__ == "__main__":
+    main()
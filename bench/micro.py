@@ -0,0 +1,183 @@
+"""
+Micro-benchmarks for the CPU-bound pieces behind the family and diagnosis
+routes, run in-process without a server.
+
+    python -m bench.micro --seconds 1 --filter kinship
+
+Covers relationship resolution (KinshipGraph, which replaced the old
+per-pair infer_relationship walk), parsing of AI replies (plain JSON, fenced
+JSON and the streaming field parser), the symptom typeahead and normalizer
+(app/symptoms.py, /diagnosis/symptoms/suggest has a 1 ms budget) and
+building/serialising the DiagnosisHistoryResponse list returned by
+/diagnosis/my. Each benchmark is
+timed in batches for at least --seconds; per-call p50/p99 come from the
+batch averages. Results go to bench/results/ unless --json is given.
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# Importing the app modules builds an engine; nothing here touches it
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "micro-bench")
+
+from pydantic import TypeAdapter  # noqa: E402
+
+from app import kinship  # noqa: E402
+from app.routers.diagnosis import fields_from_response, parse_ai_response  # noqa: E402
+from app.schemas import DiagnosisHistoryResponse  # noqa: E402
+from app.streaming import DiagnosisFieldParser  # noqa: E402
+from app.symptoms import normalize_symptoms, symptom_index  # noqa: E402
+from bench.common import percentile, save_results  # noqa: E402
+
+# Aim for batches at least this long so timer overhead stays negligible
+BATCH_SECONDS = 0.002
+
+AI_REPLY = json.dumps({
+    "predicted_disease": "Influenza",
+    "suggested_treatment": "Rest, drink plenty of fluids and take paracetamol for fever. "
+                           "See a doctor if breathing becomes difficult.",
+    "urgency": "URGENT",
+    "full_response": "Fever with cough and body aches in winter is most consistent with influenza. " * 4,
+}, indent=4)
+# Fence never closed (reply cut short), which takes parse_ai_response's cleanup path
+FENCED_AI_REPLY = f"```json\n{AI_REPLY}"
+
+
+def family_connections(size):
+    """
+    Accepted connections for a synthetic family of `size` members: a tree in
+    which every member was invited by an earlier one as a child or spouse.
+    """
+    connections = []
+    for member in range(1, size):
+        if member % 4 == 3:
+            sender, role = member - 1, "Spouse"
+        else:
+            sender, role = (member - 1) // 2, "Son" if member % 2 else "Daughter"
+        connections.append(SimpleNamespace(sender_id=sender, receiver_id=member, receiver_role=role))
+    return connections
+
+
+def history_rows(count):
+    created = datetime(2025, 1, 1, 9, 30)
+    return [
+        SimpleNamespace(
+            id=i, user_diagnosis=f"Symptoms: fever, cough\nPredicted Disease: Influenza #{i}",
+            predicted_disease="Influenza", suggested_treatment="Rest and fluids", urgency="URGENT",
+            visibility="private", created_at=created + timedelta(hours=i),
+        )
+        for i in range(count)
+    ]
+
+
+def build_history(rows):
+    # Same construction as get_my_diagnosis_history
+    return [
+        DiagnosisHistoryResponse(
+            id=row.id,
+            symptoms=row.user_diagnosis or "No data available",
+            diagnosis_result=row.predicted_disease or "",
+            treatment=row.suggested_treatment or "",
+            urgency=row.urgency or "ROUTINE",
+            visibility=row.visibility,
+            created_at=row.created_at,
+        )
+        for row in rows
+    ]
+
+
+def stream_parse(chunks):
+    parser = DiagnosisFieldParser()
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+def benchmarks():
+    """name -> zero-argument callable timed as one operation."""
+    cases = {}
+    for size in (8, 32):
+        connections = family_connections(size)
+        graph = kinship.KinshipGraph(connections)
+        pairs = [(a, b) for a in range(size) for b in range(size) if a != b]
+        cases[f"kinship_graph_build[{size}]"] = lambda c=connections: kinship.KinshipGraph(c)
+        cases[f"kinship_all_pairs[{size}]"] = \
+            lambda g=graph, p=pairs: [g.relationship(a, b) for a, b in p]
+    cases["kinship_classify"] = lambda: [kinship.classify(s) for s in ("P", "PP", "PC", "PPCC", "SPC", "CCS")]
+
+    cases["parse_ai_response[plain]"] = lambda: parse_ai_response(AI_REPLY)
+    cases["parse_ai_response[fenced]"] = lambda: parse_ai_response(FENCED_AI_REPLY)
+    cases["fields_from_response"] = lambda: fields_from_response(AI_REPLY)
+    chunks = [AI_REPLY[i:i + 8] for i in range(0, len(AI_REPLY), 8)]
+    cases["stream_field_parser"] = lambda: stream_parse(chunks)
+
+    for prefix in ("f", "pain", "shortness of b"):
+        cases[f"symptom_suggest[{prefix}]"] = lambda q=prefix: symptom_index.suggest(q, 10)
+    cases["normalize_symptoms"] = \
+        lambda: normalize_symptoms(["High fever and coughing", "tummy ache", "i have headache since 2 days"])
+
+    adapter = TypeAdapter(list[DiagnosisHistoryResponse])
+    for count in (10, 100):
+        rows = history_rows(count)
+        built = build_history(rows)
+        cases[f"history_response_build[{count}]"] = lambda r=rows: build_history(r)
+        cases[f"history_response_dump_json[{count}]"] = lambda b=built: adapter.dump_json(b)
+    return cases
+
+
+def measure(fn, min_seconds):
+    """Per-call timings (seconds) averaged over batches, for at least `min_seconds`."""
+    batch = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        if time.perf_counter() - start >= BATCH_SECONDS:
+            break
+        batch *= 2
+
+    samples = []
+    deadline = time.perf_counter() + min_seconds
+    while time.perf_counter() < deadline or len(samples) < 5:
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        samples.append((time.perf_counter() - start) / batch)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum time spent per benchmark")
+    parser.add_argument("--filter", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("--json", dest="json_path", default=None, help="write results here instead of bench/results/")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'benchmark':<36} {'ops/s':>12} {'p50 us':>10} {'p99 us':>10}")
+    for name, fn in benchmarks().items():
+        if args.filter and args.filter not in name:
+            continue
+        samples = measure(fn, args.seconds)
+        mean = sum(samples) / len(samples)
+        results[name] = {
+            "ops_per_second": round(1 / mean, 1),
+            "mean_us": round(mean * 1e6, 3),
+            "p50_us": round(percentile(samples, 50) * 1e6, 3),
+            "p99_us": round(percentile(samples, 99) * 1e6, 3),
+            "batches": len(samples),
+        }
+        r = results[name]
+        print(f"{name:<36} {r['ops_per_second']:>12.1f} {r['p50_us']:>10.2f} {r['p99_us']:>10.2f}")
+
+    path = save_results("micro", {"config": {"seconds": args.seconds, "filter": args.filter},
+                                  "benchmarks": results}, args.json_path)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
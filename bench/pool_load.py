@@ -0,0 +1,95 @@
+"""
+Load test showing how the DB connection pool size changes tail latency.
+
+    python -m bench.pool_load --pool-sizes 1,2,5,10,20 --concurrency 40 --requests 2000
+
+For each pool size the API is started with DB_POOL_SIZE=<n> and
+DB_MAX_OVERFLOW=0, so the size is a hard cap, then DB-bound sync routes
+(/users/{id}, /family/list/{id}, /family/pending-requests/{id}) are driven at
+a fixed concurrency. Uses SQLALCHEMY_DATABASE_URL when set (e.g. a local
+MySQL container), otherwise a throwaway SQLite file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+from bench.common import run_server, summarize
+
+ENDPOINTS = ["/users/{id}", "/family/list/{id}", "/family/pending-requests/{id}"]
+
+
+async def drive(base_url, concurrency, total, user_id):
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def worker(client):
+        nonlocal issued, errors
+        while issued < total:
+            path = ENDPOINTS[issued % len(ENDPOINTS)].format(id=user_id)
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code >= 500:
+                    errors += 1
+                    continue
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pool-sizes", default="1,2,5,10,20")
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--pool-timeout", type=float, default=30)
+    parser.add_argument("--json", dest="json_path", default=None, help="also write results to this file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="merocare-pool-")
+    db_url = os.getenv("SQLALCHEMY_DATABASE_URL") or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    base_env = {
+        "SQLALCHEMY_DATABASE_URL": db_url,
+        "SECRET_KEY": os.getenv("SECRET_KEY", "bench-secret"),
+        "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "bench"),
+        "DB_MAX_OVERFLOW": "0",
+        "DB_POOL_TIMEOUT": str(args.pool_timeout),
+    }
+
+    results = []
+    print(f"{'pool':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for size in [int(s) for s in args.pool_sizes.split(",")]:
+        with run_server("app.main:app", env={**base_env, "DB_POOL_SIZE": str(size)}, migrate=True) as base_url:
+            with httpx.Client(base_url=base_url) as client:
+                client.post("/signup", json={"email": "pool-bench@example.com", "full_name": "Pool Bench",
+                                             "gender": "female", "password": "bench-password"})
+                user_id = client.get("/users/", params={"limit": 1}).json()[0]["id"]
+            summary = asyncio.run(drive(base_url, args.concurrency, args.requests, user_id))
+        summary["pool_size"] = size
+        results.append(summary)
+        print(f"{size:>5} {summary['throughput_rps']:>8.1f} {summary['p50_ms']:>8} "
+              f"{summary['p95_ms']:>8} {summary['p99_ms']:>8} {summary['errors']:>7}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"database": db_url.split("@")[-1], "concurrency": args.concurrency,
+                       "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
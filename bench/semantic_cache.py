@@ -0,0 +1,131 @@
+"""
+Match quality and lookup latency of the semantic symptom cache
+(app/semantic_cache.py).
+
+    python -m bench.semantic_cache --sizes 1000,5000,20000 --threshold 0.9
+
+Quality: SAME pairs are different wordings of one symptom set and should hit;
+DIFFERENT pairs look alike but must not share an answer. Each pair goes
+through a real cache (similarity plus the canonical-symptom check). A false
+hit serves someone another person's diagnosis, so any DIFFERENT pair that
+hits fails the run (exit 1).
+
+Latency: the cache is filled to each size with random symptom sets spread
+over age bands and genders, then timed on lookups (p50/p99). The run also
+checks that overfilling keeps the entry count at maxsize. Results go to
+bench/results/ unless --json is given.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "semantic-bench")
+
+from app.semantic_cache import SemanticCache, embed  # noqa: E402
+from bench.common import percentile, save_results  # noqa: E402
+
+SAME = [
+    (["cough", "fever"], ["coughing", "fever since yesterday"]),
+    (["cough", "fever"], ["Fever ", "COUGH"]),
+    (["headache", "body ache"], ["headaches", "body aches"]),
+    (["runny nose", "sneezing"], ["sneezing", "runny nose", "sneezing"]),
+    (["sore throat", "fever"], ["fever and sore throat"]),
+    (["vomiting", "diarrhea"], ["vomiting", "diarrhea since yesterday"]),
+]
+
+DIFFERENT = [
+    (["chest pain", "fever"], ["back pain", "fever"]),
+    (["headache"], ["severe headache"]),
+    (["fever", "cough"], ["no fever", "cough"]),
+    (["chest pain"], ["chest tightness"]),
+    (["lower abdominal pain"], ["upper abdominal pain"]),
+    (["fever", "rash"], ["fever", "rash", "stiff neck"]),
+    (["fever", "cough", "rash"], ["fever", "cough"]),
+    (["runny nose", "sneezing", "sore throat", "cough", "nasal congestion", "mild fever"],
+     ["runny nose", "sneezing", "sore throat", "cough", "nasal congestion", "mild fever", "difficulty breathing"]),
+    (["fever", "body aches", "chills", "headache"], ["fever", "body aches", "chills", "headache", "confusion"]),
+]
+
+VOCABULARY = ["fever", "cough", "headache", "sore throat", "runny nose", "sneezing", "nausea", "vomiting",
+              "diarrhea", "fatigue", "chills", "body aches", "rash", "itching", "back pain", "chest pain",
+              "dizziness", "abdominal pain", "shortness of breath", "joint pain", "ear pain", "red eyes"]
+
+
+def quality(threshold):
+    rows = []
+    for expected, pairs in (("hit", SAME), ("miss", DIFFERENT)):
+        for a, b in pairs:
+            similarity = float(embed(a) @ embed(b))
+            cache = SemanticCache(maxsize=1, threshold=threshold)
+            cache.set("a", a, 30, "female", True)
+            got = "hit" if cache.get(b, 30, "female") else "miss"
+            rows.append({"a": a, "b": b, "similarity": round(similarity, 3), "expected": expected, "got": got})
+    return rows
+
+
+def fill(cache, count, rng):
+    for i in range(count):
+        symptoms = rng.sample(VOCABULARY, rng.randint(1, 4))
+        cache.set(f"k{i}", symptoms, rng.randint(0, 90), rng.choice(["male", "female"]), {"i": i})
+
+
+def lookup_latency(size, lookups, threshold, rng):
+    cache = SemanticCache(maxsize=size, threshold=threshold)
+    fill(cache, size, rng)
+    samples = []
+    hits = 0
+    for _ in range(lookups):
+        symptoms = rng.sample(VOCABULARY, rng.randint(1, 4))
+        start = time.perf_counter()
+        hits += cache.get(symptoms, rng.randint(0, 90), rng.choice(["male", "female"])) is not None
+        samples.append(time.perf_counter() - start)
+    return {
+        "size": size,
+        "p50_us": round(percentile(samples, 50) * 1e6, 1),
+        "p99_us": round(percentile(samples, 99) * 1e6, 1),
+        "hit_rate": round(hits / lookups, 3),
+        "memory_bytes": cache.stats()["memory_bytes"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,5000,20000", help="cache sizes to time lookups at")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", dest="json_path", default=None, help="write results here instead of bench/results/")
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    rows = quality(args.threshold)
+    false_hits = [r for r in rows if r["expected"] == "miss" and r["got"] == "hit"]
+    missed = [r for r in rows if r["expected"] == "hit" and r["got"] == "miss"]
+    print(f"threshold {args.threshold}: {len(missed)} missed rewordings, {len(false_hits)} false hits")
+    for r in rows:
+        flag = "" if r["expected"] == r["got"] else f"  expected {r['expected']}"
+        print(f"  {r['similarity']:.3f}  {', '.join(r['a'])}  |  {', '.join(r['b'])}{flag}")
+
+    latency = [lookup_latency(int(size), args.lookups, args.threshold, rng) for size in args.sizes.split(",")]
+    print(f"\n{'entries':>8} {'p50 us':>8} {'p99 us':>8} {'hit rate':>9} {'memory MB':>10}")
+    for r in latency:
+        print(f"{r['size']:>8} {r['p50_us']:>8} {r['p99_us']:>8} {r['hit_rate']:>9.1%} {r['memory_bytes'] / 1e6:>10.1f}")
+
+    bounded = SemanticCache(maxsize=100, threshold=args.threshold)
+    fill(bounded, 1000, rng)
+    stats = bounded.stats()
+    print(f"\noverfilled 100-entry cache with 1000 sets: size {stats['size']}, evictions {stats['evictions']}")
+
+    path = save_results("semantic_cache", {
+        "config": {"threshold": args.threshold, "lookups": args.lookups, "seed": args.seed},
+        "quality": rows, "latency": latency, "eviction": stats,
+    }, args.json_path)
+    print(f"\nResults written to {path}")
+    sys.exit(1 if false_hits or stats["size"] > stats["maxsize"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Accuracy and latency of the offline triage engine (app/triage.py).
+
+    python -m bench.triage --seconds 1 --min-accuracy 0.8
+
+Accuracy is measured on CASES, hand-labelled checks written the way users
+type them (synonyms, free text, extra symptoms):
+  top1 / top3   - the expected condition is ranked first / in the first three
+  urgency       - the urgency matches exactly
+  under-triage  - the urgency is LOWER than expected, the error that matters most
+Latency is per single check and per check inside a batch of --batch.
+Exits 1 if top-1 accuracy is below --min-accuracy or any case is under-triaged.
+Results go to bench/results/ unless --json is given.
+"""
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("SQLALCHEMY_DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "triage-bench")
+
+from app.triage import TriageEngine  # noqa: E402
+from app.utils import URGENCY_LEVELS  # noqa: E402
+from bench.common import percentile, save_results  # noqa: E402
+
+# (symptoms, age, gender, expected condition, expected urgency)
+CASES = [
+    (["runny nose", "sneezing", "sore throat"], 25, "female", "Common Cold", "ROUTINE"),
+    (["blocked nose", "sneezing", "mild cough"], 8, "male", "Common Cold", "ROUTINE"),
+    (["fever", "body ache", "chills", "tiredness"], 35, "male", "Influenza", "ROUTINE"),
+    (["high temperature", "muscle aches", "dry cough"], 70, "female", "Influenza", "URGENT"),
+    (["loss of smell", "loss of taste", "fever"], 40, "male", "COVID-19", "ROUTINE"),
+    (["sore throat", "difficulty swallowing", "swollen glands"], 12, "female", "Strep Throat", "ROUTINE"),
+    (["facial pain", "stuffy nose", "headache"], 45, "female", "Sinusitis", "ROUTINE"),
+    (["sneezing", "watery eyes", "itchy"], 30, "male", "Allergic Rhinitis", "ROUTINE"),
+    (["wheezing", "chest tightness", "breathlessness"], 16, "male", "Asthma Attack", "URGENT"),
+    (["productive cough", "fever", "shortness of breath"], 67, "male", "Pneumonia", "URGENT"),
+    (["chest pain", "sweating", "left arm pain"], 58, "male", "Heart Attack", "EMERGENCY"),
+    (["facial drooping", "slurred speech", "weakness on one side"], 72, "female", "Stroke", "EMERGENCY"),
+    (["severe headache", "stiff neck", "fever"], 19, "male", "Meningitis", "EMERGENCY"),
+    (["severe headache", "sensitivity to light", "nausea"], 28, "female", "Migraine", "URGENT"),
+    (["headache", "neck pain"], 33, "male", "Tension Headache", "ROUTINE"),
+    (["loose motion", "vomiting", "stomach ache"], 22, "female", "Gastroenteritis", "ROUTINE"),
+    (["vomiting", "diarrhoea", "fever"], 2, "male", "Gastroenteritis", "URGENT"),
+    (["high fever", "stomach pain", "loss of appetite", "constipation"], 24, "male", "Typhoid Fever", "URGENT"),
+    (["high fever", "pain behind the eyes", "joint pain", "rash"], 31, "female", "Dengue Fever", "URGENT"),
+    (["chills", "sweating", "fever", "headache"], 40, "male", "Malaria", "URGENT"),
+    (["lower right abdominal pain", "nausea", "loss of appetite"], 17, "male", "Appendicitis", "EMERGENCY"),
+    (["acidity", "upper abdominal pain", "bloating"], 50, "female", "Gastritis", "ROUTINE"),
+    (["burning urination", "frequent urination"], 29, "female", "Urinary Tract Infection", "ROUTINE"),
+    (["flank pain", "blood in urine", "nausea"], 44, "male", "Kidney Stones", "URGENT"),
+    (["yellow eyes", "dark urine", "tiredness"], 36, "male", "Hepatitis", "URGENT"),
+    (["excessive thirst", "frequent urination", "weight loss"], 55, "female", "High Blood Sugar (Diabetes)", "ROUTINE"),
+    (["swelling of the face", "hives", "trouble breathing"], 26, "female", "Anaphylaxis", "EMERGENCY"),
+    (["hives", "itching"], 34, "male", "Allergic Skin Reaction", "ROUTINE"),
+    (["ear pain", "fever"], 4, "male", "Ear Infection", "ROUTINE"),
+    (["red eyes", "eye discharge"], 9, "female", "Conjunctivitis", "ROUTINE"),
+    (["dry mouth", "dizziness", "dark urine"], 80, "male", "Dehydration", "ROUTINE"),
+    (["pale skin", "fatigue", "cold hands"], 27, "female", "Anemia", "ROUTINE"),
+    (["racing heart", "shaking", "sweating"], 23, "female", "Panic Attack", "ROUTINE"),
+    (["back pain"], 42, "male", "Back Strain", "ROUTINE"),
+    (["blisters", "itchy rash", "fever"], 6, "male", "Chickenpox", "ROUTINE"),
+    (["barking cough", "runny nose"], 3, "female", "Croup", "URGENT"),
+    (["lower abdominal pain", "back pain"], 21, "female", "Menstrual Cramps", "ROUTINE"),
+    (["runny nose", "sneezing", "no chest pain", "no shortness of breath"], 45, "male", "Common Cold", "ROUTINE"),
+    (["fever", "body ache", "chills", "tiredness, no stiff neck"], 30, "female", "Influenza", "ROUTINE"),
+    (["fever"], 0, "male", None, "EMERGENCY"),
+    (["seizure"], 30, "male", None, "EMERGENCY"),
+]
+
+
+def accuracy(engine):
+    results = engine.assess_many([(symptoms, age, gender) for symptoms, age, gender, _, _ in CASES])
+    top1 = top3 = urgency = 0
+    labelled = 0
+    misses = []
+    for (symptoms, age, gender, expected, expected_urgency), result in zip(CASES, results):
+        if expected is not None:
+            labelled += 1
+            ranked = [name for name, _ in result.ranked[:3]]
+            top1 += result.condition == expected
+            top3 += expected in ranked
+        urgency += result.urgency == expected_urgency
+        under = URGENCY_LEVELS.index(result.urgency) < URGENCY_LEVELS.index(expected_urgency)
+        if (expected is not None and result.condition != expected) or result.urgency != expected_urgency:
+            misses.append({"symptoms": symptoms, "age": age, "expected": expected, "got": result.condition,
+                           "expected_urgency": expected_urgency, "got_urgency": result.urgency,
+                           "under_triage": under})
+    return {
+        "cases": len(CASES),
+        "top1": round(top1 / labelled, 3),
+        "top3": round(top3 / labelled, 3),
+        "urgency": round(urgency / len(CASES), 3),
+        "under_triaged": sum(m["under_triage"] for m in misses),
+        "misses": misses,
+    }
+
+
+def latency(fn, min_seconds):
+    samples = []
+    deadline = time.perf_counter() + min_seconds
+    while time.perf_counter() < deadline or len(samples) < 20:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0, help="minimum time spent per latency measurement")
+    parser.add_argument("--batch", type=int, default=100, help="checks per assess_many call")
+    parser.add_argument("--min-accuracy", type=float, default=0.8, help="required top-1 accuracy")
+    parser.add_argument("--json", dest="json_path", default=None, help="write results here instead of bench/results/")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    engine = TriageEngine()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    acc = accuracy(engine)
+    print(f"{acc['cases']} cases: top-1 {acc['top1']:.1%}, top-3 {acc['top3']:.1%}, "
+          f"urgency {acc['urgency']:.1%}, under-triaged {acc['under_triaged']}")
+    for miss in acc["misses"]:
+        flag = "  UNDER-TRIAGED" if miss["under_triage"] else ""
+        print(f"  {', '.join(miss['symptoms'])} ({miss['age']}): expected {miss['expected']} / "
+              f"{miss['expected_urgency']}, got {miss['got']} / {miss['got_urgency']}{flag}")
+
+    single = latency(lambda: engine.assess(["fever", "cough", "headache"], 30, "male"), args.seconds)
+    checks = [(symptoms, age, gender) for symptoms, age, gender, _, _ in CASES]
+    checks = (checks * (args.batch // len(checks) + 1))[:args.batch]
+    batch = [s / args.batch for s in latency(lambda: engine.assess_many(checks), args.seconds)]
+    timings = {
+        "build_ms": round(build_ms, 2),
+        "single_p50_us": round(percentile(single, 50) * 1e6, 1),
+        "single_p99_us": round(percentile(single, 99) * 1e6, 1),
+        "batch_p50_us_per_check": round(percentile(batch, 50) * 1e6, 1),
+        "batch_p99_us_per_check": round(percentile(batch, 99) * 1e6, 1),
+    }
+    print(f"engine build {timings['build_ms']} ms (includes importing NumPy)")
+    print(f"single check: p50 {timings['single_p50_us']} us, p99 {timings['single_p99_us']} us")
+    print(f"batch of {args.batch}: p50 {timings['batch_p50_us_per_check']} us/check, "
+          f"p99 {timings['batch_p99_us_per_check']} us/check")
+
+    path = save_results("triage", {"config": {"batch": args.batch, "seconds": args.seconds},
+                                   "accuracy": acc, "latency": timings}, args.json_path)
+    print(f"\nResults written to {path}")
+    sys.exit(1 if acc["top1"] < args.min_accuracy or acc["under_triaged"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Fill the structured Diagnosis columns of existing rows in from the saved
+user_diagnosis text. The columns themselves come from the migrations, so
+run `alembic upgrade head` first.
+
+    python -m scripts.backfill_diagnosis_fields [--batch-size 500]
+
+Safe to re-run: only rows whose predicted_disease is still NULL are parsed.
+Rows are walked by id in batches, one commit per batch, so a large table
+never sits in one transaction; each batch loads its DiagnosisSymptoms rows in
+one extra query rather than one per diagnosis.
+"""
+import argparse
+
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import selectinload
+
+from app import crud, models
+from app.database import SessionLocal, engine
+
+STRUCTURED_COLUMNS = ("predicted_disease", "urgency", "suggested_treatment")
+
+
+def check_schema():
+    table = models.Diagnosis.__table__
+    existing = {c["name"] for c in inspect(engine).get_columns(table.name)}
+    missing = [name for name in STRUCTURED_COLUMNS if name not in existing]
+    if missing:
+        raise SystemExit(f"{table.name} has no {', '.join(missing)} column: run `alembic upgrade head` first")
+
+
+def backfill(batch_size):
+    last_id = 0
+    updated = 0
+    while True:
+        with SessionLocal() as db:
+            rows = db.scalars(
+                select(models.Diagnosis)
+                .options(selectinload(models.Diagnosis.symptoms))
+                .where(models.Diagnosis.id > last_id, models.Diagnosis.predicted_disease.is_(None))
+                .order_by(models.Diagnosis.id)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                crud.set_diagnosis_details(row)
+                updated += row.predicted_disease is not None
+            last_id = rows[-1].id
+            db.commit()
+        print(f"Processed up to id {last_id} ({updated} rows parsed)")
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    check_schema()
+    updated = backfill(args.batch_size)
+    print(f"Done: {updated} diagnoses backfilled")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+EXPLAIN every SELECT the routers issue and fail if any of them scans a whole
+table.
+
+    python -m scripts.check_query_plans [--verbose]
+
+A throwaway SQLite database is migrated to head and each route is driven
+through the TestClient; the SELECTs seen on the engine are then EXPLAINed
+with the parameters they actually ran with. Set SQLALCHEMY_DATABASE_URL to
+an empty MySQL schema to check MySQL plans instead (`type = ALL` counts as a
+full scan there). Exits 1 when a route outside ALLOWED_FULL_SCANS scans.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+
+# Must be configured before the app modules read their settings
+if not os.getenv("SQLALCHEMY_DATABASE_URL"):
+    os.environ["SQLALCHEMY_DATABASE_URL"] = \
+        f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='merocare-plans-'), 'plans.db')}"
+os.environ.setdefault("SECRET_KEY", "query-plan-check")
+# Every query then runs on the sync engine the listener is attached to
+os.environ["DB_ASYNC"] = "false"
+
+from alembic import command  # noqa: E402
+from alembic.config import Config  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app.database import engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Routes that are expected to read a whole table
+ALLOWED_FULL_SCANS = {
+    "GET /users/",    # unfiltered user listing
+}
+
+SQLITE_SCAN = re.compile(r"^SCAN (\w+)(?! USING (?:COVERING )?INDEX| USING INTEGER PRIMARY KEY)")
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.route = None
+        self.queries = []    # [(route, statement, parameters)]
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.route and statement.lstrip().upper().startswith("SELECT"):
+            self.queries.append((self.route, statement, parameters))
+
+
+def exercise(client, recorder):
+    """Call every DB-backed route once, with enough data for each to do real work."""
+
+    def call(route, method, path, **kwargs):
+        recorder.route = route
+        response = client.request(method, path, **kwargs)
+        recorder.route = None
+        if response.status_code >= 400:
+            raise RuntimeError(f"{route} returned {response.status_code}: {response.text}")
+        return response.json()
+
+    users = {}
+    for name, gender in (("asha", "female"), ("bikash", "male"), ("chandra", "male")):
+        email = f"{name}@example.com"
+        users[name] = call("POST /signup", "POST", "/signup", json={
+            "email": email, "full_name": name.title(), "gender": gender, "password": "plans-password"})
+        tokens = call("POST /login", "POST", "/login", data={"username": email, "password": "plans-password"})
+        users[name]["headers"] = {"Authorization": f"Bearer {tokens['access_token']}"}
+        users[name]["refresh_token"] = tokens["refresh_token"]
+    asha, bikash, chandra = users["asha"], users["bikash"], users["chandra"]
+
+    call("GET /users/me", "GET", "/users/me", headers=asha["headers"])
+    call("GET /users/{user_id}", "GET", f"/users/{bikash['id']}")
+    call("GET /users/", "GET", "/users/")
+    call("PUT /users/me", "PUT", "/users/me", headers=asha["headers"], json={"blood_group": "O+"})
+    call("POST /token/refresh", "POST", "/token/refresh", json={"refresh_token": chandra["refresh_token"]})
+
+    call("POST /family/invite", "POST", "/family/invite", json={
+        "sender_id": asha["id"], "receiver_email": "bikash@example.com", "role_for_receiver": "Brother"})
+    invite = call("GET /family/pending-requests/{user_id}", "GET", f"/family/pending-requests/{bikash['id']}")[0]
+    call("GET /family/sent-invites", "GET", "/family/sent-invites", headers=asha["headers"])
+    call("POST /family/accept/{request_id}", "POST", f"/family/accept/{invite['invite_id']}")
+    call("POST /family/invite", "POST", "/family/invite", json={
+        "sender_id": asha["id"], "receiver_email": "chandra@example.com", "role_for_receiver": "Father"})
+    invite = call("GET /family/pending-requests/{user_id}", "GET", f"/family/pending-requests/{chandra['id']}")[0]
+    call("POST /family/reject/{request_id}", "POST", f"/family/reject/{invite['invite_id']}")
+    call("GET /family/list/{user_id}", "GET", f"/family/list/{asha['id']}")
+
+    saved = []
+    for day in (1, 2, 3):
+        saved.append(call("POST /diagnosis/save-history", "POST", "/diagnosis/save-history",
+                          headers=bikash["headers"], json={
+                              "user_diagnosis": "Symptoms:fever, cough\n\nPredicted Disease: Flu\n\nUrgency Level: ROUTINE",
+                              "created_at": f"2025-01-0{day}T08:00:00Z",
+                              "visibility": "public",
+                          })["id"])
+    call("GET /diagnosis/my", "GET", "/diagnosis/my", headers=bikash["headers"])
+    call("GET /diagnosis/my", "GET", "/diagnosis/my", headers=bikash["headers"], params={"urgency": "routine"})
+    page = call("GET /diagnosis/my/page", "GET", "/diagnosis/my/page", headers=bikash["headers"], params={"limit": 2})
+    call("GET /diagnosis/my/page", "GET", "/diagnosis/my/page", headers=bikash["headers"],
+         params={"limit": 2, "cursor": page["next_cursor"]})
+    call("PATCH /diagnosis/update-visibility/{diagnosis_id}", "PATCH",
+         f"/diagnosis/update-visibility/{saved[0]}", headers=bikash["headers"], params={"visibility": "private"})
+    call("GET /family/member-history/{target_user_id}", "GET", f"/family/member-history/{bikash['id']}",
+         params={"requester_id": asha["id"]})
+    call("DELETE /diagnosis/delete/{diagnosis_id}", "DELETE", f"/diagnosis/delete/{saved[1]}",
+         headers=bikash["headers"])
+
+    snapshot = call("GET /sync", "GET", "/sync", headers=asha["headers"])
+    call("GET /sync", "GET", "/sync", headers=bikash["headers"], params={"since": "1"})
+    call("GET /sync", "GET", "/sync", headers=asha["headers"], params={"since": snapshot["version"]})
+
+    call("POST /users/change_password", "POST", "/users/change_password", headers=chandra["headers"],
+         json={"old_password": "plans-password", "new_password": "plans-password-2"})
+
+
+def full_scans(conn, statement, parameters):
+    """Tables the statement reads end to end, according to the database's EXPLAIN."""
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        plan = [row[-1] for row in rows]
+        return plan, [m.group(1) for m in map(SQLITE_SCAN.match, plan) if m]
+    rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).mappings().all()
+    plan = [f"{row['table']}: type={row['type']} key={row['key']}" for row in rows]
+    return plan, [row["table"] for row in rows if row["type"] == "ALL"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verbose", action="store_true", help="print the plan of every query")
+    args = parser.parse_args()
+
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    command.upgrade(config, "head")
+
+    recorder = QueryRecorder()
+    event.listen(engine, "before_cursor_execute", recorder)
+    with TestClient(app) as client:
+        exercise(client, recorder)
+    event.remove(engine, "before_cursor_execute", recorder)
+
+    failures = []
+    seen = set()
+    with engine.connect() as conn:
+        for route, statement, parameters in recorder.queries:
+            if (route, statement) in seen:
+                continue
+            seen.add((route, statement))
+            plan, scanned = full_scans(conn, statement, parameters)
+            if args.verbose:
+                print(f"{route}\n  {' '.join(statement.split())}\n  " + "\n  ".join(plan))
+            if scanned and route not in ALLOWED_FULL_SCANS:
+                failures.append((route, statement, scanned))
+
+    print(f"Checked {len(seen)} distinct queries from {len({route for route, _ in seen})} routes")
+    for route, statement, scanned in failures:
+        print(f"FULL SCAN of {', '.join(scanned)} in {route}:\n  {' '.join(statement.split())}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Shared fixtures for the backend tests.
+
+Settings are read once when app.config is first imported, so the test
+environment is set here before anything from app/ is loaded: a throwaway
+SQLite database migrated to head, cheap bcrypt, and Groq answered by the
+fake server in bench/fake_groq.py, mounted in-process.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TMP_DIR = tempfile.mkdtemp(prefix="merocare-tests-")
+DATABASE_URL = f"sqlite:///{os.path.join(TMP_DIR, 'test.db')}"
+
+os.environ.update(
+    SQLALCHEMY_DATABASE_URL=DATABASE_URL,
+    SECRET_KEY="test-secret",
+    GROQ_API_KEY="test",
+    BCRYPT_ROUNDS="4",
+    LOG_LEVEL="WARNING",
+)
+
+
+def alembic(*args, url=DATABASE_URL):
+    """Run the alembic CLI against `url`; returns the CompletedProcess."""
+    return subprocess.run(
+        [sys.executable, "-m", "alembic", "-x", f"url={url}", *args],
+        cwd=ROOT, env=os.environ, capture_output=True, text=True,
+    )
+
+
+@pytest.fixture(scope="session")
+def run_alembic():
+    return alembic
+
+
+@pytest.fixture(scope="session", autouse=True)
+def migrated_database():
+    result = alembic("upgrade", "head")
+    assert result.returncode == 0, result.stderr
+    return DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def app(migrated_database):
+    from app.main import app
+    return app
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    """One TestClient (one event loop) for the whole run; the app's asyncio state is bound to it."""
+    import httpx
+    from fastapi.testclient import TestClient
+    from groq import AsyncGroq
+
+    from app.llm import llm_client
+    from bench import fake_groq
+
+    with TestClient(app) as test_client:
+        llm_client._client = AsyncGroq(
+            api_key="test",
+            base_url="http://fake-groq",
+            max_retries=0,
+            http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=fake_groq.app)),
+        )
+        yield test_client
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """Reset in-process state that would leak between tests."""
+    from app.cache import symptom_cache
+    from app.idempotency import idempotency_store
+    from app.llm import llm_client
+    from app.llm_scheduler import CircuitBreaker
+    from app.oauth2 import identity_cache
+    from app.semantic_cache import semantic_cache
+    from bench import fake_groq
+
+    symptom_cache.clear()
+    identity_cache.clear()
+    idempotency_store.clear()
+    if semantic_cache is not None:
+        semantic_cache.clear()
+    llm_client.scheduler.breaker = CircuitBreaker()
+    fake_groq.faults.update(latency=0.0, rpm=0, error_rate=0.0)
+    fake_groq.app.state.calls = fake_groq.app.state.throttled = fake_groq.app.state.failed = 0
+    yield
+
+
+@pytest.fixture
+def groq_calls():
+    """Completions the fake Groq has answered so far in this test."""
+    from bench import fake_groq
+    return lambda: fake_groq.app.state.calls
+
+
+@pytest.fixture
+def make_user(client):
+    """Sign up and log in a new user; returns (user id, auth headers, login response body)."""
+    def make(gender="male", password="pw", full_name=None):
+        email = f"{uuid.uuid4().hex[:12]}@example.com"
+        response = client.post("/signup", json={
+            "email": email, "full_name": full_name or email.split("@")[0],
+            "gender": gender, "password": password,
+        })
+        assert response.status_code == 200, response.text
+        tokens = client.post("/login", data={"username": email, "password": password}).json()
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        return response.json()["id"], headers, {**tokens, "email": email}
+    return make
@@ -0,0 +1,84 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app import crud, database, models, oauth2
+from app.database import SessionLocal, ThreadedSession, async_url
+
+
+def test_async_url_swaps_in_the_async_driver():
+    assert str(async_url("sqlite:///x.db")) == "sqlite+aiosqlite:///x.db"
+    assert async_url("mysql+pymysql://u:p@db/m").drivername == "mysql+aiomysql"
+    assert async_url("oracle://u:p@db/m").drivername == "oracle"
+
+
+async def threaded_session():
+    return ThreadedSession(SessionLocal()), None
+
+
+async def async_session():
+    engine = create_async_engine(async_url(database.SQLALCHEMY_DATABASE_URL))
+    return AsyncSession(engine, expire_on_commit=False), engine
+
+
+@pytest.mark.parametrize("open_session", [threaded_session, async_session])
+def test_diagnosis_round_trip(make_user, open_session):
+    user_id, _, _ = make_user()
+
+    async def main():
+        db, engine = await open_session()
+        try:
+            saved = await crud.save_diagnosis(db, models.Diagnosis(user_id=user_id, user_diagnosis="x", visibility="private"))
+            assert (await crud.get_diagnosis(db, saved.id)).user_diagnosis == "x"
+            latest = (await db.execute(select(models.ChangeLog.op, models.ChangeLog.user_id).where(
+                models.ChangeLog.entity == "diagnosis", models.ChangeLog.entity_id == saved.id
+            ).order_by(models.ChangeLog.id.desc()).limit(1))).one()
+            assert tuple(latest) == ("upsert", user_id)
+
+            await db.delete(await crud.get_diagnosis(db, saved.id))
+            await db.commit()
+            assert await crud.get_diagnosis(db, saved.id) is None
+        finally:
+            await db.close()
+            if engine is not None:
+                await engine.dispose()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("open_session", [threaded_session, async_session])
+def test_current_user_through_the_async_session(make_user, open_session, monkeypatch):
+    user_id, headers, _ = make_user()
+    token = headers["Authorization"].split()[1]
+    # Force the revocation reload through the async session as well
+    monkeypatch.setattr(oauth2.revocation_index, "_loaded_at", None)
+
+    async def main():
+        db, engine = await open_session()
+        try:
+            uncached = await oauth2.get_current_user_async(token, db)
+            cached = await oauth2.get_current_user_async(token, db)
+            return uncached.id, cached.id, await oauth2.get_current_user_id_async(token, db)
+        finally:
+            await db.close()
+            if engine is not None:
+                await engine.dispose()
+
+    assert asyncio.run(main()) == (user_id, user_id, user_id)
+
+
+def test_async_routes_authenticate_through_the_async_session():
+    from app.main import app
+
+    def dependencies(dependant):
+        for sub in dependant.dependencies:
+            yield sub.call
+            yield from dependencies(sub)
+
+    for route in app.routes:
+        path = getattr(route, "path", "")
+        if (path.startswith("/diagnosis") or path in ("/signup", "/login")) and asyncio.iscoroutinefunction(route.endpoint):
+            calls = set(dependencies(route.dependant))
+            assert not calls & {oauth2.get_current_user, oauth2.get_current_user_id, database.get_db}, route.path
@@ -0,0 +1,43 @@
+from app.oauth2 import identity_cache
+
+
+def join_family(client, make_user):
+    sender_id, sender_headers, _ = make_user()
+    receiver_id, receiver_headers, receiver = make_user(gender="female")
+    client.post("/family/invite", json={"sender_id": sender_id, "receiver_email": receiver["email"],
+                                        "role_for_receiver": "Sister"})
+    [invite] = client.get(f"/family/pending-requests/{receiver_id}").json()
+    return sender_id, receiver_id, receiver_headers, invite["invite_id"]
+
+
+def test_repeat_requests_are_served_from_the_identity_cache(client, make_user):
+    user_id, headers, _ = make_user(full_name="Asha")
+    client.get("/users/me", headers=headers)
+    hits = identity_cache.stats()["hits"]
+
+    assert client.get("/users/me", headers=headers).json()["full_name"] == "Asha"
+    assert identity_cache.stats()["hits"] == hits + 1
+
+
+def test_profile_update_is_visible_on_the_next_request(client, make_user):
+    _, headers, _ = make_user(full_name="Asha")
+    client.get("/users/me", headers=headers)
+
+    client.put("/users/me", headers=headers, json={"full_name": "Asha K", "gender": "female"})
+
+    me = client.get("/users/me", headers=headers).json()
+    assert (me["full_name"], me["gender"]) == ("Asha K", "female")
+
+
+def test_joining_a_family_shows_up_in_sync_right_away(client, make_user):
+    sender_id, receiver_id, headers, invite_id = join_family(client, make_user)
+    before = client.get("/sync", headers=headers).json()   # caches the receiver without a family
+
+    client.post(f"/family/accept/{invite_id}")
+
+    delta = client.get("/sync", headers=headers, params={"since": before["version"]}).json()
+    assert delta["family_members"] is not None
+    assert {m["id"] for m in delta["family_members"]} == {sender_id, receiver_id}
+    full = client.get("/sync", headers=headers).json()
+    listed = client.get(f"/family/list/{receiver_id}").json()
+    assert len(full["family_members"]) == len(listed) == 2
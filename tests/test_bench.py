@@ -0,0 +1,44 @@
+import json
+import subprocess
+import sys
+
+from bench.common import ROOT, percentile, save_results, summarize
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([3.0], 95) == 3.0
+    assert percentile([], 50) is None
+
+
+def test_summary_counts_errors_in_throughput():
+    summary = summarize([0.010, 0.020, 0.030], errors=1, elapsed=2.0)
+
+    assert summary["requests"] == 4 and summary["throughput_rps"] == 2.0
+    assert (summary["p50_ms"], summary["p99_ms"]) == (20.0, 30.0)
+
+
+def compare(tmp_path, old, new):
+    paths = [save_results("micro", {"benchmarks": rows}, path=str(tmp_path / f"{name}.json"))
+             for name, rows in (("old", old), ("new", new))]
+    return subprocess.run([sys.executable, "-m", "bench.compare", *paths], cwd=ROOT, capture_output=True, text=True)
+
+
+def test_saved_results_carry_run_metadata(tmp_path):
+    path = save_results("micro", {"benchmarks": {}}, path=str(tmp_path / "r.json"))
+
+    with open(path) as f:
+        saved = json.load(f)
+    assert saved["benchmark"] == "micro"
+    assert {"timestamp", "commit", "python", "cpus"} <= set(saved["meta"])
+
+
+def test_compare_flags_regressions_beyond_the_threshold(tmp_path):
+    steady = compare(tmp_path, {"suggest": {"p50_us": 100}}, {"suggest": {"p50_us": 105}})
+    slower = compare(tmp_path, {"suggest": {"p50_us": 100}}, {"suggest": {"p50_us": 150}})
+
+    assert steady.returncode == 0
+    assert slower.returncode == 1 and "regression" in slower.stdout
@@ -0,0 +1,56 @@
+import pytest
+
+from app import cache
+from app.cache import CacheBackend, MemoryBackend, NullBackend, TTLCache, symptom_cache_key
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    ttl_cache = TTLCache(maxsize=10, ttl=5)
+    ttl_cache.set("a", 1)
+
+    assert ttl_cache.get("a") == 1
+    now[0] += 5
+    assert ttl_cache.get("a") is None
+    assert len(ttl_cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    ttl_cache = TTLCache(maxsize=2, ttl=60)
+    ttl_cache.set("a", 1)
+    ttl_cache.set("b", 2)
+    ttl_cache.get("a")
+    ttl_cache.set("c", 3)
+
+    assert ttl_cache.get("b") is None
+    assert ttl_cache.get("a") == 1
+    assert ttl_cache.stats()["evictions"] == 1
+
+
+def test_symptom_cache_key_ignores_order_case_and_age_within_band():
+    assert symptom_cache_key(["Fever", " cough"], 31, "Male") == symptom_cache_key(["cough", "fever"], 35, "male")
+    assert symptom_cache_key(["fever"], 31, "male") != symptom_cache_key(["fever"], 70, "male")
+    assert symptom_cache_key(["fever"], 31, "male") != symptom_cache_key(["fever"], 31, "female")
+
+
+def test_incomplete_backend_fails_when_instantiated():
+    class Incomplete(CacheBackend):
+        async def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    MemoryBackend()
+    NullBackend()
+
+
+def test_repeated_check_is_answered_from_the_cache(client, groq_calls):
+    hits = client.get("/diagnosis/cache/stats").json()["hits"]
+    first = client.post("/diagnosis/check", json={"symptoms": ["fever", "cough"], "age": 31, "gender": "male"})
+    second = client.post("/diagnosis/check", json={"symptoms": ["Cough", "fever"], "age": 35, "gender": "Male"})
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["predicted_disease"] == first.json()["predicted_disease"]
+    assert groq_calls() == 1
+    assert client.get("/diagnosis/cache/stats").json()["hits"] == hits + 1
@@ -0,0 +1,37 @@
+from app.routers import diagnosis
+
+
+def item(symptoms, age=30, gender="male"):
+    return {"symptoms": symptoms, "age": age, "gender": gender}
+
+
+def test_batch_answers_in_order_and_dedupes_identical_items(client, groq_calls):
+    items = [item(["headache"]), item(["rash"]), item(["Headache"], age=33)]
+    response = client.post("/diagnosis/check-batch", json=items)
+
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert all(r["status_code"] == 200 for r in results)
+    assert results[1]["result"]["symptoms"] == "rash"
+    assert groq_calls() == 2
+
+
+def test_batch_reports_per_item_errors(client, monkeypatch):
+    async def flaky(data, key=None):
+        if "rash" in data.symptoms:
+            raise diagnosis.HTTPException(status_code=502, detail="AI service error")
+        return {"predicted_disease": "Flu", "suggested_treatment": "Rest", "urgency": "ROUTINE",
+                "full_response": "{}"}
+
+    monkeypatch.setattr(diagnosis, "diagnosis_fields", flaky)
+    results = client.post("/diagnosis/check-batch", json=[item(["rash"]), item(["cough"])]).json()
+
+    assert results[0] == {"index": 0, "status_code": 502, "result": None, "error": "AI service error"}
+    assert results[1]["status_code"] == 200 and results[1]["result"]["predicted_disease"] == "Flu"
+
+
+def test_batch_over_the_limit_is_rejected(client):
+    items = [item([f"s{i}"]) for i in range(diagnosis.BATCH_MAX_ITEMS + 1)]
+
+    assert client.post("/diagnosis/check-batch", json=items).status_code == 413
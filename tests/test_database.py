@@ -0,0 +1,47 @@
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app import database
+from app.database import TimedQueuePool, engine_options, pool_timeouts
+
+
+def test_in_memory_sqlite_keeps_the_default_pool():
+    assert engine_options("sqlite://") == {}
+    options = engine_options("mysql+pymysql://u:p@db/merocare")
+    assert options["poolclass"] is TimedQueuePool
+    assert options["pool_size"] == database.DB_POOL_SIZE
+    assert options["pool_recycle"] == database.DB_POOL_RECYCLE
+
+
+def test_pool_timeout_is_counted():
+    small = create_engine(database.SQLALCHEMY_DATABASE_URL, poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    timeouts = pool_timeouts.value()
+    try:
+        with small.connect() as held:
+            held.execute(text("select 1"))
+            with pytest.raises(exc.TimeoutError):
+                small.connect()
+    finally:
+        small.dispose()
+
+    assert pool_timeouts.value() == timeouts + 1
+
+
+def test_pool_gauges_follow_checkouts(client):
+    def in_use():
+        line = next(l for l in client.get("/metrics").text.splitlines()
+                    if l.startswith('merocare_db_pool_in_use{engine="sync"}'))
+        return int(line.rsplit(" ", 1)[1])
+
+    before = in_use()
+    with database.engine.connect():
+        assert in_use() == before + 1
+    assert in_use() == before
+
+
+def test_queries_are_timed_per_operation():
+    selects = database.query_seconds.count(operation="SELECT")
+    with database.engine.connect() as conn:
+        conn.execute(text("select 1"))
+
+    assert database.query_seconds.count(operation="SELECT") == selects + 1
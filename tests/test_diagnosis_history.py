@@ -0,0 +1,113 @@
+from sqlalchemy import event, update
+
+from app import models
+from app.database import SessionLocal, engine
+from app.utils import parse_diagnosis_text
+from scripts.backfill_diagnosis_fields import backfill
+
+SAVED_TEXT = ("Symptoms:Fever, Cough\n\n ✅ Predicted Disease: Influenza\n\n"
+              "Treatment: Rest and fluids\n\nUrgency Level: URGENT (see a doctor today)")
+
+
+def save(client, headers, text=SAVED_TEXT, created_at="2026-01-01T08:00:00Z", **fields):
+    response = client.post("/diagnosis/save-history", headers=headers, json={
+        "user_diagnosis": text, "visibility": "private", "created_at": created_at, **fields,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def stored_symptoms(diagnosis_id):
+    with SessionLocal() as db:
+        return [s.symptom for s in db.get(models.Diagnosis, diagnosis_id).symptoms]
+
+
+def test_parse_diagnosis_text():
+    assert parse_diagnosis_text(SAVED_TEXT) == {
+        "symptoms": ["fever", "cough"],
+        "predicted_disease": "Influenza",
+        "suggested_treatment": "Rest and fluids",
+        "urgency": "URGENT",
+    }
+    assert parse_diagnosis_text("free text")["predicted_disease"] is None
+
+
+def test_saved_text_is_stored_in_structured_columns(client, make_user):
+    _, headers, _ = make_user()
+    diagnosis_id = save(client, headers)
+
+    [row] = client.get("/diagnosis/my", headers=headers).json()
+    assert row["diagnosis_result"] == "Influenza"
+    assert row["urgency"] == "URGENT"
+    assert row["treatment"] == "Rest and fluids"
+    assert stored_symptoms(diagnosis_id) == ["fever", "cough"]
+
+
+def test_explicit_fields_win_over_the_parsed_text(client, make_user):
+    _, headers, _ = make_user()
+    diagnosis_id = save(client, headers, predicted_disease="Common Cold", urgency="routine", symptoms=["Sneezing"])
+
+    [row] = client.get("/diagnosis/my", headers=headers).json()
+    assert (row["diagnosis_result"], row["urgency"]) == ("Common Cold", "ROUTINE")
+    assert stored_symptoms(diagnosis_id) == ["sneezing"]
+
+
+def test_history_pages_walk_every_row_once_newest_first(client, make_user):
+    _, headers, _ = make_user()
+    # Two rows share a timestamp, so the id tiebreak decides their order
+    stamps = ["2026-01-01T08:00:00Z", "2026-01-02T08:00:00Z", "2026-01-02T08:00:00Z",
+              "2026-01-03T08:00:00Z", "2026-01-04T08:00:00Z"]
+    ids = [save(client, headers, created_at=stamp) for stamp in stamps]
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/diagnosis/my/page", headers=headers, params=params).json()
+        assert len(page["items"]) <= 2
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == [ids[4], ids[3], ids[2], ids[1], ids[0]]
+    assert "user_diagnosis" not in page["items"][0]
+
+
+def test_history_page_filters(client, make_user):
+    _, headers, _ = make_user()
+    save(client, headers, created_at="2026-01-01T08:00:00Z", urgency="ROUTINE")
+    recent = save(client, headers, created_at="2026-02-01T08:00:00Z")
+
+    since = client.get("/diagnosis/my/page", headers=headers, params={"since": "2026-01-15T00:00:00Z"}).json()
+    assert [item["id"] for item in since["items"]] == [recent]
+    urgent = client.get("/diagnosis/my/page", headers=headers, params={"urgency": "urgent"}).json()
+    assert [item["id"] for item in urgent["items"]] == [recent]
+
+
+def test_history_page_rejects_a_malformed_cursor(client, make_user):
+    _, headers, _ = make_user()
+
+    assert client.get("/diagnosis/my/page", headers=headers, params={"cursor": "garbage"}).status_code == 400
+
+
+def test_backfill_loads_symptoms_once_per_batch(client, make_user):
+    _, headers, _ = make_user()
+    ids = [save(client, headers) for _ in range(6)]
+    with SessionLocal() as db:
+        db.execute(update(models.Diagnosis).where(models.Diagnosis.id.in_(ids)).values(predicted_disease=None))
+        db.commit()
+
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        assert backfill(batch_size=3) >= 6
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    symptom_loads = [s for s in statements if s.lstrip().startswith("SELECT") and 'FROM "DiagnosisSymptoms"' in s]
+    assert len(symptom_loads) <= 3
+    assert all(stored_symptoms(i) == ["fever", "cough"] for i in ids)
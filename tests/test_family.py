@@ -0,0 +1,88 @@
+import contextlib
+
+import pytest
+from sqlalchemy import event
+
+from app import models
+from app.database import SessionLocal, engine
+from app.revocation import revocation_index
+
+
+@contextlib.contextmanager
+def count_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def add_invites(sender_ids, receiver_ids):
+    with SessionLocal() as db:
+        db.add_all(models.FamilyConnection(sender_id=sender_id, receiver_id=receiver_id, receiver_role="Cousin")
+                   for sender_id, receiver_id in zip(sender_ids, receiver_ids))
+        db.commit()
+
+
+@pytest.fixture
+def quiet_revocations(monkeypatch):
+    # Keep the periodic revocation reload out of the statement counts
+    monkeypatch.setattr(revocation_index, "refresh_seconds", 3600)
+
+
+def pending_statements(client, make_user, count):
+    receiver_id, _, _ = make_user()
+    sender_ids = [make_user()[0] for _ in range(3)]
+    add_invites([sender_ids[i % 3] for i in range(count)], [receiver_id] * count)
+
+    with count_statements() as statements:
+        invites = client.get(f"/family/pending-requests/{receiver_id}", params={"limit": 200}).json()
+    assert len(invites) == count
+    return len(statements)
+
+
+def sent_statements(client, make_user, count):
+    sender_id, headers, _ = make_user()
+    receiver_ids = [make_user()[0] for _ in range(3)]
+    add_invites([sender_id] * count, [receiver_ids[i % 3] for i in range(count)])
+    client.get("/family/sent-invites", headers=headers)  # warm the identity cache
+
+    with count_statements() as statements:
+        invites = client.get("/family/sent-invites", headers=headers, params={"limit": 200}).json()
+    assert len(invites) == count
+    assert all(invite["to_name"] != "Unknown/Deleted User" for invite in invites)
+    return len(statements)
+
+
+@pytest.mark.parametrize("statements", [pending_statements, sent_statements])
+def test_invite_listings_do_not_query_per_invite(client, make_user, quiet_revocations, statements):
+    assert statements(client, make_user, 3) == statements(client, make_user, 30)
+
+
+def test_invite_listings_reject_a_negative_skip(client, make_user):
+    user_id, headers, _ = make_user()
+
+    assert client.get(f"/family/pending-requests/{user_id}", params={"skip": -1}).status_code == 422
+    assert client.get("/family/sent-invites", headers=headers, params={"skip": -1}).status_code == 422
+
+
+def test_invite_listings_filter_on_the_status_query_parameter(client, make_user):
+    sender_id, headers, _ = make_user()
+    receiver_id, _, _ = make_user()
+    add_invites([sender_id], [receiver_id])
+    with SessionLocal() as db:
+        db.add(models.FamilyConnection(sender_id=sender_id, receiver_id=receiver_id, receiver_role="Cousin",
+                                       status="accepted"))
+        db.commit()
+
+    pending = client.get(f"/family/pending-requests/{receiver_id}").json()
+    accepted = client.get(f"/family/pending-requests/{receiver_id}", params={"status": "accepted"}).json()
+    assert len(pending) == len(accepted) == 1 and pending[0]["invite_id"] != accepted[0]["invite_id"]
+    sent = client.get("/family/sent-invites", headers=headers, params={"status": "accepted"}).json()
+    assert [invite["status"] for invite in sent] == ["accepted"]
+    assert len(client.get("/family/sent-invites", headers=headers).json()) == 2
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.idempotency import IdempotencyStore, fingerprint
+
+CHECK = {"symptoms": ["headache"], "age": 30, "gender": "male"}
+
+
+def test_fingerprint_ignores_key_order():
+    assert fingerprint({"a": 1, "b": 2}) == fingerprint({"b": 2, "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+
+def test_concurrent_duplicates_run_once_and_failures_are_not_stored():
+    store = IdempotencyStore(maxsize=10, ttl=60)
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return len(runs)
+
+    async def fail():
+        raise ValueError("upstream down")
+
+    async def main():
+        digest = fingerprint(CHECK)
+        results = await asyncio.gather(*(store.run("check", "k", digest, work) for _ in range(3)))
+        with pytest.raises(ValueError):
+            await store.run("check", "other", digest, fail)
+        return results, await store.run("check", "other", digest, work)
+
+    assert asyncio.run(main()) == ([1, 1, 1], 2)
+    assert store.replayed == 2 and len(store) == 2
+
+
+def test_key_reused_with_another_body_is_a_conflict():
+    store = IdempotencyStore(maxsize=10, ttl=60)
+
+    async def work():
+        return "answer"
+
+    async def main():
+        await store.run("check", "k", fingerprint(CHECK), work)
+        await store.run("check", "k", fingerprint({**CHECK, "age": 31}), work)
+
+    with pytest.raises(HTTPException) as conflict:
+        asyncio.run(main())
+    assert conflict.value.status_code == 422 and store.conflicts == 1
+
+
+def test_check_replays_for_the_same_key(client):
+    headers = {"Idempotency-Key": "check-1"}
+    first = client.post("/diagnosis/check", json=CHECK, headers=headers)
+    second = client.post("/diagnosis/check", json=CHECK, headers=headers)
+
+    assert first.status_code == second.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert second.json() == first.json()
+    assert client.post("/diagnosis/check", json={**CHECK, "age": 60}, headers=headers).status_code == 422
+
+
+def test_save_history_retry_does_not_insert_twice(client, make_user):
+    body = {"user_diagnosis": "Symptoms:Fever", "visibility": "private", "created_at": "2026-01-01T08:00:00Z"}
+    ids = []
+    for _ in range(2):
+        _, headers, _ = make_user()
+        headers = {**headers, "Idempotency-Key": "save-1"}
+        first = client.post("/diagnosis/save-history", json=body, headers=headers)
+        retry = client.post("/diagnosis/save-history", json=body, headers=headers)
+        assert first.status_code == retry.status_code == 200
+        assert retry.json()["id"] == first.json()["id"]
+        assert len(client.get("/diagnosis/my", headers=headers).json()) == 1
+        ids.append(first.json()["id"])
+
+    # Keys are scoped per user
+    assert ids[0] != ids[1]
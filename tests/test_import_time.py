@@ -0,0 +1,16 @@
+from bench.import_time import LAZY_MODULES, import_once, import_statement
+
+
+def test_app_import_leaves_heavy_dependencies_for_first_use():
+    imported = import_once("app.main")
+
+    assert "app.main" in imported
+    assert [name for name in LAZY_MODULES if name in imported] == []
+
+
+def test_statement_total_adds_up_each_top_level_import():
+    timings, total_ms = import_statement("import json, pytz")
+
+    assert total_ms * 1000 >= timings["json"][1] + timings["pytz"][1]
+    # pytz's own imports are inside its cumulative time, not added again
+    assert total_ms * 1000 < timings["json"][1] + timings["pytz"][1] + timings["pytz.tzinfo"][1]
@@ -0,0 +1,61 @@
+import io
+import json
+import logging
+
+from app import instrumentation, log
+from app.instrumentation import request_seconds, responses
+
+
+def test_requests_are_labelled_with_the_route_template(client, make_user):
+    user_id, _, _ = make_user()
+    route = "/family/list/{user_id}"
+    seen = request_seconds.count(method="GET", route=route)
+    ok = responses.value(method="GET", route=route, status="200")
+
+    client.get(f"/family/list/{user_id}")
+    client.get(f"/family/list/{user_id + 1000}")
+
+    assert request_seconds.count(method="GET", route=route) == seen + 2
+    assert responses.value(method="GET", route=route, status="200") == ok + 1
+    assert f'route="/family/list/{user_id}"' not in client.get("/metrics").text
+
+
+def test_unknown_paths_and_methods_share_bounded_labels(client):
+    unmatched = responses.value(method="GET", route=instrumentation.UNMATCHED_ROUTE, status="404")
+    wrong_method = responses.value(method="DELETE", route="/diagnosis/check", status="405")
+
+    client.get("/no/such/path")
+    client.delete("/diagnosis/check")
+
+    assert responses.value(method="GET", route=instrumentation.UNMATCHED_ROUTE, status="404") == unmatched + 1
+    assert responses.value(method="DELETE", route="/diagnosis/check", status="405") == wrong_method + 1
+
+
+def test_slow_requests_are_logged(client, monkeypatch, caplog):
+    monkeypatch.setattr(instrumentation, "LOG_SLOW_REQUEST_SECONDS", 0)
+
+    with caplog.at_level(logging.WARNING, logger="merocare"):
+        client.get("/")
+
+    [record] = [r for r in caplog.records if r.getMessage() == "slow request"]
+    assert (record.method, record.route, record.status) == ("GET", "/", 200)
+
+
+def test_log_lines_are_json_with_extra_fields():
+    stream = io.StringIO()
+    try:
+        log.configure(level="INFO", sample_rate=1, stream=stream)
+        log.get_logger("app.routers.test").info("user signed up", extra={"user_id": 7})
+    finally:
+        log.configure()
+
+    entry = json.loads(stream.getvalue())
+    assert entry["msg"] == "user signed up" and entry["user_id"] == 7
+    assert (entry["level"], entry["logger"]) == ("info", "merocare.routers.test")
+
+
+def test_sampling_never_drops_warnings():
+    sampler = log.SamplingFilter(rate=0)
+
+    assert not sampler.filter(logging.LogRecord("x", logging.INFO, "", 0, "m", None, None))
+    assert sampler.filter(logging.LogRecord("x", logging.WARNING, "", 0, "m", None, None))
@@ -0,0 +1,102 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.kinship import KinshipCache, KinshipGraph, apply_gender_to_role, classify
+
+
+def connection(sender_id, receiver_id, role):
+    return SimpleNamespace(sender_id=sender_id, receiver_id=receiver_id, receiver_role=role)
+
+
+@pytest.mark.parametrize("steps, role", [
+    ("PP", "Grandparent"), ("PB", "Uncle/Aunt"), ("SP", "Parent-in-law"),
+    ("CS", "Child-in-law"), ("PS", "Parent"), ("PBC", "Cousin"), ("BCC", "Grand-Nephew/Niece"),
+])
+def test_classify(steps, role):
+    assert classify(steps) == role
+
+
+class FakeQuery:
+    """Stands in for db.query(...).filter(...).all(); runs `during` while the rows are read."""
+
+    def __init__(self, rows, during=None):
+        self.rows = rows
+        self.during = during
+        self.reads = 0
+
+    def query(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def all(self):
+        self.reads += 1
+        if self.during:
+            self.during()
+        return self.rows
+
+
+def test_cache_reuses_a_graph_until_invalidated():
+    cache = KinshipCache(ttl=60)
+    db = FakeQuery([connection(1, 2, "Father")])
+
+    assert cache.get(db, "F1") is cache.get(db, "F1")
+    cache.invalidate("F1")
+    cache.get(db, "F1")
+    assert db.reads == 2
+
+
+def test_graph_read_before_an_invalidation_is_not_cached():
+    cache = KinshipCache(ttl=60)
+    stale = FakeQuery([connection(1, 2, "Father")], during=lambda: cache.invalidate("F1"))
+
+    assert cache.get(stale, "F1").relationship(1, 2) == "Father"
+    fresh = FakeQuery([connection(1, 2, "Father"), connection(2, 3, "Father")])
+    assert cache.get(fresh, "F1").relationship(1, 3) == "Grandparent"
+    assert fresh.reads == 1
+
+
+def test_graph_infers_roles_through_other_members():
+    # 2 is 1's father, 3 is 2's father
+    graph = KinshipGraph([connection(1, 2, "Father"), connection(2, 3, "Father")])
+
+    assert graph.relationship(1, 3) == "Grandparent"
+    assert graph.relationship(3, 1) == "Grandchild"
+    assert graph.relationship(1, 99) == "Family Member"
+
+
+def test_unset_direct_role_does_not_hide_an_inferred_one():
+    graph = KinshipGraph([connection(1, 2, "Father"), connection(2, 3, "Father"), connection(1, 3, "")])
+
+    assert graph.relationship(1, 3) == "Grandparent"
+    assert KinshipGraph([connection(1, 2, None)]).relationship(1, 2) == "Family Member"
+
+
+@pytest.mark.parametrize("role, gender, expected", [
+    ("Grand-Nephew/Niece", "female", "Grand-Niece"),
+    ("Great-Grandparent", "Male", "Great-Grandfather"),
+    ("Sibling-in-law", "male", "Brother-in-law"),
+    ("Cousin", "female", "Cousin"),
+    ("Parent", None, "Parent"),
+    ("", "male", "Family Member"),
+    (None, "female", "Family Member"),
+])
+def test_apply_gender_to_role(role, gender, expected):
+    assert apply_gender_to_role(role, gender) == expected
+
+
+def test_family_list_with_an_empty_invite_role(client, make_user):
+    sender_id, _, _ = make_user()
+    receiver_id, _, receiver = make_user(gender="female")
+    client.post("/family/invite", json={"sender_id": sender_id, "receiver_email": receiver["email"],
+                                        "role_for_receiver": ""})
+    [invite] = client.get(f"/family/pending-requests/{receiver_id}").json()
+    client.post(f"/family/accept/{invite['invite_id']}")
+
+    response = client.get(f"/family/list/{sender_id}")
+
+    assert response.status_code == 200
+    roles = {member["id"]: member["role"] for member in response.json()}
+    assert roles == {sender_id: "Self", receiver_id: "Family Member"}
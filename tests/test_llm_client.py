@@ -0,0 +1,26 @@
+import uuid
+
+from app.llm import LLMClient
+
+
+def check(client, symptoms, **params):
+    return client.post("/diagnosis/check", params=params,
+                       json={"symptoms": symptoms, "age": 30, "gender": "male"})
+
+
+def test_check_returns_the_parsed_groq_answer(client, groq_calls):
+    response = check(client, [f"symptom {uuid.uuid4().hex}"])
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["predicted_disease"] == "Common Cold"
+    assert body["urgency"] == "ROUTINE"
+    assert body["source"] == "ai"
+    assert groq_calls() == 1
+
+
+def test_sdk_client_is_created_once_and_reused():
+    llm = LLMClient(api_key="test", base_url="http://fake-groq")
+
+    assert llm.client is llm.client
+    assert llm.client.max_retries == 0
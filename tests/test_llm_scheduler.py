@@ -0,0 +1,179 @@
+import asyncio
+import time
+
+import pytest
+
+from app.llm import llm_client
+from app.llm_scheduler import CircuitBreaker, LLMScheduler, Shed, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def classify(error):
+    """RuntimeError stands in for a 5xx, LookupError for a 429; anything else is not retried."""
+    if isinstance(error, RuntimeError):
+        return "server_error", None
+    if isinstance(error, LookupError):
+        return "rate_limited", 0.01
+    return None, None
+
+
+def flaky(*errors, result="ok"):
+    """An attempt that raises `errors` in turn, then returns `result`; counts its calls."""
+    queue = list(errors)
+
+    async def attempt(remaining):
+        attempt.calls += 1
+        if queue:
+            raise queue.pop(0)
+        return result
+    attempt.calls = 0
+    return attempt
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_token_bucket_promises_future_quota_in_order():
+    clock = Clock()
+    bucket = TokenBucket(60, clock=clock)    # one a second
+    bucket.tokens = 1
+
+    assert bucket.reserve(1) == 0
+    assert bucket.delay(1) == pytest.approx(1)
+    assert bucket.reserve(1) == pytest.approx(1)
+    assert bucket.reserve(1) == pytest.approx(2)
+    clock.now += 2
+    assert bucket.delay(1) == pytest.approx(1)
+    bucket.refund(5)
+    assert bucket.delay(1) == 0
+
+
+def test_breaker_opens_then_lets_one_probe_through():
+    clock = Clock()
+    breaker = CircuitBreaker(failures=2, reset=30, clock=clock)
+    breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+
+    with pytest.raises(Shed) as shed:
+        breaker.check()
+    assert (shed.value.reason, shed.value.retry_after) == ("circuit_open", 30)
+
+    clock.now += 30
+    breaker.check()
+    assert breaker.state == "half_open"
+    with pytest.raises(Shed):
+        breaker.check()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    breaker.check()
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == ("closed", 0)
+
+
+def test_retry_until_success():
+    scheduler = LLMScheduler(max_retries=2, retry_base=0)
+    attempt = flaky(RuntimeError(), RuntimeError())
+
+    assert run(scheduler.retry(attempt, time.monotonic() + 5, classify)) == "ok"
+    assert attempt.calls == 3
+    assert scheduler.breaker.state == "closed"
+
+
+def test_retry_gives_up_after_max_retries_and_on_other_errors():
+    scheduler = LLMScheduler(max_retries=1, retry_base=0)
+    attempt = flaky(RuntimeError("first"), RuntimeError("second"))
+    with pytest.raises(RuntimeError, match="second"):
+        run(scheduler.retry(attempt, time.monotonic() + 5, classify))
+    assert attempt.calls == 2
+
+    attempt = flaky(ValueError())
+    with pytest.raises(ValueError):
+        run(scheduler.retry(attempt, time.monotonic() + 5, classify))
+    assert attempt.calls == 1
+
+
+def test_retry_stops_when_the_backoff_would_pass_the_deadline():
+    scheduler = LLMScheduler(max_retries=5, retry_base=10, retry_max=10)
+    scheduler.backoff = lambda attempt, retry_after=None: 10
+    attempt = flaky(RuntimeError())
+
+    with pytest.raises(RuntimeError):
+        run(scheduler.retry(attempt, time.monotonic() + 1, classify))
+    assert attempt.calls == 1
+
+
+def test_rate_limits_pause_calls_without_tripping_the_breaker():
+    scheduler = LLMScheduler(max_retries=3, retry_base=0, breaker=CircuitBreaker(failures=1))
+    attempt = flaky(LookupError(), LookupError())
+
+    assert run(scheduler.retry(attempt, time.monotonic() + 5, classify)) == "ok"
+    assert scheduler.breaker.state == "closed"
+    assert scheduler._paused_until > 0
+
+
+def test_backoff_is_capped_and_honours_retry_after():
+    scheduler = LLMScheduler(retry_base=1, retry_max=4)
+
+    assert all(0 <= scheduler.backoff(10) <= 4 for _ in range(50))
+    assert scheduler.backoff(0, retry_after=7) == 7
+
+
+def test_slot_sheds_when_the_queue_is_full_or_quota_would_miss_the_deadline():
+    async def admit(scheduler, deadline):
+        async with scheduler.slot(deadline):
+            return scheduler.running
+
+    assert run(admit(LLMScheduler(), time.monotonic() + 5)) == 1
+    with pytest.raises(Shed, match="queue full"):
+        run(admit(LLMScheduler(queue_size=0), time.monotonic() + 5))
+
+    scheduler = LLMScheduler(rpm=60)
+    scheduler.requests.tokens = 0
+    with pytest.raises(Shed) as shed:
+        run(admit(scheduler, time.monotonic() + 0.5))
+    assert shed.value.reason == "deadline" and shed.value.retry_after == pytest.approx(1, abs=0.05)
+
+
+def test_slot_caps_concurrency():
+    scheduler = LLMScheduler(max_concurrency=2)
+    peak = []
+
+    async def work():
+        async with scheduler.slot(time.monotonic() + 5):
+            peak.append(scheduler.running)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(6)))
+
+    run(main())
+    assert max(peak) == 2 and scheduler.waiting == scheduler.running == 0
+
+
+def test_open_circuit_fails_checks_fast(client, groq_calls, monkeypatch):
+    from bench import fake_groq
+    scheduler = LLMScheduler(max_retries=1, retry_base=0, breaker=CircuitBreaker(failures=2, reset=60))
+    monkeypatch.setattr(llm_client, "scheduler", scheduler)
+    fake_groq.faults.update(error_rate=1.0)
+
+    def check(symptoms):
+        return client.post("/diagnosis/check", json={"symptoms": symptoms, "age": 30, "gender": "male"})
+
+    assert check(["headache"]).status_code == 502
+    assert fake_groq.app.state.failed == 2 and scheduler.breaker.state == "open"
+
+    response = check(["rash"])
+    assert response.status_code == 503
+    assert 0 < int(response.headers["retry-after"]) <= 60
+    assert fake_groq.app.state.failed == 2
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app import metrics
+from app.utils import HashPool, hash_rejected
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # Metrics made here stay out of the app's /metrics output
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+    return metrics.REGISTRY
+
+
+def test_counter_and_histogram_render_in_prometheus_format(registry):
+    requests = metrics.Counter("requests", "Requests served", ["path"])
+    requests.inc(path='/a"b')
+    requests.inc(2, path='/a"b')
+    latency = metrics.Histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    assert metrics.render() == "\n".join([
+        "# HELP requests Requests served",
+        "# TYPE requests counter",
+        'requests_total{path="/a\\"b"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 2',
+        "latency_seconds_count 2",
+        "latency_seconds_sum 0.55",
+    ]) + "\n"
+
+
+def test_gauge_function_is_read_at_scrape_time(registry):
+    depth = [3]
+    metrics.Gauge("queue_depth", "Queued jobs", function=lambda: depth[0])
+    depth[0] = 7
+
+    assert "queue_depth 7" in metrics.render()
+
+
+def test_metric_without_samples_cannot_be_created(registry):
+    class Incomplete(metrics.Metric):
+        kind = "untyped"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "No samples")
+
+
+def test_hash_pool_rejects_jobs_past_its_queue_limit():
+    pool = HashPool(size=1, max_pending=2)
+    release = threading.Event()
+
+    def slow():
+        release.wait(5)
+        return "hashed"
+
+    async def main():
+        running = [asyncio.ensure_future(pool.run("test", slow)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.pending == 2
+        with pytest.raises(HTTPException) as error:
+            await pool.run("test", str, "pw")
+        release.set()
+        return error.value, await asyncio.gather(*running)
+
+    rejected = hash_rejected.value(op="test")
+    error, results = asyncio.run(main())
+    assert error.status_code == 503 and error.headers == {"Retry-After": "1"}
+    assert hash_rejected.value(op="test") == rejected + 1
+    assert results == ["hashed", "hashed"] and pool.pending == 0
+
+
+def test_login_hash_timings_show_up_in_metrics(client, make_user):
+    make_user()
+
+    body = client.get("/metrics").text
+    assert 'merocare_hash_seconds_count{op="verify"}' in body
+    assert "merocare_hash_pending 0" in body
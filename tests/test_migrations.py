@@ -0,0 +1,71 @@
+import os
+import subprocess
+import sys
+
+from sqlalchemy import (Boolean, Column, Date, DateTime, ForeignKey, Integer, MetaData, String, Table, Text,
+                        create_engine, func, inspect, text)
+
+from app import models
+
+
+def baseline_metadata():
+    """The tables as Base.metadata.create_all made them before the schema moved to Alembic"""
+    metadata = MetaData()
+    Table("UserInfo", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("full_name", String(100), nullable=False),
+          Column("email", String(100), unique=True, index=True),
+          Column("hashed_password", String(255), nullable=False),
+          Column("dob", Date), Column("gender", String(10)), Column("blood_group", String(5)),
+          Column("family_id", String(50)), Column("family_role", String(50)), Column("is_main_member", Boolean))
+    Table("Diagnosis", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("user_id", Integer, ForeignKey("UserInfo.id")),
+          Column("user_diagnosis", Text),
+          Column("created_at", DateTime(timezone=True), server_default=func.now()),
+          Column("visibility", String(10)))
+    Table("MedicalRecords", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("user_id", Integer, ForeignKey("UserInfo.id"), nullable=False),
+          Column("illness", String(150), nullable=False),
+          Column("doctor_name", String(100)), Column("hospital_name", String(150)), Column("appointment_date", Date))
+    Table("families", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("family_name", String(100)))
+    Table("family_connections", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("sender_id", Integer, ForeignKey("UserInfo.id")),
+          Column("receiver_id", Integer, ForeignKey("UserInfo.id")),
+          Column("receiver_role", String(50)), Column("target_family_id", String(50)), Column("status", String(20)),
+          Column("created_at", DateTime(timezone=True), server_default=func.now()))
+    return metadata
+
+
+def test_documented_upgrade_of_a_create_all_database(tmp_path, run_alembic):
+    url = f"sqlite:///{tmp_path / 'old.db'}"
+    engine = create_engine(url)
+    baseline_metadata().create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text('INSERT INTO "UserInfo" (id, full_name, email, hashed_password) VALUES (1, :name, :email, :pw)'),
+                     {"name": "A", "email": "a@x.io", "pw": "h"})
+        conn.execute(text('INSERT INTO "Diagnosis" (user_id, user_diagnosis, visibility) VALUES (1, :text, :visibility)'),
+                     {"text": "Symptoms:Fever\n\nPredicted Disease: Flu\n\nUrgency Level: URGENT", "visibility": "private"})
+
+    for step in (("stamp", "0001"), ("upgrade", "head"), ("check",)):
+        result = run_alembic(*step, url=url)
+        assert result.returncode == 0, result.stdout + result.stderr
+    backfill = subprocess.run([sys.executable, "-m", "scripts.backfill_diagnosis_fields"],
+                              env={**os.environ, "SQLALCHEMY_DATABASE_URL": url},
+                              capture_output=True, text=True)
+    assert backfill.returncode == 0, backfill.stderr
+
+    assert set(inspect(engine).get_table_names()) >= set(models.Base.metadata.tables)
+    with engine.connect() as conn:
+        assert conn.execute(text('SELECT predicted_disease, urgency FROM "Diagnosis"')).one() == ("Flu", "URGENT")
+        assert conn.execute(text('SELECT symptom FROM "DiagnosisSymptoms"')).scalars().all() == ["fever"]
+    engine.dispose()
+
+
+def test_migrations_match_the_models(run_alembic):
+    result = run_alembic("check")
+    assert result.returncode == 0, result.stdout + result.stderr
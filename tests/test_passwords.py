@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app import models, utils
+from app.database import SessionLocal
+from app.main import app
+from app.utils import HashPool, make_pwd_context
+
+
+def stored_hash(user_id):
+    with SessionLocal() as db:
+        return db.get(models.User, user_id).hashed_password
+
+
+def test_hashes_use_the_configured_cost():
+    assert make_pwd_context(rounds=5).hash("pw").startswith("$2b$05$")
+
+
+def test_hash_outside_the_cost_bounds_is_upgraded():
+    old = make_pwd_context(rounds=4).hash("pw")
+    context = make_pwd_context(rounds=5, min_rounds=5, max_rounds=6)
+
+    verified, new_hash = context.verify_and_update("pw", old)
+    assert verified and new_hash.startswith("$2b$05$")
+    assert context.verify_and_update("pw", new_hash) == (True, None)
+    assert context.verify_and_update("wrong", old) == (False, None)
+
+
+def test_login_rehashes_an_outdated_password(client, make_user):
+    user_id, _, user = make_user(password="secret")
+    assert stored_hash(user_id).startswith("$2b$04$")
+    with SessionLocal() as db:
+        db.get(models.User, user_id).hashed_password = make_pwd_context(rounds=5).hash("secret")
+        db.commit()
+
+    login = client.post("/login", data={"username": user["email"], "password": "secret"})
+
+    assert login.status_code == 200
+    assert stored_hash(user_id).startswith("$2b$04$")
+    assert client.post("/login", data={"username": user["email"], "password": "secret"}).status_code == 200
+
+
+def test_login_with_a_wrong_password_keeps_the_hash(client, make_user):
+    user_id, _, user = make_user(password="secret")
+    before = stored_hash(user_id)
+
+    assert client.post("/login", data={"username": user["email"], "password": "nope"}).status_code == 403
+    assert stored_hash(user_id) == before
+
+
+def test_queued_logins_do_not_hold_threadpool_threads(client, make_user, monkeypatch):
+    _, headers, user = make_user(password="secret")
+    pool = HashPool(size=1, max_pending=100)
+    monkeypatch.setattr(utils, "hash_pool", pool)
+    release = threading.Event()
+    # More queued logins than anyio's 40 threadpool threads
+    count = 50
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            blocker = asyncio.ensure_future(pool.run("test", release.wait, 10))
+            logins = [asyncio.ensure_future(http.post("/login", data={"username": user["email"], "password": "secret"}))
+                      for _ in range(count)]
+            deadline = time.monotonic() + 10
+            while pool.pending < count + 1 and time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+            queued = pool.pending
+            try:
+                # A sync route still gets a thread while every login waits for the pool
+                me = await asyncio.wait_for(http.get("/users/me", headers=headers), 5)
+            finally:
+                release.set()
+            await blocker
+            return queued, me, await asyncio.gather(*logins)
+
+    queued, me, logins = asyncio.run(main())
+    assert queued == count + 1
+    assert me.status_code == 200
+    assert all(login.status_code == 200 for login in logins)
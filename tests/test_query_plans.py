@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+def check_plans(url):
+    return subprocess.run([sys.executable, "-m", "scripts.check_query_plans"],
+                          env={**os.environ, "SQLALCHEMY_DATABASE_URL": url},
+                          capture_output=True, text=True, timeout=300)
+
+
+@pytest.fixture
+def plans_url(tmp_path):
+    return f"sqlite:///{tmp_path / 'plans.db'}"
+
+
+def test_routes_do_not_scan_whole_tables(plans_url):
+    result = check_plans(plans_url)
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "FULL SCAN" not in result.stdout
+
+
+def test_check_fails_without_the_hot_path_indexes(plans_url, run_alembic):
+    for step in (("upgrade", "head"), ("downgrade", "0002"), ("stamp", "head")):
+        migrated = run_alembic(*step, url=plans_url)
+        assert migrated.returncode == 0, migrated.stdout + migrated.stderr
+
+    result = check_plans(plans_url)
+
+    assert result.returncode == 1
+    assert "FULL SCAN" in result.stdout
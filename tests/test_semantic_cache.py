@@ -0,0 +1,73 @@
+import pytest
+
+from app.semantic_cache import SemanticCache, canonical, embed
+
+COLD = ["runny nose", "sneezing", "sore throat", "cough", "nasal congestion", "mild fever"]
+FLU = ["fever", "body aches", "chills", "headache"]
+
+
+@pytest.fixture
+def cache():
+    return SemanticCache(maxsize=10, threshold=0.9)
+
+
+def test_rewording_is_a_hit(cache):
+    cache.set("k", ["cough", "fever"], 30, "male", "answer")
+
+    assert cache.get(["Coughing", "fever since yesterday"], 34, "Male") == "answer"
+    assert cache.get(["cough", "fever"], 70, "male") is None
+    assert cache.get(["no fever", "cough"], 30, "male") is None
+
+
+@pytest.mark.parametrize("cached, query", [
+    (COLD, COLD + ["difficulty breathing"]),
+    (FLU, FLU + ["confusion"]),
+])
+def test_added_red_flag_is_refused_even_above_the_threshold(cache, cached, query):
+    assert float(embed(cached) @ embed(query)) >= cache.threshold
+    cache.set("k", cached, 30, "female", "routine answer")
+
+    assert cache.get(query, 30, "female") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_dropped_red_flag_is_refused(cache):
+    cache.set("k", COLD + ["difficulty breathing"], 30, "female", "emergency answer")
+
+    assert cache.get(COLD, 30, "female") is None
+
+
+def test_any_dropped_symptom_is_refused(cache):
+    cache.set("k", ["fever", "cough", "rash"], 30, "female", "measles answer")
+
+    assert cache.get(["fever", "cough"], 30, "female") is None
+
+
+def test_free_text_outside_the_vocabulary_counts(cache):
+    cache.set("k", ["fever", "cough"], 30, "female", "answer")
+
+    assert cache.get(["fever", "cough", "weird tingling"], 30, "female") is None
+    assert cache.get(["fever", "cough and weird tingling"], 30, "female") is None
+
+
+def test_spelling_variants_of_one_set_share_an_answer(cache):
+    cache.set("k", ["headache", "body ache"], 30, "female", "answer")
+
+    assert cache.get(["Headaches", "body aches"], 30, "female") == "answer"
+
+
+def test_canonical_reads_synonyms_plurals_and_negations():
+    assert canonical(["coughing", "headaches", "trouble breathing"]) == {"cough", "headache", "difficulty breathing"}
+    assert canonical(["no fever", "diabetes"]) == {"no fever", "diabetes"}
+
+
+def test_check_with_an_added_red_flag_asks_groq_again(client, groq_calls):
+    def check(symptoms):
+        response = client.post("/diagnosis/check", json={"symptoms": symptoms, "age": 30, "gender": "female"})
+        assert response.status_code == 200
+        return response.json()
+
+    check(FLU)
+    check(list(reversed(FLU)) + ["confusion"])
+
+    assert groq_calls() == 2
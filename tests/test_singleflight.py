@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from app.singleflight import SingleFlight, TooManyWaiters
+
+
+def test_concurrent_calls_with_one_key_run_once():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["answer"] * 5
+    assert len(runs) == 1
+    assert flight.executions == 1 and flight.shared == 4
+    assert flight.in_flight() == 0
+
+
+def test_failure_is_shared_but_not_remembered():
+    flight = SingleFlight()
+    runs = []
+
+    async def fail():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream down")
+
+    async def main():
+        results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+        with pytest.raises(ValueError):
+            await flight.do("k", fail)
+
+    asyncio.run(main())
+    assert len(runs) == 2
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "answer"
+
+
+def test_waiters_are_bounded():
+    flight = SingleFlight(max_waiters=1)
+
+    async def work():
+        await asyncio.sleep(0.01)
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0)
+        with pytest.raises(TooManyWaiters):
+            await flight.do("k", work)
+        await first
+
+    asyncio.run(main())
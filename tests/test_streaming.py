@@ -0,0 +1,49 @@
+import json
+
+from app.streaming import STREAMED_FIELDS, DiagnosisFieldParser, sse_event
+
+REPLY = json.dumps({
+    "predicted_disease": "Influenza",
+    "urgency": "URGENT",
+    "suggested_treatment": 'Rest and say "ahh"',
+    "full_response": "long text",
+})
+
+
+def parse_events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_parser_reports_each_field_once_as_soon_as_it_closes():
+    parser = DiagnosisFieldParser()
+    seen = []
+    for char in REPLY:
+        seen.extend(parser.feed(char))
+
+    assert seen == [("predicted_disease", "Influenza"), ("urgency", "URGENT"),
+                    ("suggested_treatment", 'Rest and say "ahh"')]
+    assert parser.buffer == REPLY
+
+
+def test_sse_event_format():
+    assert sse_event("field", {"a": 1}) == 'event: field\ndata: {"a": 1}\n\n'
+
+
+def test_check_stream_sends_tokens_fields_then_the_result(client):
+    response = client.post("/diagnosis/check/stream",
+                           json={"symptoms": ["sneezing"], "age": 20, "gender": "female"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_events(response.text)
+    kinds = [kind for kind, _ in events]
+    assert kinds[0] == "token" and kinds[-1] == "result"
+    fields = {data["name"]: data["value"] for kind, data in events if kind == "field"}
+    assert set(fields) == set(STREAMED_FIELDS)
+    result = events[-1][1]
+    assert result["predicted_disease"] == fields["predicted_disease"] == "Common Cold"
+    assert "".join(data["text"] for kind, data in events if kind == "token") == result["full_response"]
@@ -0,0 +1,45 @@
+from app.symptoms import MAX_SUGGESTIONS, normalize_symptoms, symptom_index
+
+
+def names(suggestions):
+    return [s["symptom"] for s in suggestions]
+
+
+def test_suggest_ranks_name_prefixes_before_word_matches_and_synonyms():
+    assert names(symptom_index.suggest("hea", 3)) == ["headache", "heartburn", "hearing loss"]
+    assert "chest pain" in names(symptom_index.suggest("pain", MAX_SUGGESTIONS))
+    assert symptom_index.suggest("JWA") == [{"symptom": "fever", "matched": "jwaro"}]
+    assert symptom_index.suggest("zzz") == []
+
+
+def test_suggest_lists_each_symptom_once():
+    found = names(symptom_index.suggest("c", MAX_SUGGESTIONS))
+
+    assert len(found) == len(set(found)) == MAX_SUGGESTIONS
+
+
+def test_normalize_maps_free_text_to_canonical_names():
+    assert normalize_symptoms(["Coughing", "i have fever since 2 days", "fever and sore throat"]) == \
+        ["cough", "fever", "sore throat"]
+    # A whole-entry match is tried before splitting on "and"
+    assert normalize_symptoms(["loss of smell and taste"]) == ["loss of smell"]
+    assert normalize_symptoms(["Weird  tingling thing!"]) == ["weird tingling thing"]
+
+
+def test_suggest_endpoint(client):
+    response = client.get("/diagnosis/symptoms/suggest", params={"q": "tummy", "limit": 1})
+
+    assert response.status_code == 200
+    assert response.json() == [{"symptom": "abdominal pain", "matched": "tummy ache"}]
+    assert client.get("/diagnosis/symptoms/suggest", params={"q": ""}).status_code == 422
+    assert client.get("/diagnosis/symptoms/suggest",
+                      params={"q": "a", "limit": MAX_SUGGESTIONS + 1}).status_code == 422
+
+
+def test_check_is_keyed_on_canonical_names(client, groq_calls):
+    for symptoms in (["Coughing", "jwaro"], ["fever", "cough"]):
+        response = client.post("/diagnosis/check", json={"symptoms": symptoms, "age": 40, "gender": "male"})
+        assert response.status_code == 200
+        assert response.json()["symptoms"] in ("cough, fever", "fever, cough")
+
+    assert groq_calls() == 1
@@ -0,0 +1,66 @@
+from sqlalchemy import func
+
+from app import models
+from app.database import SessionLocal
+
+
+def sync(client, headers, since=None):
+    response = client.get("/sync", headers=headers, params={"since": since} if since else {})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def save(client, headers):
+    response = client.post("/diagnosis/save-history", headers=headers, json={
+        "user_diagnosis": "Predicted Disease: Flu", "visibility": "private", "created_at": "2026-01-01T08:00:00Z",
+    })
+    return response.json()["id"]
+
+
+def test_delta_returns_upserts_and_tombstones_since_the_last_version(client, make_user):
+    _, headers, _ = make_user()
+    kept, dropped = save(client, headers), save(client, headers)
+    full = sync(client, headers)
+    assert full["full"] and {d["id"] for d in full["diagnoses"]} == {kept, dropped}
+
+    quiet = sync(client, headers, full["version"])
+    assert not quiet["full"] and quiet["diagnoses"] == [] and quiet["family_members"] is None
+
+    client.patch(f"/diagnosis/update-visibility/{kept}", headers=headers, params={"visibility": "public"})
+    client.delete(f"/diagnosis/delete/{dropped}", headers=headers)
+    delta = sync(client, headers, quiet["version"])
+
+    assert [(d["id"], d["visibility"]) for d in delta["diagnoses"]] == [(kept, "public")]
+    assert delta["deleted_diagnoses"] == [dropped]
+    assert sync(client, headers, delta["version"])["deleted_diagnoses"] == []
+
+
+def test_change_committed_after_a_higher_id_is_not_skipped(client, make_user):
+    user_id, headers, _ = make_user()
+    save(client, headers)
+    with SessionLocal() as db:
+        # A slow transaction took id top+1 but commits after id top+2 is already visible
+        late_id = db.query(func.max(models.ChangeLog.id)).scalar() + 1
+        db.add(models.ChangeLog(id=late_id + 1, user_id=0, entity="diagnosis", entity_id=0, op="upsert"))
+        db.commit()
+
+    before = sync(client, headers)
+    assert before["version"] == f"{late_id + 1}:{late_id}"
+
+    with SessionLocal() as db:
+        diagnosis = models.Diagnosis(user_id=user_id, user_diagnosis="late", visibility="private")
+        db.add(diagnosis)
+        db.flush()
+        db.add(models.ChangeLog(id=late_id, user_id=user_id, entity="diagnosis", entity_id=diagnosis.id, op="upsert"))
+        db.commit()
+        diagnosis_id = diagnosis.id
+
+    delta = sync(client, headers, before["version"])
+    assert [d["id"] for d in delta["diagnoses"]] == [diagnosis_id]
+    assert delta["version"] == str(late_id + 1)
+
+
+def test_malformed_version_is_rejected(client, make_user):
+    _, headers, _ = make_user()
+
+    assert client.get("/sync", headers=headers, params={"since": "abc"}).status_code == 400
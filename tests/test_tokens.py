@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app import models, oauth2
+from app.database import SessionLocal
+from app.revocation import RevocationIndex
+
+
+def access_token(user_id, issued_at):
+    claims = {"user_id": str(user_id), "iat": int(issued_at.timestamp()), "exp": issued_at + timedelta(hours=1)}
+    return jwt.encode(claims, oauth2.SECRET_KEY, algorithm=oauth2.ALGORITHM)
+
+
+def change_password(client, headers, old="pw", new="pw2"):
+    response = client.post("/users/change_password", headers=headers, json={"old_password": old, "new_password": new})
+    assert response.status_code == 200, response.text
+
+
+def test_revocation_cutoff_is_a_strict_whole_second():
+    index = RevocationIndex()
+    index.add(7, datetime.fromtimestamp(100.9, timezone.utc))
+
+    assert index.is_revoked(7, 99)
+    assert not index.is_revoked(7, 100)
+    assert index.is_revoked(7, None)
+    assert not index.is_revoked(8, 99)
+
+
+def test_password_change_revokes_older_tokens_but_not_a_new_login(client, make_user):
+    user_id, headers, user = make_user()
+    old_token = access_token(user_id, datetime.now(timezone.utc) - timedelta(seconds=5))
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {old_token}"}).status_code == 200
+
+    change_password(client, headers)
+    login = client.post("/login", data={"username": user["email"], "password": "pw2"}).json()
+
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {old_token}"}).status_code == 401
+    assert client.get("/users/me", headers={"Authorization": f"Bearer {login['access_token']}"}).status_code == 200
+
+
+def test_refresh_token_rotates_and_reuse_revokes_the_family(client, make_user):
+    _, _, tokens = make_user()
+    first = tokens["refresh_token"]
+
+    rotated = client.post("/token/refresh", json={"refresh_token": first})
+    assert rotated.status_code == 200
+    second = rotated.json()["refresh_token"]
+
+    assert client.post("/token/refresh", json={"refresh_token": first}).status_code == 401
+    assert client.post("/token/refresh", json={"refresh_token": second}).status_code == 401
+
+
+def test_refresh_token_lost_race_is_treated_as_reuse(client, make_user):
+    _, _, tokens = make_user()
+    token = tokens["refresh_token"]
+    with SessionLocal() as db:
+        # This session read the token before another request rotated it
+        db.query(models.RefreshToken).filter_by(token_hash=oauth2.hash_refresh_token(token)).one()
+        assert client.post("/token/refresh", json={"refresh_token": token}).status_code == 200
+
+        with pytest.raises(HTTPException) as error:
+            oauth2.rotate_refresh_token(db, token)
+        assert error.value.status_code == 401
@@ -0,0 +1,88 @@
+import pytest
+
+from app.config import Settings
+from app.routers import diagnosis
+from app.triage import get_triage_engine
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return get_triage_engine()
+
+
+@pytest.mark.parametrize("symptoms", [
+    ["no chest pain", "no shortness of breath"],
+    ["no difficulty breathing", "mild cough"],
+    ["denies chest pain", "not short of breath"],
+    ["fever without a stiff neck", "headache"],
+    ["patient doesn't have slurred speech", "runny nose"],
+])
+def test_negated_red_flags_do_not_raise_urgency(engine, symptoms):
+    result = engine.assess(symptoms, 45, "male")
+
+    assert result.urgency != "EMERGENCY"
+    assert not result.reasons
+    assert result.absent
+
+
+def test_negation_stops_at_the_end_of_its_clause(engine):
+    assert engine.parse("no fever, but chest pain and sweating") == (["chest pain", "sweating"], ["fever"])
+    assert engine.parse("no fever or chills") == ([], ["fever", "chills"])
+    assert engine.parse("cough") == (["cough"], [])
+
+
+def test_red_flags_still_raise_urgency(engine):
+    result = engine.assess(["chest pain", "no fever", "shortness of breath"], 50, "male")
+
+    assert result.urgency == "EMERGENCY"
+    assert result.absent == ["fever"]
+    assert "chest pain with shortness of breath" in result.reasons
+
+
+def test_symptom_reported_both_ways_counts_as_present(engine):
+    result = engine.assess(["difficulty breathing", "no difficulty breathing"], 30, "female")
+
+    assert result.urgency == "EMERGENCY" and result.absent == []
+
+
+def check(client, symptoms, engine="auto"):
+    response = client.post("/diagnosis/check", params={"engine": engine},
+                           json={"symptoms": symptoms, "age": 50, "gender": "male"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_checks_default_to_groq(client, groq_calls, monkeypatch):
+    from bench import fake_groq
+    monkeypatch.delenv("TRIAGE_ENGINE", raising=False)
+    assert Settings.from_env().triage_engine == diagnosis.TRIAGE_ENGINE == "ai"
+
+    # A slow Groq is waited for, not replaced by the offline engine
+    fake_groq.faults.update(latency=0.2)
+    monkeypatch.setattr(diagnosis, "TRIAGE_AI_BUDGET", 0.05)
+    response = client.post("/diagnosis/check", json={"symptoms": ["wheezing"], "age": 50, "gender": "male"})
+    assert response.json()["source"] == "ai" and groq_calls() == 1
+
+
+def test_auto_asks_groq_even_when_the_offline_engine_sees_an_emergency(client, groq_calls):
+    assert check(client, ["chest pain", "sweating"])["source"] == "ai"
+    assert check(client, ["no chest pain", "no shortness of breath"])["source"] == "ai"
+    assert groq_calls() == 2
+
+
+def test_emergency_precheck_is_opt_in(client, groq_calls, monkeypatch):
+    monkeypatch.setattr(diagnosis, "TRIAGE_EMERGENCY_PRECHECK", True)
+
+    answer = check(client, ["chest pain", "sweating"])
+    assert (answer["source"], answer["urgency"]) == ("local", "EMERGENCY")
+    assert check(client, ["no chest pain", "no sweating", "headache"])["source"] == "ai"
+    assert groq_calls() == 1
+
+
+def test_auto_falls_back_offline_when_groq_is_slow(client, monkeypatch):
+    from bench import fake_groq
+    fake_groq.faults.update(latency=0.5)
+    monkeypatch.setattr(diagnosis, "TRIAGE_AI_BUDGET", 0.05)
+
+    answer = check(client, ["wheezing", "chest tightness"])
+    assert answer["source"] == "local" and answer["predicted_disease"] == "Asthma Attack"